@@ -1,7 +1,17 @@
-# from django.contrib import admin
-# from .models import *
+from django.contrib import admin
+from .models import *
 
-# # Register your models here.
-# admin.site.register(AIModel)
-# admin.site.register(AIAnalysisResult)
-# admin.site.register(AITrainingData)
+# Register your models here.
+admin.site.register(AIModel)
+admin.site.register(AIAnalysisResult)
+admin.site.register(AITrainingData)
+
+
+@admin.register(AnalysisJob)
+class AnalysisJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'analysis_type', 'drill_hole', 'geo_property', 'user', 'status', 'created_at',
+                    'finished_at']
+    list_filter = ['status', 'analysis_type']
+    list_select_related = ['drill_hole', 'geo_property', 'user']
+    raw_id_fields = ['drill_hole', 'geo_property', 'user', 'result']
+    readonly_fields = ['created_at', 'started_at', 'finished_at']
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class AiAnalysisConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.ai_analysis'
+
+    def ready(self):
+        from . import signals  # noqa: F401
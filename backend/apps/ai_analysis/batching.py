@@ -0,0 +1,142 @@
+# backend/apps/ai_analysis/batching.py
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, List, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class _Pending:
+    __slots__ = ('item', 'length', 'future')
+
+    def __init__(self, item, length: int):
+        self.item = item
+        self.length = length
+        self.future = Future()
+
+
+class MicroBatcher:
+    """Run concurrent inference calls together, in batches, on one thread
+
+    Callers hand items to ``submit`` (or block in ``run``) from any thread.
+    Items that arrive while a batch runs are taken together by the next
+    one. When the last batch held more than one item, the batcher also
+    waits up to ``max_wait`` seconds for more, until ``max_batch_size``
+    items or ``max_tokens`` padded tokens are gathered; a lone caller is
+    never made to wait. The batch is sorted by length and split into
+    buckets no wider than ``bucket_width`` so each is padded only to its
+    own longest item, every bucket goes through ``run_batch`` once, and
+    the outputs are handed back to their callers.
+    """
+
+    def __init__(self, run_batch: Callable[[List], Sequence], length_of: Callable = len,
+                 max_batch_size: int = 32, max_tokens: int = 16384, max_wait: float = 0.005,
+                 bucket_width: int = 64, name: str = 'batcher'):
+        self.run_batch = run_batch
+        self.length_of = length_of
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_tokens = max_tokens
+        self.max_wait = max_wait
+        self.bucket_width = max(1, bucket_width)
+        self.name = name
+        self.batches = 0
+        self.items = 0
+        self._last_batch_size = 0
+        self._pending = deque()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._closed = False
+
+    def submit(self, item) -> Future:
+        """Queue one item; the future resolves to its output"""
+        pending = _Pending(item, self.length_of(item))
+        with self._condition:
+            if self._closed:
+                raise RuntimeError(f'{self.name} is closed')
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._serve, name=self.name, daemon=True)
+                self._thread.start()
+            self._pending.append(pending)
+            self._condition.notify()
+        return pending.future
+
+    def run(self, items: Sequence) -> List:
+        """Outputs for several items, batched with whatever else is waiting"""
+        futures = [self.submit(item) for item in items]
+        return [future.result() for future in futures]
+
+    def close(self):
+        """Stop the batching thread once the queued items are done"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.items / self.batches if self.batches else 0.0
+
+    def _serve(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            self._run(batch)
+
+    def _collect(self):
+        with self._condition:
+            while not self._pending:
+                if self._closed:
+                    return None
+                self._condition.wait()
+
+            # Only wait for company when callers have been arriving together
+            deadline = time.monotonic() + (self.max_wait if self._last_batch_size > 1 else 0)
+            while len(self._pending) < self.max_batch_size and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._padded_tokens(self._pending) >= self.max_tokens:
+                    break
+                self._condition.wait(remaining)
+
+            batch, longest = [], 0
+            while self._pending and len(batch) < self.max_batch_size:
+                candidate = self._pending[0]
+                padded = (len(batch) + 1) * max(longest, candidate.length)
+                if batch and padded > self.max_tokens:
+                    break
+                batch.append(self._pending.popleft())
+                longest = max(longest, candidate.length)
+            self._last_batch_size = len(batch)
+            return batch
+
+    @staticmethod
+    def _padded_tokens(pending) -> int:
+        return len(pending) * max(item.length for item in pending)
+
+    def _run(self, batch: List[_Pending]):
+        buckets = []
+        for pending in sorted(batch, key=lambda pending: pending.length):
+            if buckets and pending.length - buckets[-1][0].length < self.bucket_width:
+                buckets[-1].append(pending)
+            else:
+                buckets.append([pending])
+        for bucket in buckets:
+            # A caller may have given up on its future; skip it rather than fail the bucket
+            bucket = [pending for pending in bucket if pending.future.set_running_or_notify_cancel()]
+            if not bucket:
+                continue
+            try:
+                outputs = self.run_batch([pending.item for pending in bucket])
+                if len(outputs) != len(bucket):
+                    raise ValueError(f'run_batch returned {len(outputs)} outputs for {len(bucket)} items')
+            except Exception as e:
+                logger.exception(f"{self.name}: batch of {len(bucket)} failed")
+                for pending in bucket:
+                    pending.future.set_exception(e)
+                continue
+            self.batches += 1
+            self.items += len(bucket)
+            for pending, output in zip(bucket, outputs):
+                pending.future.set_result(output)
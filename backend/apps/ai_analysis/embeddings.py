@@ -0,0 +1,256 @@
+# backend/apps/ai_analysis/embeddings.py
+import fcntl
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Sequence
+
+import numpy as np
+from django.conf import settings
+from django.utils.text import slugify
+
+DIGEST_SIZE = 16
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    """Case and whitespace differences don't change what a text embeds to"""
+    return _WHITESPACE.sub(' ', text).strip().lower()
+
+
+def model_version(ai_model) -> str:
+    """Directory name for an AIModel's embeddings; new weights mean a new directory"""
+    weights = hashlib.blake2b(
+        f'{ai_model.name}\0{ai_model.version}\0{ai_model.huggingface_model_id}'.encode('utf-8'), digest_size=4,
+    ).hexdigest()
+    return f"{slugify(ai_model.name)}-v{slugify(ai_model.version.replace('.', '-'))}-{weights}"
+
+
+def _write_atomic(target: Path, write: Callable):
+    fd, temporary = tempfile.mkstemp(dir=target.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            write(out)
+        os.replace(temporary, target)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+class EmbeddingStore:
+    """Content-addressed text embeddings of one model version, on disk
+
+    Vectors are float16 rows appended to ``vectors.f16`` and read through a
+    memory map. ``index.npz`` lists the key of each row (a hash of the model
+    version and the normalized text), in row order, with when it was last
+    used. Writers hold an exclusive file lock and readers a shared one, and
+    the index is written to a temporary name and renamed into place, so
+    processes sharing the directory never pair an index with the wrong
+    vectors. When the vectors outgrow ``max_bytes`` the least recently used
+    rows are dropped.
+    """
+
+    def __init__(self, directory: os.PathLike, version: str, max_bytes: Optional[int] = None):
+        self.directory = Path(directory)
+        self.version = version
+        self.max_bytes = max_bytes or getattr(settings, 'AI_EMBEDDING_STORE_MAX_BYTES', 256 * 1024 * 1024)
+        self.vectors_path = self.directory / 'vectors.f16'
+        self.index_path = self.directory / 'index.npz'
+        self.dimensions = None
+        self._rows = {}
+        self._keys = np.empty(0, dtype=f'S{DIGEST_SIZE}')
+        self._last_used = np.empty(0, dtype=np.int64)
+        self._index_stamp = None
+        self._vectors = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_model(cls, ai_model, root: Optional[os.PathLike] = None) -> 'EmbeddingStore':
+        root = Path(root or embedding_root())
+        version = model_version(ai_model)
+        return cls(root / version, version)
+
+    def key(self, text: str) -> bytes:
+        return hashlib.blake2b(
+            f'{self.version}\0{normalize_text(text)}'.encode('utf-8'), digest_size=DIGEST_SIZE,
+        ).digest()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @contextmanager
+    def _file_lock(self, shared: bool = False):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / 'lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _refresh(self):
+        """Reload the index if another process has replaced it"""
+        try:
+            stat = self.index_path.stat()
+        except FileNotFoundError:
+            return
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if stamp == self._index_stamp:
+            return
+        with np.load(self.index_path) as index:
+            keys, last_used = index['keys'], index['last_used']
+            self.dimensions = int(index['dimensions'])
+        # Keep this process's more recent uses of rows that survived
+        previous = dict(zip(self._keys.tolist(), self._last_used.tolist()))
+        self._keys = keys
+        self._last_used = np.array([max(used, previous.get(key, 0)) for key, used in zip(keys.tolist(), last_used)],
+                                   dtype=np.int64)
+        self._rows = {key: row for row, key in enumerate(keys.tolist())}
+        self._index_stamp = stamp
+        self._vectors = None
+
+    def _vector_file(self) -> np.ndarray:
+        needed = len(self._keys)
+        if self._vectors is None or len(self._vectors) < needed:
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float16, mode='r', shape=(needed, self.dimensions))
+        return self._vectors
+
+    def lookup(self, keys: Sequence[bytes]):
+        """Vectors for the keys that are stored, as (positions found, float32 rows)"""
+        with self._lock, self._file_lock(shared=True):
+            self._refresh()
+            found = [(position, self._rows[key]) for position, key in enumerate(keys) if key in self._rows]
+            if not found:
+                return np.empty(0, dtype=np.int64), np.empty((0, self.dimensions or 0), dtype=np.float32)
+            positions, rows = (np.array(column, dtype=np.int64) for column in zip(*found))
+            vectors = np.asarray(self._vector_file()[rows], dtype=np.float32)
+            # Saved with the next write to the index
+            self._last_used[rows] = time.time_ns()
+            return positions, vectors
+
+    def add(self, keys: Sequence[bytes], vectors: np.ndarray):
+        """Append vectors for keys not stored yet, then enforce the size cap"""
+        vectors = np.asarray(vectors, dtype=np.float16)
+        with self._lock, self._file_lock():
+            self._refresh()
+            if self.dimensions is None:
+                self.dimensions = vectors.shape[1]
+            elif vectors.shape[1] != self.dimensions:
+                raise ValueError(f'Expected {self.dimensions}-dimensional vectors, got {vectors.shape[1]}')
+            fresh = {}
+            for key, vector in zip(keys, vectors):
+                if key not in self._rows and key not in fresh:
+                    fresh[key] = vector
+            if not fresh:
+                return
+
+            start = len(self._keys)
+            with open(self.vectors_path, 'ab') as out:
+                # Drop rows a crashed writer appended without indexing them
+                out.truncate(start * self.dimensions * 2)
+                out.write(np.stack(list(fresh.values())).tobytes())
+            now = time.time_ns()
+            self._keys = np.concatenate([self._keys, np.array(list(fresh), dtype=f'S{DIGEST_SIZE}')])
+            self._last_used = np.concatenate([self._last_used, np.full(len(fresh), now, dtype=np.int64)])
+            self._rows.update((key, start + offset) for offset, key in enumerate(fresh))
+
+            if self.size_bytes > self.max_bytes:
+                self._compact(int(self.max_bytes * 0.75))
+            else:
+                self._write_index()
+
+    def reload(self):
+        """Read the latest index written by any process"""
+        with self._lock, self._file_lock(shared=True):
+            self._refresh()
+
+    def shrink(self, max_bytes: int) -> int:
+        """Drop least recently used vectors until the store fits max_bytes; returns how many"""
+        with self._lock, self._file_lock():
+            self._refresh()
+            before = len(self._keys)
+            if self.size_bytes > max_bytes:
+                self._compact(max_bytes)
+            return before - len(self._keys)
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._keys) * (self.dimensions or 0) * 2
+
+    def _write_index(self):
+        _write_atomic(self.index_path, lambda out: np.savez(
+            out, keys=self._keys, last_used=self._last_used, dimensions=self.dimensions,
+        ))
+        stat = self.index_path.stat()
+        self._index_stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _compact(self, target_bytes: int):
+        """Keep the most recently used rows that fit in target_bytes"""
+        keep = max(0, target_bytes // (2 * self.dimensions))
+        # Most recently used first; among rows used together, the newer ones
+        order = np.sort(np.lexsort((-np.arange(len(self._keys)), -self._last_used))[:keep])
+        source = np.memmap(self.vectors_path, dtype=np.float16, mode='r', shape=(len(self._keys), self.dimensions))
+        # Copy the kept rows out before the file under the map is replaced
+        compacted = np.ascontiguousarray(source[order])
+        del source
+        _write_atomic(self.vectors_path, lambda out: out.write(compacted.tobytes()))
+        self._keys = self._keys[order]
+        self._last_used = self._last_used[order]
+        self._rows = {key: row for row, key in enumerate(self._keys.tolist())}
+        self._vectors = None
+        self._write_index()
+
+    def get_or_encode(self, texts: Sequence[str], encode: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """Embeddings of texts, encoding only those (deduplicated) not stored yet"""
+        keys = [self.key(text) for text in texts]
+        positions, vectors = self.lookup(keys)
+        result = None
+        if len(positions):
+            result = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            result[positions] = vectors
+
+        missing = np.ones(len(texts), dtype=bool)
+        missing[positions] = False
+        if missing.any():
+            first_of = {}
+            for position in np.flatnonzero(missing).tolist():
+                first_of.setdefault(keys[position], position)
+            encoded = np.asarray(encode([texts[position] for position in first_of.values()]), dtype=np.float16)
+            self.add(list(first_of), encoded)
+            # Rounded like stored vectors, so a text embeds the same whether it was cached or not
+            encoded = encoded.astype(np.float32)
+            if result is None:
+                result = np.empty((len(texts), encoded.shape[1]), dtype=np.float32)
+            by_key = dict(zip(first_of, encoded))
+            for position in np.flatnonzero(missing).tolist():
+                result[position] = by_key[keys[position]]
+        if result is None:
+            return np.empty((0, self.dimensions or 0), dtype=np.float32)
+        return result
+
+
+def embedding_root() -> Path:
+    return Path(getattr(settings, 'AI_EMBEDDING_ROOT', Path(settings.MEDIA_ROOT) / 'embeddings'))
+
+
+def stored_versions(root: Optional[os.PathLike] = None) -> List[str]:
+    root = Path(root or embedding_root())
+    if not root.is_dir():
+        return []
+    return sorted(path.name for path in root.iterdir() if path.is_dir())
+
+
+def evict_versions(keep: Iterable[str], root: Optional[os.PathLike] = None) -> List[str]:
+    """Delete the stored embeddings of every model version not in ``keep``"""
+    root = Path(root or embedding_root())
+    keep = set(keep)
+    evicted = [version for version in stored_versions(root) if version not in keep]
+    for version in evicted:
+        shutil.rmtree(root / version, ignore_errors=True)
+    return evicted
@@ -0,0 +1,141 @@
+# backend/apps/ai_analysis/features.py
+from operator import itemgetter
+from typing import Dict, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
+
+GRADE_COLUMNS = ['gold_grade', 'silver_grade', 'copper_grade']
+
+# Category columns and the value a missing entry reads as
+CATEGORY_COLUMNS = {'rock_type': 'unknown', 'alteration': '', 'mineralization': 'none'}
+
+
+def _encode(values: Sequence, missing: str):
+    """Dictionary-encode strings: (codes, names), codes numbered in order of first appearance"""
+    names = {}
+    # Only distinct values go through Python; None and ``missing`` share a code
+    codes = {value: names.setdefault(missing if value is None else str(value), len(names))
+             for value in dict.fromkeys(values)}
+    encoded = np.fromiter(map(codes.__getitem__, values), dtype=np.int32, count=len(values))
+    return encoded, np.array(list(names), dtype=object)
+
+
+def _format(template: str, values: np.ndarray, skip_empty: bool = False) -> List[str]:
+    """template.format(value) for every value, formatting each distinct value once
+
+    With ``skip_empty``, zero and NaN come out as empty strings.
+    """
+    distinct, inverse = np.unique(values, return_inverse=True)
+    formatted = np.array([template.format(value) if not skip_empty or (value and value == value) else ''
+                          for value in distinct.tolist()], dtype=object)
+    return formatted[inverse.reshape(-1)].tolist()
+
+
+def _format_each(template: str, values: Sequence, skip_empty: bool = False) -> List[str]:
+    """template.format(value) for values as given, so e.g. an int depth keeps reading as an int
+
+    With ``skip_empty``, falsy values come out as empty strings.
+    """
+    return [template.format(value) if not skip_empty or value else '' for value in values]
+
+
+class DrillIntervals:
+    """Struct-of-arrays view of one hole's samples, for the drill analysis
+
+    Depths are float64 with missing values read as 0, grades are float64
+    with NaN for missing assays, and ``rock_type``, ``alteration`` and
+    ``mineralization`` hold integer codes into the matching ``*_names``
+    arrays. Samples keep the order they were given in. ``text_values``
+    optionally holds, per depth or grade column, the values to write into
+    the interval texts in place of the float arrays.
+    """
+
+    def __init__(self, columns: Mapping[str, Sequence], text_values: Optional[Mapping[str, Sequence]] = None):
+        self.text_values = dict(text_values or {})
+        count = len(next(iter(columns.values()), []))
+
+        def floats(name: str) -> np.ndarray:
+            # None becomes NaN when cast to float
+            return np.array(columns[name], dtype=np.float64) if name in columns else np.full(count, np.nan)
+
+        self.from_depth = np.nan_to_num(floats('from_depth'))
+        self.to_depth = np.nan_to_num(floats('to_depth'))
+        self.grades = {name: floats(name) for name in GRADE_COLUMNS}
+        for name, missing in CATEGORY_COLUMNS.items():
+            codes, names = _encode(list(columns.get(name, [None] * count)), missing)
+            setattr(self, name, codes)
+            setattr(self, f'{name}_names', names)
+
+    @classmethod
+    def from_samples(cls, samples: Sequence[Dict]) -> 'DrillIntervals':
+        """Build from one dict per sample, reading values the way the per-dict analysis did
+
+        Texts show depths and grades exactly as given, with a missing depth
+        read as 0. A missing category takes its CATEGORY_COLUMNS value, while
+        a None rock type or mineralization reads as 'None' (a None alteration
+        is left out, like an empty one).
+        """
+        numeric = ['from_depth', 'to_depth', *GRADE_COLUMNS]
+        columns = {name: [sample.get(name) for sample in samples] for name in numeric}
+        for name, missing in CATEGORY_COLUMNS.items():
+            values = [sample.get(name, missing) for sample in samples]
+            columns[name] = values if name == 'alteration' else ['None' if value is None else value for value in values]
+        text_values = {name: [sample.get(name, 0) for sample in samples] for name in ('from_depth', 'to_depth')}
+        text_values.update((name, columns[name]) for name in GRADE_COLUMNS)
+        return cls(columns, text_values)
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Sequence], fields: Sequence[str]) -> 'DrillIntervals':
+        """Build from values_list rows holding ``fields`` in order"""
+        rows = list(rows)
+        return cls({name: list(map(itemgetter(position), rows)) for position, name in enumerate(fields)})
+
+    @classmethod
+    def coerce(cls, samples: Union['DrillIntervals', Sequence[Dict]]) -> 'DrillIntervals':
+        return samples if isinstance(samples, cls) else cls.from_samples(samples)
+
+    def __len__(self):
+        return len(self.from_depth)
+
+    @property
+    def gold_grade(self) -> np.ndarray:
+        return self.grades['gold_grade']
+
+    def category_matches(self, name: str, substring: str) -> np.ndarray:
+        """Per-interval mask of category values containing substring (case-insensitive)
+
+        The test runs once per distinct value rather than once per interval.
+        """
+        names = getattr(self, f'{name}_names')
+        matching = np.array([substring in value.lower() for value in names], dtype=bool)
+        return matching[getattr(self, name)] if len(names) else np.zeros(len(self), dtype=bool)
+
+    def texts(self) -> List[str]:
+        """One description per interval, as fed to the drill transformer"""
+        rock = np.array([f"Rock type {name}, " for name in self.rock_type_names.tolist()], dtype=object)
+        alteration = np.array([f"Alteration: {name}, " if name else '' for name in self.alteration_names.tolist()],
+                              dtype=object)
+        mineralization = np.array([f"Mineralization: {name}" for name in self.mineralization_names.tolist()],
+                                  dtype=object)
+        if 'from_depth' in self.text_values:
+            starts, ends = (_format_each("{}", self.text_values[name]) for name in ('from_depth', 'to_depth'))
+        else:
+            # A hole's to_depths are mostly its next from_depths, so format them together
+            depths = _format("{}", np.concatenate([self.from_depth, self.to_depth]))
+            starts, ends = depths[:len(self)], depths[len(self):]
+        columns = [
+            [f"Depth {start}-{end}m: " for start, end in zip(starts, ends)],
+            rock[self.rock_type].tolist(),
+            # Zero and missing grades are left out of the description
+            self._grade_texts('gold_grade', "Au {}g/t, "),
+            self._grade_texts('silver_grade', "Ag {}g/t, "),
+            self._grade_texts('copper_grade', "Cu {}%, "),
+            alteration[self.alteration].tolist(),
+            mineralization[self.mineralization].tolist(),
+        ]
+        return [''.join(parts) for parts in zip(*columns)]
+
+    def _grade_texts(self, name: str, template: str) -> List[str]:
+        if name in self.text_values:
+            return _format_each(template, self.text_values[name], skip_empty=True)
+        return _format(template, self.grades[name], skip_empty=True)
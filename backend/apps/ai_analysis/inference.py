@@ -0,0 +1,66 @@
+# backend/apps/ai_analysis/inference.py
+from typing import List, Sequence
+
+import numpy as np
+from django.conf import settings
+
+from .batching import MicroBatcher
+
+
+def batch_options() -> dict:
+    """MicroBatcher settings for transformer inference (AI_BATCH_* in settings)"""
+    return {
+        'max_batch_size': getattr(settings, 'AI_BATCH_MAX_SIZE', 32),
+        'max_tokens': getattr(settings, 'AI_BATCH_MAX_TOKENS', 16384),
+        'max_wait': getattr(settings, 'AI_BATCH_WAIT_MS', 5) / 1000,
+        'bucket_width': getattr(settings, 'AI_BATCH_BUCKET_WIDTH', 64),
+    }
+
+
+class TextEncoder:
+    """Mean-pooled transformer embeddings of short texts
+
+    Texts are tokenized on the caller's thread and the forward passes go
+    through a MicroBatcher, so concurrent analyses share padded batches
+    instead of each running the model on its own.
+    """
+
+    def __init__(self, tokenizer, model, max_length: int = None, **options):
+        self.tokenizer = tokenizer
+        self.model = model
+        self.max_length = max_length or getattr(settings, 'AI_MAX_SEQUENCE_LENGTH', 512)
+        self.batcher = MicroBatcher(self.encode_batch, **{**batch_options(), 'name': 'text-encoder', **options})
+
+    @property
+    def dimensions(self) -> int:
+        return self.model.config.hidden_size
+
+    def tokenize(self, texts: Sequence[str]) -> List[List[int]]:
+        if not texts:
+            return []
+        return self.tokenizer(list(texts), truncation=True, max_length=self.max_length)['input_ids']
+
+    def encode_batch(self, input_ids: List[List[int]]) -> np.ndarray:
+        """One forward pass over token ids padded to the longest; (n, dimensions) float32"""
+        import torch
+
+        encoded = self.tokenizer.pad({'input_ids': input_ids}, padding=True, return_tensors='pt')
+        with torch.inference_mode():
+            hidden = self.model(**encoded).last_hidden_state
+        mask = encoded['attention_mask'].unsqueeze(-1).to(hidden.dtype)
+        pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+        return pooled.float().numpy()
+
+    def encode(self, texts: Sequence[str], batched: bool = True) -> np.ndarray:
+        """Embeddings of texts; ``batched=False`` runs them on their own, without the batcher"""
+        input_ids = self.tokenize(texts)
+        if not input_ids:
+            return np.empty((0, self.dimensions), dtype=np.float32)
+        if not batched:
+            size = self.batcher.max_batch_size
+            return np.concatenate([self.encode_batch(input_ids[start:start + size])
+                                   for start in range(0, len(input_ids), size)])
+        return np.stack(self.batcher.run(input_ids))
+
+    def close(self):
+        self.batcher.close()
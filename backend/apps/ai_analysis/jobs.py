@@ -0,0 +1,172 @@
+# backend/apps/ai_analysis/jobs.py
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.geological_data.block_model import build_block_model
+from apps.geological_data.models import DrillSample
+from apps.geostatistics.services import get_variogram, krige_property
+from .features import DrillIntervals
+from .models import AIAnalysisResult, AnalysisJob
+from .registry import registry
+from .services import DRILLING_MODEL, MAGNETIC_MODEL, ai_analyzer
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_FIELDS = ['from_depth', 'to_depth', 'rock_type', 'gold_grade', 'silver_grade', 'copper_grade',
+                 'alteration', 'mineralization']
+
+_local_pool = None
+_local_pool_lock = threading.Lock()
+
+
+class AnalysisError(Exception):
+    """The analyzer reported a failure instead of a result"""
+
+
+def submit_job(user, analysis_type: str, drill_hole=None, geo_property=None, parameters=None) -> AnalysisJob:
+    """Queue an analysis and return its job; it is dispatched once the transaction commits"""
+    job = AnalysisJob.objects.create(
+        user=user if user is not None and user.is_authenticated else None,
+        analysis_type=analysis_type,
+        drill_hole=drill_hole,
+        geo_property=geo_property,
+        parameters=parameters or {},
+    )
+    transaction.on_commit(lambda: dispatch(job.pk))
+    return job
+
+
+def submit_or_reuse_job(user, analysis_type: str, geo_property, parameters) -> AnalysisJob:
+    """Return the user's unfinished job for the same work, or queue a new one
+
+    Jobs in the local pool are lost when the process restarts and a crashed
+    worker leaves its job running, so unfinished jobs older than
+    ANALYSIS_JOB_TIMEOUT are marked failed rather than reused.
+    """
+    pending = AnalysisJob.objects.filter(
+        analysis_type=analysis_type, geo_property=geo_property, user=user, parameters=parameters,
+        status__in=[AnalysisJob.QUEUED, AnalysisJob.RUNNING],
+    )
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=getattr(settings, 'ANALYSIS_JOB_TIMEOUT', 60 * 60))
+    pending.filter(Q(started_at__lt=cutoff) | Q(started_at__isnull=True, created_at__lt=cutoff)).update(
+        status=AnalysisJob.FAILED, error="The job did not finish in time", finished_at=now,
+    )
+    return pending.first() or submit_job(user, analysis_type, geo_property=geo_property, parameters=parameters)
+
+
+def dispatch(job_id):
+    """Hand a job to the Celery workers, or to the in-process pool in local mode"""
+    if getattr(settings, 'ANALYSIS_JOBS_LOCAL', True):
+        _get_local_pool().submit(_run_local, job_id)
+    else:
+        from .tasks import run_analysis_job
+        run_analysis_job.delay(str(job_id))
+
+
+def _get_local_pool() -> ThreadPoolExecutor:
+    global _local_pool
+    with _local_pool_lock:
+        if _local_pool is None:
+            _local_pool = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'ANALYSIS_LOCAL_WORKERS', 2), thread_name_prefix='analysis',
+            )
+        return _local_pool
+
+
+def _run_local(job_id):
+    try:
+        run_job(job_id)
+    finally:
+        # Pool threads outlive requests, so nothing else closes their connection
+        close_old_connections()
+
+
+def run_job(job_id):
+    """Run one queued job to completion; a job another worker has claimed is left alone"""
+    claimed = AnalysisJob.objects.filter(pk=job_id, status=AnalysisJob.QUEUED).update(
+        status=AnalysisJob.RUNNING, started_at=timezone.now(),
+    )
+    if not claimed:
+        return
+    job = AnalysisJob.objects.select_related('drill_hole', 'geo_property').get(pk=job_id)
+    try:
+        result = ANALYSES[job.analysis_type](job)
+    except Exception as e:
+        logger.exception(f"Analysis job {job_id} failed")
+        AnalysisJob.objects.filter(pk=job_id).update(
+            status=AnalysisJob.FAILED, error=str(e) or type(e).__name__, finished_at=timezone.now(),
+        )
+        return
+    AnalysisJob.objects.filter(pk=job_id).update(
+        status=AnalysisJob.SUCCEEDED, result=result, finished_at=timezone.now(),
+    )
+
+
+def _save_result(job, ai_model, results) -> AIAnalysisResult:
+    if results.get('error'):
+        raise AnalysisError(results['error_message'])
+    return AIAnalysisResult.objects.create(
+        drill_hole=job.drill_hole,
+        geo_property=job.geo_property,
+        analysis_type=job.analysis_type,
+        ai_model=ai_model,
+        confidence_score=results['confidence_score'],
+        predicted_grade=results.get('predicted_grade'),
+        anomalies_detected=results['anomalies_detected'],
+        detailed_results=results.get('detailed_results', {}),
+        ai_interpretation=results['ai_interpretation'],
+        recommendations=results['recommendations'],
+        processing_time=results.get('processing_time', 0)
+    )
+
+
+def _analyze_drill_hole(job) -> AIAnalysisResult:
+    rows = DrillSample.objects.filter(drill_hole=job.drill_hole).order_by('from_depth').values_list(*SAMPLE_FIELDS)
+    # Columns go straight into arrays, without a dict per sample
+    intervals = DrillIntervals.from_rows(rows, SAMPLE_FIELDS)
+    results = ai_analyzer.analyze_drill_data(job.drill_hole_id, intervals)
+    return _save_result(job, registry.get_ai_model(DRILLING_MODEL), results)
+
+
+def _analyze_magnetic_survey(job) -> AIAnalysisResult:
+    # Simulate magnetic survey data
+    survey_data = np.random.normal(50000, 1000, (50, 50))  # nT values
+    results = ai_analyzer.analyze_magnetic_survey(survey_data, job.geo_property_id)
+    return _save_result(job, registry.get_ai_model(MAGNETIC_MODEL), results)
+
+
+def _build_block_model(job) -> None:
+    # parameters were cleaned at submission; the grid and its metadata go to the array store
+    build_block_model(job.geo_property, job.parameters)
+    return None
+
+
+def _compute_variogram(job) -> None:
+    # Kept in the cache under the property's data version, as a request would have
+    get_variogram(job.geo_property, job.parameters)
+    return None
+
+
+def _krige(job) -> None:
+    # Kept in the array store under the property's data version
+    krige_property(job.geo_property, job.parameters)
+    return None
+
+
+# Runner for each analysis type that can be submitted as a job
+ANALYSES = {
+    'drill_hole': _analyze_drill_hole,
+    'magnetic_survey': _analyze_magnetic_survey,
+    'block_model': _build_block_model,
+    'variogram': _compute_variogram,
+    'kriging': _krige,
+}
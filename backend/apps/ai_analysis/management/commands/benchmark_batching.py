@@ -0,0 +1,81 @@
+# backend/apps/ai_analysis/management/commands/benchmark_batching.py
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.ai_analysis.inference import TextEncoder
+from apps.ai_analysis.services import GeologicalAIAnalyzer
+
+ROCK_TYPES = ['volcanic', 'sedimentary', 'intrusive', 'metamorphic']
+ALTERATIONS = ['sericite', 'chlorite', 'potassic', 'silica', '']
+MINERALIZATION = ['disseminated pyrite', 'quartz veining with pyrite', 'none', 'chalcopyrite stringers']
+
+
+def synthetic_requests(count: int, samples: int):
+    """Interval descriptions for ``count`` analyses of ``samples`` intervals each"""
+    rng = random.Random(0)
+    analyzer = GeologicalAIAnalyzer()
+    requests = []
+    for _ in range(count):
+        depth = rng.uniform(0, 300)
+        drill_samples = []
+        for _ in range(samples):
+            length = rng.choice([0.5, 1.0, 1.5, 2.0])
+            drill_samples.append({
+                'from_depth': round(depth, 1), 'to_depth': round(depth + length, 1),
+                'rock_type': rng.choice(ROCK_TYPES), 'gold_grade': round(rng.lognormvariate(0, 1), 2),
+                'alteration': rng.choice(ALTERATIONS), 'mineralization': rng.choice(MINERALIZATION),
+            })
+            depth += length
+        requests.append(analyzer._sample_texts(drill_samples))
+    return requests
+
+
+class Command(BaseCommand):
+    help = "Compare drill-text inference throughput with and without micro-batching"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', default='distilbert-base-uncased', help="Hugging Face model id")
+        parser.add_argument('--requests', type=int, default=128, help="Analyses per run")
+        parser.add_argument('--samples', type=int, default=4, help="Intervals per analysis")
+        parser.add_argument('--concurrency', default='1,8,16,32', help="Comma-separated caller thread counts")
+
+    def handle(self, *args, **options):
+        try:
+            concurrency = [int(part) for part in options['concurrency'].split(',') if part.strip()]
+        except ValueError:
+            raise CommandError("--concurrency must be comma-separated integers")
+        if options['requests'] < 1 or options['samples'] < 1 or not concurrency or min(concurrency) < 1:
+            raise CommandError("--requests, --samples and --concurrency must be positive")
+        try:
+            import torch
+            from transformers import AutoModel, AutoTokenizer
+        except ImportError:
+            raise CommandError("This benchmark needs torch and transformers installed")
+
+        try:
+            tokenizer = AutoTokenizer.from_pretrained(options['model'])
+            model = AutoModel.from_pretrained(options['model']).eval()
+        except OSError as e:
+            raise CommandError(f"Could not load {options['model']}: {e}")
+        self.stdout.write(f"{options['model']} on {torch.get_num_threads()} torch threads, "
+                          f"{options['requests']} analyses of {options['samples']} intervals")
+        requests = synthetic_requests(options['requests'], options['samples'])
+
+        for threads in concurrency:
+            rates = {}
+            for batched in (False, True):
+                encoder = TextEncoder(tokenizer, model)
+                encoder.encode(requests[0], batched=batched)  # warm up
+                start_time = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=threads) as pool:
+                    list(pool.map(lambda texts: encoder.encode(texts, batched=batched), requests))
+                rates[batched] = len(requests) / (time.perf_counter() - start_time)
+                mean_batch = encoder.batcher.mean_batch_size
+                encoder.close()
+            self.stdout.write(
+                f"{threads:>3} callers  single {rates[False]:7.1f}/s  batched {rates[True]:7.1f}/s  "
+                f"{rates[True] / rates[False]:5.2f}x  (mean batch {mean_batch:.1f} sequences)"
+            )
@@ -0,0 +1,73 @@
+# backend/apps/ai_analysis/management/commands/benchmark_drill_features.py
+import random
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.ai_analysis.features import DrillIntervals
+from apps.ai_analysis.jobs import SAMPLE_FIELDS
+from apps.ai_analysis.services import GeologicalAIAnalyzer
+
+from .benchmark_batching import ALTERATIONS, MINERALIZATION, ROCK_TYPES
+
+
+def synthetic_rows(count: int):
+    """One hole of ``count`` contiguous intervals, as the analysis job's values_list rows"""
+    rng = random.Random(0)
+    depth = 0.0
+    samples = []
+    for _ in range(count):
+        length = rng.choice([0.5, 1.0, 1.5, 2.0])
+        sample = {
+            'from_depth': round(depth, 1), 'to_depth': round(depth + length, 1),
+            'rock_type': rng.choice(ROCK_TYPES), 'gold_grade': round(rng.lognormvariate(-1, 1.2), 2),
+            'silver_grade': round(rng.lognormvariate(1, 1), 2), 'copper_grade': None,
+            'alteration': rng.choice(ALTERATIONS), 'mineralization': rng.choice(MINERALIZATION),
+        }
+        samples.append(tuple(sample[name] for name in SAMPLE_FIELDS))
+        depth += length
+    return samples
+
+
+class Command(BaseCommand):
+    help = "Time the drill analysis feature pipeline on synthetic holes of growing length"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--intervals', default='1000,5000,20000,100000',
+                            help="Comma-separated interval counts per hole")
+        parser.add_argument('--repeat', type=int, default=3, help="Runs per size; the best is reported")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(part) for part in options['intervals'].split(',') if part.strip()]
+        except ValueError:
+            raise CommandError("--intervals must be comma-separated integers")
+        if not sizes or min(sizes) < 1 or options['repeat'] < 1:
+            raise CommandError("--intervals and --repeat must be positive")
+        analyzer = GeologicalAIAnalyzer()
+
+        def best(run):
+            timings = []
+            for _ in range(options['repeat']):
+                start_time = time.perf_counter()
+                run()
+                timings.append(time.perf_counter() - start_time)
+            return min(timings)
+
+        self.stdout.write(f"{'intervals':>10}  {'to arrays':>10}  {'features':>10}  {'texts':>10}  "
+                          f"{'total':>10}  {'per interval':>12}  zones")
+        for size in sizes:
+            rows = synthetic_rows(size)
+            to_arrays = lambda: DrillIntervals.from_rows(rows, SAMPLE_FIELDS)
+            intervals = to_arrays()
+            np.random.seed(0)
+            zones = len(analyzer._simulate_drill_analysis(intervals)['detailed_results']['mineralization_zones'])
+            build = best(to_arrays)
+            features = best(lambda: analyzer._simulate_drill_analysis(intervals))
+            texts = best(intervals.texts)
+            total = build + features
+            self.stdout.write(
+                f"{size:>10,}  {build * 1000:8.1f} ms  {features * 1000:8.1f} ms  {texts * 1000:8.1f} ms  "
+                f"{total * 1000:8.1f} ms  {total / size * 1e6:9.2f} µs  {zones:,}"
+            )
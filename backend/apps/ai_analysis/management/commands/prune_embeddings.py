@@ -0,0 +1,41 @@
+# backend/apps/ai_analysis/management/commands/prune_embeddings.py
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.ai_analysis.embeddings import EmbeddingStore, evict_versions, model_version, stored_versions
+from apps.ai_analysis.models import AIModel
+
+
+class Command(BaseCommand):
+    help = "Delete cached embeddings of inactive or outdated model versions and shrink the rest to a size cap"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-bytes', type=int, help="Shrink each remaining store to this size")
+        parser.add_argument('--dry-run', action='store_true', help="Only list what would be deleted")
+
+    def handle(self, *args, **options):
+        if options['max_bytes'] is not None and options['max_bytes'] < 1:
+            raise CommandError("--max-bytes must be positive")
+        active = {model_version(ai_model): ai_model for ai_model in AIModel.objects.filter(is_active=True)}
+
+        stale = [version for version in stored_versions() if version not in active]
+        if options['dry_run']:
+            for version in stale:
+                self.stdout.write(f"would delete {version}")
+        else:
+            for version in evict_versions(active):
+                self.stdout.write(f"deleted {version}")
+
+        for version, ai_model in active.items():
+            if version not in stored_versions():
+                continue
+            store = EmbeddingStore.for_model(ai_model)
+            max_bytes = options['max_bytes'] or store.max_bytes
+            if options['dry_run']:
+                store.reload()
+                if store.size_bytes > max_bytes:
+                    self.stdout.write(f"would shrink {version} to {max_bytes / 1024 / 1024:.1f} MiB")
+            else:
+                removed = store.shrink(max_bytes)
+                if removed:
+                    self.stdout.write(f"dropped {removed} least recently used vectors from {version}")
+            self.stdout.write(f"{version}: {len(store)} vectors, {store.size_bytes / 1024 / 1024:.1f} MiB")
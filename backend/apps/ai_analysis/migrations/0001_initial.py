@@ -0,0 +1,233 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:29
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("geological_data", "0004_geohash"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AIAnalysisResult",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "analysis_type",
+                    models.CharField(
+                        choices=[
+                            ("drill_hole", "Drill Hole Analysis"),
+                            ("magnetic_survey", "Magnetic Survey Analysis"),
+                            ("gravity_survey", "Gravity Survey Analysis"),
+                            ("property_assessment", "Property Assessment"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("confidence_score", models.FloatField()),
+                ("predicted_grade", models.FloatField(blank=True, null=True)),
+                ("anomalies_detected", models.BooleanField(default=False)),
+                ("detailed_results", models.JSONField(default=dict)),
+                ("ai_interpretation", models.TextField()),
+                ("recommendations", models.JSONField(default=list)),
+                (
+                    "processing_time",
+                    models.FloatField(help_text="Processing time in seconds"),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="AIModel",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100)),
+                (
+                    "model_type",
+                    models.CharField(
+                        choices=[
+                            ("drilling", "Drilling Data Analyzer"),
+                            ("magnetic", "Magnetic Survey Analyzer"),
+                            ("gravity", "Gravity Survey Analyzer"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("version", models.CharField(max_length=20)),
+                ("huggingface_model_id", models.CharField(blank=True, max_length=200)),
+                ("is_active", models.BooleanField(default=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="AnalysisJob",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "analysis_type",
+                    models.CharField(
+                        choices=[
+                            ("drill_hole", "Drill Hole Analysis"),
+                            ("magnetic_survey", "Magnetic Survey Analysis"),
+                            ("gravity_survey", "Gravity Survey Analysis"),
+                            ("property_assessment", "Property Assessment"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("parameters", models.JSONField(blank=True, default=dict)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "Queued"),
+                            ("running", "Running"),
+                            ("succeeded", "Succeeded"),
+                            ("failed", "Failed"),
+                        ],
+                        db_index=True,
+                        default="queued",
+                        max_length=10,
+                    ),
+                ),
+                ("error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "drill_hole",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="geological_data.drillhole",
+                    ),
+                ),
+                (
+                    "geo_property",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="geological_data.property",
+                    ),
+                ),
+                (
+                    "result",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="job",
+                        to="ai_analysis.aianalysisresult",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="analysis_jobs",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.CreateModel(
+            name="AITrainingData",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "user_feedback",
+                    models.CharField(
+                        choices=[
+                            ("correct", "Correct Prediction"),
+                            ("incorrect", "Incorrect Prediction"),
+                            ("partially_correct", "Partially Correct"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("user_comments", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "analysis_result",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="ai_analysis.aianalysisresult",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="aianalysisresult",
+            name="ai_model",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, to="ai_analysis.aimodel"
+            ),
+        ),
+        migrations.AddField(
+            model_name="aianalysisresult",
+            name="drill_hole",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="geological_data.drillhole",
+            ),
+        ),
+        migrations.AddField(
+            model_name="aianalysisresult",
+            name="geo_property",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="geological_data.property",
+            ),
+        ),
+    ]
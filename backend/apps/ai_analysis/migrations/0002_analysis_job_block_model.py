@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ai_analysis", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="analysisjob",
+            name="analysis_type",
+            field=models.CharField(
+                choices=[
+                    ("drill_hole", "Drill Hole Analysis"),
+                    ("magnetic_survey", "Magnetic Survey Analysis"),
+                    ("gravity_survey", "Gravity Survey Analysis"),
+                    ("property_assessment", "Property Assessment"),
+                    ("block_model", "Block Model Estimation"),
+                ],
+                max_length=20,
+            ),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ai_analysis", "0002_analysis_job_block_model"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="analysisjob",
+            name="analysis_type",
+            field=models.CharField(
+                choices=[
+                    ("drill_hole", "Drill Hole Analysis"),
+                    ("magnetic_survey", "Magnetic Survey Analysis"),
+                    ("gravity_survey", "Gravity Survey Analysis"),
+                    ("property_assessment", "Property Assessment"),
+                    ("block_model", "Block Model Estimation"),
+                    ("variogram", "Variogram"),
+                    ("kriging", "Kriging Estimation"),
+                ],
+                max_length=20,
+            ),
+        ),
+    ]
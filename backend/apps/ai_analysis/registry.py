@@ -0,0 +1,208 @@
+# backend/apps/ai_analysis/registry.py
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+from django.conf import settings
+
+from mining_ai_project.cache import get_generation
+from .models import AIModel
+
+logger = logging.getLogger(__name__)
+
+# (name, model_type, version) of an AIModel row
+ModelKey = Tuple[str, str, str]
+
+# Cache generation bumped whenever an AIModel row changes, in any process
+AI_MODEL_NAMESPACE = 'ai_models'
+
+
+class LoadedModel:
+    """A resident model: its AIModel row, tokenizer and weights"""
+
+    def __init__(self, ai_model: AIModel, tokenizer=None, model=None):
+        self.ai_model = ai_model
+        self.tokenizer = tokenizer
+        self.model = model
+        self._encoder = None
+        self._encoder_users = 0
+        self._unloaded = False
+        self._embeddings = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_dummy(self) -> bool:
+        """No weights could be loaded; the analyzer simulates results instead"""
+        return self.model is None
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Embeddings of texts through a batching TextEncoder over this model, started on first use
+
+        The encoder is counted out to each caller, so unloading the model
+        only closes it once the last call running on it has returned.
+        """
+        with self._lock:
+            if self._encoder is None:
+                from .inference import TextEncoder
+                self._encoder = TextEncoder(self.tokenizer, self.model)
+            encoder = self._encoder
+            self._encoder_users += 1
+        try:
+            return encoder.encode(texts)
+        finally:
+            with self._lock:
+                self._encoder_users -= 1
+                if self._unloaded:
+                    self._close_encoder()
+
+    @property
+    def embeddings(self):
+        """The on-disk EmbeddingStore for this model's version"""
+        with self._lock:
+            if self._embeddings is None:
+                from .embeddings import EmbeddingStore
+                self._embeddings = EmbeddingStore.for_model(self.ai_model)
+            return self._embeddings
+
+    def unload(self):
+        """Close the encoder now if it is idle, otherwise when its last caller is done"""
+        with self._lock:
+            self._unloaded = True
+            self._close_encoder()
+
+    def _close_encoder(self):
+        if self._encoder is not None and not self._encoder_users:
+            self._encoder.close()
+            self._encoder = None
+
+
+class ModelRegistry:
+    """AI models keyed by (name, model_type, version), loaded on first use
+
+    AIModel rows are read once per process and kept until the shared
+    ``ai_models`` generation moves on (see signals.py), so edits made in
+    another process reach this one on its next lookup. Weights are loaded the
+    first time a model is used, never at import, and at most
+    ``AI_MODEL_CACHE_SIZE`` models stay resident, least recently used out
+    first. A model without a Hugging Face id, or one that fails to load
+    (e.g. without torch installed), resolves to a dummy.
+    """
+
+    def __init__(self, max_resident: Optional[int] = None):
+        self.max_resident = max_resident
+        self._huggingface_ids: Dict[ModelKey, str] = {}
+        self._rows: Dict[ModelKey, AIModel] = {}
+        self._resident: 'OrderedDict[ModelKey, LoadedModel]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._rows_lock = threading.Lock()
+        self._load_locks: Dict[ModelKey, threading.Lock] = {}
+        self._generation = None
+
+    def register(self, key: ModelKey, huggingface_model_id: str = '') -> ModelKey:
+        """Declare a model the code uses, with the weights to load if its row names none"""
+        self._huggingface_ids[key] = huggingface_model_id
+        return key
+
+    @property
+    def capacity(self) -> int:
+        return max(1, self.max_resident or getattr(settings, 'AI_MODEL_CACHE_SIZE', 2))
+
+    def _sync(self):
+        """Drop rows, and the weights loaded for them, that changed since they were read"""
+        generation = get_generation(AI_MODEL_NAMESPACE)
+        if generation == self._generation:
+            return
+        with self._rows_lock:
+            if generation == self._generation:
+                return
+            cached, self._rows, self._generation = self._rows, {}, generation
+        current = dict(AIModel.objects.filter(pk__in=[row.pk for row in cached.values()])
+                       .values_list('pk', 'updated_at'))
+        with self._lock:
+            for key, row in cached.items():
+                if current.get(row.pk) != row.updated_at:
+                    loaded = self._resident.pop(key, None)
+                    if loaded is not None:
+                        loaded.unload()
+
+    def get_ai_model(self, key: ModelKey) -> AIModel:
+        """The AIModel row for a key, created the first time it is asked for"""
+        self._sync()
+        row = self._rows.get(key)
+        if row is not None:
+            return row
+        with self._rows_lock:
+            row = self._rows.get(key)
+            if row is None:
+                name, model_type, version = key
+                row = AIModel.objects.filter(name=name, model_type=model_type, version=version).order_by('pk').first()
+                if row is None:
+                    row = AIModel.objects.create(
+                        name=name, model_type=model_type, version=version,
+                        huggingface_model_id=self._huggingface_ids.get(key, ''),
+                    )
+                self._rows[key] = row
+        return row
+
+    def get(self, key: ModelKey) -> LoadedModel:
+        """The resident model for a key, loading it (once, across threads) if needed"""
+        self._sync()
+        with self._lock:
+            loaded = self._resident.get(key)
+            if loaded is not None:
+                self._resident.move_to_end(key)
+                return loaded
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                loaded = self._resident.get(key)
+            if loaded is None:
+                loaded = self._load(key, self.get_ai_model(key))
+            with self._lock:
+                self._resident[key] = loaded
+                self._resident.move_to_end(key)
+                while len(self._resident) > self.capacity:
+                    evicted, evicted_model = self._resident.popitem(last=False)
+                    evicted_model.unload()
+                    logger.info(f"Unloaded AI model {evicted}")
+        return loaded
+
+    def _load(self, key: ModelKey, row: AIModel) -> LoadedModel:
+        huggingface_model_id = row.huggingface_model_id or self._huggingface_ids.get(key, '')
+        if not huggingface_model_id:
+            return LoadedModel(row, None, None)
+        try:
+            # Imported here so the web tier and management commands never pay for torch
+            from transformers import AutoModel, AutoTokenizer
+
+            tokenizer = AutoTokenizer.from_pretrained(huggingface_model_id)
+            model = AutoModel.from_pretrained(huggingface_model_id)
+            model.eval()
+        except Exception as e:
+            logger.error(f"❌ Error loading AI model {row}: {e}")
+            return LoadedModel(row, None, None)
+        logger.info(f"✅ Loaded AI model {row}")
+        return LoadedModel(row, tokenizer, model)
+
+    def warm(self, keys: Iterable[ModelKey]):
+        """Load models ahead of their first request, e.g. when a worker starts"""
+        for key in keys:
+            self.get(tuple(key))
+
+    def is_resident(self, key: ModelKey) -> bool:
+        return key in self._resident
+
+    def forget(self, ai_model_id: int):
+        """Drop the cached row and weights of an AIModel that was changed or deleted"""
+        with self._lock:
+            for key in [key for key, row in self._rows.items() if row.pk == ai_model_id]:
+                self._rows.pop(key, None)
+                loaded = self._resident.pop(key, None)
+                if loaded is not None:
+                    loaded.unload()
+
+
+registry = ModelRegistry()
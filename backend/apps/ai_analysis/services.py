@@ -1,336 +1,323 @@
 # apps/ai_analysis/services.py
-# import torch
-# from transformers import AutoTokenizer, AutoModel, pipeline
-# import numpy as np
-# import pandas as pd
-# from typing import Dict, List, Optional, Tuple
-# import logging
-# import time
-# from django.conf import settings
+import numpy as np
+from typing import Dict, List, Union
+import logging
+import time
+from .features import DrillIntervals
+from .registry import LoadedModel, ModelRegistry, registry
 
-# logger = logging.getLogger(__name__)
+logger = logging.getLogger(__name__)
 
-# class GeologicalAIAnalyzer:
-#     """Main AI service for geological data analysis"""
-    
-#     def __init__(self):
-#         self.drilling_model = None
-#         self.magnetic_model = None  
-#         self.gravity_model = None
-#         self.tokenizer = None
-#         self._load_models()
-    
-#     def _load_models(self):
-#         """Load AI models - for now using pre-trained models as placeholders"""
-#         try:
-#             # For demonstration, we'll use a general language model
-#             # In production, you'd load your fine-tuned geological models
-#             model_name = "distilbert-base-uncased"
-#             self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-#             self.drilling_model = AutoModel.from_pretrained(model_name)
-            
-#             logger.info("✅ AI models loaded successfully")
-            
-#         except Exception as e:
-#             logger.error(f"❌ Error loading AI models: {e}")
-#             # Set up dummy models for development
-#             self._setup_dummy_models()
+# For demonstration the drilling model is a general language model;
+# in production, register your fine-tuned geological models here
+DRILLING_MODEL = registry.register(('Demo Drilling Analyzer', 'drilling', '1.0'), 'distilbert-base-uncased')
+MAGNETIC_MODEL = registry.register(('Demo Magnetic Analyzer', 'magnetic', '1.0'))
+GRAVITY_MODEL = registry.register(('Demo Gravity Analyzer', 'gravity', '1.0'))
+
+# Gold grade (g/t) above which consecutive samples form a mineralized zone
+MINERALIZED_GOLD_GRADE = 0.5
+
+DrillSamples = Union[DrillIntervals, List[Dict]]
+
+class GeologicalAIAnalyzer:
+    """Main AI service for geological data analysis
+
+    Cheap to create: models come from the registry the first time an
+    analysis needs them, so importing this module never loads torch.
+    """
     
-#     def _setup_dummy_models(self):
-#         """Setup dummy models for development when real models aren't available"""
-#         logger.info("🔧 Setting up dummy models for development")
-#         self.drilling_model = "dummy"
-#         self.tokenizer = "dummy"
+    def __init__(self, models: ModelRegistry = registry):
+        self.models = models
     
-#     def analyze_drill_data(self, drill_hole_id: int, drill_samples: List[Dict]) -> Dict:
-#         """Analyze drilling data using AI"""
-#         start_time = time.time()
+    def analyze_drill_data(self, drill_hole_id: int, drill_samples: DrillSamples) -> Dict:
+        """Analyze drilling data using AI
+
+        ``drill_samples`` is one dict per sample or a DrillIntervals built
+        from them; either way the samples are converted to arrays once.
+        """
+        start_time = time.time()
         
-#         try:
-#             # Prepare input data
-#             drill_text = self._prepare_drill_text(drill_samples)
+        try:
+            intervals = DrillIntervals.coerce(drill_samples)
+            # For now, simulate AI analysis with realistic results
+            # In production, this would use your fine-tuned transformer
+            drilling = self.models.get(DRILLING_MODEL)
+            if drilling.is_dummy:
+                results = self._simulate_drill_analysis(intervals)
+            else:
+                results = self._real_drill_analysis(drilling, self._sample_texts(intervals))
             
-#             # For now, simulate AI analysis with realistic results
-#             # In production, this would use your fine-tuned transformer
-#             if self.drilling_model == "dummy":
-#                 results = self._simulate_drill_analysis(drill_samples)
-#             else:
-#                 results = self._real_drill_analysis(drill_text)
+            processing_time = time.time() - start_time
+            results['processing_time'] = processing_time
             
-#             processing_time = time.time() - start_time
-#             results['processing_time'] = processing_time
+            logger.info(f"✅ Drill analysis complete for hole {drill_hole_id} in {processing_time:.2f}s")
+            return results
             
-#             logger.info(f"✅ Drill analysis complete for hole {drill_hole_id} in {processing_time:.2f}s")
-#             return results
-            
-#         except Exception as e:
-#             logger.error(f"❌ Error in drill data analysis: {e}")
-#             return self._error_response(str(e))
+        except Exception as e:
+            logger.error(f"❌ Error in drill data analysis: {e}")
+            return self._error_response(str(e))
     
-#     def analyze_magnetic_survey(self, survey_data: np.ndarray, property_id: int) -> Dict:
-#         """Analyze magnetic survey data"""
-#         start_time = time.time()
+    def analyze_magnetic_survey(self, survey_data: np.ndarray, property_id: int) -> Dict:
+        """Analyze magnetic survey data"""
+        start_time = time.time()
         
-#         try:
-#             # Simulate magnetic survey analysis
-#             results = self._simulate_magnetic_analysis(survey_data)
+        try:
+            # Simulate magnetic survey analysis
+            results = self._simulate_magnetic_analysis(survey_data)
             
-#             processing_time = time.time() - start_time
-#             results['processing_time'] = processing_time
+            processing_time = time.time() - start_time
+            results['processing_time'] = processing_time
             
-#             logger.info(f"✅ Magnetic analysis complete for property {property_id}")
-#             return results
+            logger.info(f"✅ Magnetic analysis complete for property {property_id}")
+            return results
             
-#         except Exception as e:
-#             logger.error(f"❌ Error in magnetic analysis: {e}")
-#             return self._error_response(str(e))
+        except Exception as e:
+            logger.error(f"❌ Error in magnetic analysis: {e}")
+            return self._error_response(str(e))
     
-#     def analyze_gravity_survey(self, survey_data: np.ndarray, property_id: int) -> Dict:
-#         """Analyze gravity survey data"""
-#         start_time = time.time()
+    def analyze_gravity_survey(self, survey_data: np.ndarray, property_id: int) -> Dict:
+        """Analyze gravity survey data"""
+        start_time = time.time()
         
-#         try:
-#             # Simulate gravity survey analysis
-#             results = self._simulate_gravity_analysis(survey_data)
+        try:
+            # Simulate gravity survey analysis
+            results = self._simulate_gravity_analysis(survey_data)
             
-#             processing_time = time.time() - start_time
-#             results['processing_time'] = processing_time
+            processing_time = time.time() - start_time
+            results['processing_time'] = processing_time
             
-#             logger.info(f"✅ Gravity analysis complete for property {property_id}")
-#             return results
+            logger.info(f"✅ Gravity analysis complete for property {property_id}")
+            return results
             
-#         except Exception as e:
-#             logger.error(f"❌ Error in gravity analysis: {e}")
-#             return self._error_response(str(e))
+        except Exception as e:
+            logger.error(f"❌ Error in gravity analysis: {e}")
+            return self._error_response(str(e))
     
-#     def _real_drill_analysis(self, drill_text: str) -> Dict:
+    def _real_drill_analysis(self, drilling: LoadedModel, sample_texts: List[str]) -> Dict:
+        """Placeholder for real transformer-based drill analysis
 
-#         """Placeholder for real transformer-based drill analysis"""
-#         logger.info("⚠️ Using placeholder _real_drill_analysis (not yet implemented)")
-#         return {
-#             "confidence_score": 0.5,
-#             "predicted_grade": 0.0,
-#             "anomalies_detected": False,
-#             "recommendations": ["Real AI model not yet integrated"],
-#             "ai_interpretation": "Placeholder analysis — connect fine-tuned transformer here.",
-#             "detailed_results": {}
-#         }
+        Each interval is embedded through the model's batching encoder, so
+        concurrent analyses share forward passes, and only intervals missing
+        from the embedding store are encoded at all; the scoring head that
+        would turn the embeddings into a result is not built yet.
+        """
+        embeddings = drilling.embeddings.get_or_encode(sample_texts, drilling.encode)
+        logger.info("⚠️ Using placeholder _real_drill_analysis (not yet implemented)")
+        return {
+            "confidence_score": 0.5,
+            "predicted_grade": 0.0,
+            "anomalies_detected": False,
+            "recommendations": ["Real AI model not yet integrated"],
+            "ai_interpretation": "Placeholder analysis — connect fine-tuned transformer here.",
+            "detailed_results": {
+                "samples_encoded": len(embeddings),
+                "embedding_dimensions": int(embeddings.shape[1]),
+            }
+        }
 
     
-#     def _prepare_drill_text(self, samples: List[Dict]) -> str:
-#         """Convert drill sample data to text for transformer input"""
-#         text_parts = []
-#         for sample in samples:
-#             text = f"Depth {sample.get('from_depth', 0)}-{sample.get('to_depth', 0)}m: "
-#             text += f"Rock type {sample.get('rock_type', 'unknown')}, "
-            
-#             if sample.get('gold_grade'):
-#                 text += f"Au {sample['gold_grade']}g/t, "
-#             if sample.get('silver_grade'):
-#                 text += f"Ag {sample['silver_grade']}g/t, "
-#             if sample.get('copper_grade'):
-#                 text += f"Cu {sample['copper_grade']}%, "
-            
-#             if sample.get('alteration'):
-#                 text += f"Alteration: {sample['alteration']}, "
-            
-#             text += f"Mineralization: {sample.get('mineralization', 'none')}"
-#             text_parts.append(text)
-        
-#         return " ".join(text_parts)
+    def _prepare_drill_text(self, samples: DrillSamples) -> str:
+        """Convert drill sample data to text for transformer input"""
+        return " ".join(self._sample_texts(samples))
     
-#     def _simulate_drill_analysis(self, samples: List[Dict]) -> Dict:
-#         """Simulate realistic drill hole analysis results"""
-#         # Simulate analysis based on sample data
-#         total_samples = len(samples)
+    def _sample_texts(self, samples: DrillSamples) -> List[str]:
+        """One description per drill sample interval"""
+        return DrillIntervals.coerce(samples).texts()
+    
+    def _simulate_drill_analysis(self, samples: DrillSamples) -> Dict:
+        """Simulate realistic drill hole analysis results"""
+        intervals = DrillIntervals.coerce(samples)
+        # Simulate analysis based on sample data
+        total_samples = len(intervals)
         
-#         # Calculate average grades if available
-#         gold_grades = [s.get('gold_grade', 0) for s in samples if s.get('gold_grade')]
-#         avg_gold_grade = np.mean(gold_grades) if gold_grades else 0
+        # Calculate average grades if available; zero and missing assays don't count
+        gold = intervals.gold_grade
+        gold_grades = gold[(gold != 0) & ~np.isnan(gold)]
+        avg_gold_grade = float(gold_grades.mean()) if len(gold_grades) else 0
         
-#         # Generate realistic confidence score based on data quality
-#         confidence = min(0.95, max(0.3, 0.5 + (total_samples / 20) + (avg_gold_grade / 10)))
-#         confidence = round(confidence + np.random.normal(0, 0.05), 3)
-#         confidence = max(0.1, min(0.99, confidence))
+        # Generate realistic confidence score based on data quality
+        confidence = min(0.95, max(0.3, 0.5 + (total_samples / 20) + (avg_gold_grade / 10)))
+        confidence = round(confidence + np.random.normal(0, 0.05), 3)
+        confidence = max(0.1, min(0.99, confidence))
         
-#         # Determine if anomalies detected
-#         anomalies_detected = confidence > 0.7 or avg_gold_grade > 1.0
+        # Determine if anomalies detected
+        anomalies_detected = confidence > 0.7 or avg_gold_grade > 1.0
         
-#         # Generate recommendations
-#         recommendations = self._generate_recommendations(confidence, avg_gold_grade)
+        # Generate recommendations
+        recommendations = self._generate_recommendations(confidence, avg_gold_grade)
         
-#         # AI interpretation
-#         interpretation = self._generate_interpretation(samples, confidence, avg_gold_grade)
+        # AI interpretation
+        interpretation = self._generate_interpretation(intervals, confidence, avg_gold_grade)
         
-#         return {
-#             'confidence_score': confidence,
-#             'predicted_grade': max(0, avg_gold_grade + np.random.normal(0, 0.3)),
-#             'anomalies_detected': anomalies_detected,
-#             'recommendations': recommendations,
-#             'ai_interpretation': interpretation,
-#             'detailed_results': {
-#                 'total_samples_analyzed': total_samples,
-#                 'average_gold_grade': avg_gold_grade,
-#                 'grade_variability': np.std(gold_grades) if gold_grades else 0,
-#                 'mineralization_zones': self._identify_mineralization_zones(samples),
-#                 'geological_features': self._extract_geological_features(samples)
-#             }
-#         }
+        return {
+            'confidence_score': confidence,
+            'predicted_grade': max(0, avg_gold_grade + np.random.normal(0, 0.3)),
+            'anomalies_detected': anomalies_detected,
+            'recommendations': recommendations,
+            'ai_interpretation': interpretation,
+            'detailed_results': {
+                'total_samples_analyzed': total_samples,
+                'average_gold_grade': avg_gold_grade,
+                'grade_variability': float(gold_grades.std()) if len(gold_grades) else 0,
+                'mineralization_zones': self._identify_mineralization_zones(intervals),
+                'geological_features': self._extract_geological_features(intervals)
+            }
+        }
     
-#     def _simulate_magnetic_analysis(self, survey_data: np.ndarray) -> Dict:
-#         """Simulate magnetic survey analysis"""
-#         # Simulate anomaly detection
-#         anomaly_threshold = np.percentile(survey_data.flatten(), 85)
-#         anomalies = np.where(survey_data > anomaly_threshold)
+    def _simulate_magnetic_analysis(self, survey_data: np.ndarray) -> Dict:
+        """Simulate magnetic survey analysis"""
+        # Simulate anomaly detection
+        anomaly_threshold = np.percentile(survey_data.flatten(), 85)
+        anomalies = np.where(survey_data > anomaly_threshold)
         
-#         confidence = 0.7 + np.random.normal(0, 0.1)
-#         confidence = max(0.4, min(0.95, confidence))
+        confidence = 0.7 + np.random.normal(0, 0.1)
+        confidence = max(0.4, min(0.95, confidence))
         
-#         return {
-#             'confidence_score': round(confidence, 3),
-#             'anomalies_detected': len(anomalies[0]) > 0,
-#             'anomaly_count': len(anomalies[0]),
-#             'recommendations': [
-#                 "Follow-up ground magnetic survey recommended",
-#                 "Consider drilling targets at anomaly centers",
-#                 "Integrate with gravity data for better targeting"
-#             ],
-#             'ai_interpretation': f"Magnetic survey analysis identified {len(anomalies[0])} potential targets. Strong magnetic anomalies suggest possible intrusive bodies or structural controls.",
-#             'detailed_results': {
-#                 'anomaly_locations': anomalies[0].tolist()[:10],  # First 10 anomalies
-#                 'max_magnetic_intensity': float(np.max(survey_data)),
-#                 'min_magnetic_intensity': float(np.min(survey_data)),
-#                 'mean_background': float(np.mean(survey_data))
-#             }
-#         }
+        return {
+            'confidence_score': round(confidence, 3),
+            'anomalies_detected': len(anomalies[0]) > 0,
+            'anomaly_count': len(anomalies[0]),
+            'recommendations': [
+                "Follow-up ground magnetic survey recommended",
+                "Consider drilling targets at anomaly centers",
+                "Integrate with gravity data for better targeting"
+            ],
+            'ai_interpretation': f"Magnetic survey analysis identified {len(anomalies[0])} potential targets. Strong magnetic anomalies suggest possible intrusive bodies or structural controls.",
+            'detailed_results': {
+                'anomaly_locations': anomalies[0].tolist()[:10],  # First 10 anomalies
+                'max_magnetic_intensity': float(np.max(survey_data)),
+                'min_magnetic_intensity': float(np.min(survey_data)),
+                'mean_background': float(np.mean(survey_data))
+            }
+        }
     
-#     def _simulate_gravity_analysis(self, survey_data: np.ndarray) -> Dict:
-#         """Simulate gravity survey analysis"""
-#         # Simulate density anomaly detection
-#         density_threshold = np.percentile(survey_data.flatten(), 80)
-#         dense_anomalies = np.where(survey_data > density_threshold)
+    def _simulate_gravity_analysis(self, survey_data: np.ndarray) -> Dict:
+        """Simulate gravity survey analysis"""
+        # Simulate density anomaly detection
+        density_threshold = np.percentile(survey_data.flatten(), 80)
+        dense_anomalies = np.where(survey_data > density_threshold)
         
-#         confidence = 0.65 + np.random.normal(0, 0.08)
-#         confidence = max(0.3, min(0.92, confidence))
+        confidence = 0.65 + np.random.normal(0, 0.08)
+        confidence = max(0.3, min(0.92, confidence))
         
-#         return {
-#             'confidence_score': round(confidence, 3),
-#             'anomalies_detected': len(dense_anomalies[0]) > 0,
-#             'density_anomaly_count': len(dense_anomalies[0]),
-#             'recommendations': [
-#                 "High-density anomalies warrant drill testing",
-#                 "Consider 3D gravity modeling",
-#                 "Integrate with magnetic and geological data"
-#             ],
-#             'ai_interpretation': f"Gravity analysis reveals {len(dense_anomalies[0])} high-density anomalies potentially indicating massive sulfide bodies or dense intrusions.",
-#             'detailed_results': {
-#                 'dense_anomaly_locations': dense_anomalies[0].tolist()[:8],
-#                 'estimated_depth_to_source': np.random.uniform(50, 200, len(dense_anomalies[0]))[:8].tolist(),
-#                 'max_gravity_anomaly': float(np.max(survey_data)),
-#                 'background_gravity': float(np.mean(survey_data))
-#             }
-#         }
+        return {
+            'confidence_score': round(confidence, 3),
+            'anomalies_detected': len(dense_anomalies[0]) > 0,
+            'density_anomaly_count': len(dense_anomalies[0]),
+            'recommendations': [
+                "High-density anomalies warrant drill testing",
+                "Consider 3D gravity modeling",
+                "Integrate with magnetic and geological data"
+            ],
+            'ai_interpretation': f"Gravity analysis reveals {len(dense_anomalies[0])} high-density anomalies potentially indicating massive sulfide bodies or dense intrusions.",
+            'detailed_results': {
+                'dense_anomaly_locations': dense_anomalies[0].tolist()[:8],
+                'estimated_depth_to_source': np.random.uniform(50, 200, len(dense_anomalies[0]))[:8].tolist(),
+                'max_gravity_anomaly': float(np.max(survey_data)),
+                'background_gravity': float(np.mean(survey_data))
+            }
+        }
     
-#     def _generate_recommendations(self, confidence: float, avg_grade: float) -> List[str]:
-#         """Generate drilling recommendations based on analysis"""
-#         recommendations = []
+    def _generate_recommendations(self, confidence: float, avg_grade: float) -> List[str]:
+        """Generate drilling recommendations based on analysis"""
+        recommendations = []
         
-#         if confidence > 0.8:
-#             recommendations.append("🎯 High-priority target - recommend immediate follow-up drilling")
-#             recommendations.append("Consider tighter drill spacing (12.5m) in this zone")
-#         elif confidence > 0.6:
-#             recommendations.append("⚡ Moderate potential - include in next drill campaign") 
-#             recommendations.append("Standard 25m spacing recommended")
-#         else:
-#             recommendations.append("📊 Low priority - monitor with surface sampling")
-#             recommendations.append("Consider regional geological context before drilling")
+        if confidence > 0.8:
+            recommendations.append("🎯 High-priority target - recommend immediate follow-up drilling")
+            recommendations.append("Consider tighter drill spacing (12.5m) in this zone")
+        elif confidence > 0.6:
+            recommendations.append("⚡ Moderate potential - include in next drill campaign") 
+            recommendations.append("Standard 25m spacing recommended")
+        else:
+            recommendations.append("📊 Low priority - monitor with surface sampling")
+            recommendations.append("Consider regional geological context before drilling")
         
-#         if avg_grade > 2.0:
-#             recommendations.append("🏆 High-grade zone detected - priority for resource estimation")
-#         elif avg_grade > 0.5:
-#             recommendations.append("💰 Economic grades present - continue systematic drilling")
+        if avg_grade > 2.0:
+            recommendations.append("🏆 High-grade zone detected - priority for resource estimation")
+        elif avg_grade > 0.5:
+            recommendations.append("💰 Economic grades present - continue systematic drilling")
         
-#         return recommendations
+        return recommendations
     
-#     def _generate_interpretation(self, samples: List[Dict], confidence: float, avg_grade: float) -> str:
-#         """Generate human-readable geological interpretation"""
-#         avg_depth = np.mean([s.get('from_depth', 0) for s in samples]) if samples else 0
+    def _generate_interpretation(self, samples: DrillSamples, confidence: float, avg_grade: float) -> str:
+        """Generate human-readable geological interpretation"""
+        intervals = DrillIntervals.coerce(samples)
+        avg_depth = intervals.from_depth.mean() if len(intervals) else 0
         
-#         interpretation = f"🤖 AI analysis of {len(samples)} samples from {avg_depth:.1f}m average depth. "
-#         interpretation += f"Confidence score: {confidence:.2f}. "
+        interpretation = f"🤖 AI analysis of {len(intervals)} samples from {avg_depth:.1f}m average depth. "
+        interpretation += f"Confidence score: {confidence:.2f}. "
         
-#         if confidence > 0.75:
-#             interpretation += "🔍 Strong indicators of mineralization detected. "
-#             interpretation += "Alteration patterns consistent with gold-bearing hydrothermal systems. "
-#             interpretation += "Structural controls appear favorable for ore continuity. "
-#             interpretation += "⭐ Recommend priority follow-up exploration."
-#         elif confidence > 0.5:
-#             interpretation += "📈 Moderate mineralization indicators present. "
-#             interpretation += "Some favorable geological characteristics observed. "
-#             interpretation += "🔎 Additional sampling recommended to confirm continuity."
-#         else:
-#             interpretation += "📊 Weak to moderate mineralization signals. "
-#             interpretation += "Consider regional geological context and structural controls. "
-#             interpretation += "💡 May require alternative targeting approaches."
+        if confidence > 0.75:
+            interpretation += "🔍 Strong indicators of mineralization detected. "
+            interpretation += "Alteration patterns consistent with gold-bearing hydrothermal systems. "
+            interpretation += "Structural controls appear favorable for ore continuity. "
+            interpretation += "⭐ Recommend priority follow-up exploration."
+        elif confidence > 0.5:
+            interpretation += "📈 Moderate mineralization indicators present. "
+            interpretation += "Some favorable geological characteristics observed. "
+            interpretation += "🔎 Additional sampling recommended to confirm continuity."
+        else:
+            interpretation += "📊 Weak to moderate mineralization signals. "
+            interpretation += "Consider regional geological context and structural controls. "
+            interpretation += "💡 May require alternative targeting approaches."
         
-#         if avg_grade > 1.0:
-#             interpretation += f" 💎 Average grade of {avg_grade:.2f}g/t Au is economically significant."
+        if avg_grade > 1.0:
+            interpretation += f" 💎 Average grade of {avg_grade:.2f}g/t Au is economically significant."
         
-#         return interpretation
+        return interpretation
     
-#     def _identify_mineralization_zones(self, samples: List[Dict]) -> List[Dict]:
-#         """Identify distinct mineralization zones in drill hole"""
-#         zones = []
-#         current_zone = None
-        
-#         for sample in samples:
-#             grade = sample.get('gold_grade', 0)
-#             if grade > 0.5:  # Threshold for mineralized zone
-#                 if current_zone is None:
-#                     current_zone = {
-#                         'from_depth': sample.get('from_depth', 0),
-#                         'to_depth': sample.get('to_depth', 0),
-#                         'max_grade': grade,
-#                         'avg_grade': grade,
-#                         'sample_count': 1
-#                     }
-#                 else:
-#                     current_zone['to_depth'] = sample.get('to_depth', 0)
-#                     current_zone['max_grade'] = max(current_zone['max_grade'], grade)
-#                     current_zone['avg_grade'] = (current_zone['avg_grade'] * current_zone['sample_count'] + grade) / (current_zone['sample_count'] + 1)
-#                     current_zone['sample_count'] += 1
-#             else:
-#                 if current_zone is not None:
-#                     zones.append(current_zone)
-#                     current_zone = None
-        
-#         if current_zone is not None:
-#             zones.append(current_zone)
+    def _identify_mineralization_zones(self, samples: DrillSamples) -> List[Dict]:
+        """Identify distinct mineralization zones in drill hole
+
+        A zone is a run of consecutive samples above MINERALIZED_GOLD_GRADE;
+        runs are found from the edges of the mask and summed with reduceat.
+        """
+        intervals = DrillIntervals.coerce(samples)
+        gold = intervals.gold_grade
+        with np.errstate(invalid='ignore'):
+            mineralized = np.flatnonzero(gold > MINERALIZED_GOLD_GRADE)
+        if not len(mineralized):
+            return []
         
-#         return zones
+        starts = np.flatnonzero(np.r_[True, np.diff(mineralized) != 1])
+        ends = np.r_[starts[1:], len(mineralized)] - 1
+        grades = gold[mineralized]
+        sample_counts = np.diff(np.r_[starts, len(mineralized)])
+        columns = {
+            'from_depth': intervals.from_depth[mineralized[starts]],
+            'to_depth': intervals.to_depth[mineralized[ends]],
+            'max_grade': np.maximum.reduceat(grades, starts),
+            'avg_grade': np.add.reduceat(grades, starts) / sample_counts,
+            'sample_count': sample_counts,
+        }
+        names = list(columns)
+        return [dict(zip(names, zone)) for zone in zip(*(column.tolist() for column in columns.values()))]
     
-#     def _extract_geological_features(self, samples: List[Dict]) -> Dict:
-#         """Extract key geological features from samples"""
-#         rock_types = [s.get('rock_type', 'unknown') for s in samples]
-#         alterations = [s.get('alteration', '') for s in samples if s.get('alteration')]
+    def _extract_geological_features(self, samples: DrillSamples) -> Dict:
+        """Extract key geological features from samples"""
+        intervals = DrillIntervals.coerce(samples)
+        rock_counts = np.bincount(intervals.rock_type, minlength=len(intervals.rock_type_names))
+        # Ties go to the rock type logged first
+        dominant = intervals.rock_type_names[rock_counts.argmax()] if len(intervals) else 'unknown'
+        alterations = intervals.alteration_names[np.unique(intervals.alteration)]
         
-#         return {
-#             'dominant_rock_type': max(set(rock_types), key=rock_types.count) if rock_types else 'unknown',
-#             'alteration_types': list(set(alterations)),
-#             'structural_features': ['fracturing', 'veining'] if any('vein' in str(s.get('mineralization', '')).lower() for s in samples) else [],
-#             'mineralization_style': 'disseminated' if any('disseminated' in str(s.get('mineralization', '')).lower() for s in samples) else 'vein-hosted'
-#         }
+        return {
+            'dominant_rock_type': dominant,
+            'alteration_types': [alteration for alteration in alterations.tolist() if alteration],
+            'structural_features': ['fracturing', 'veining'] if intervals.category_matches('mineralization', 'vein').any() else [],
+            'mineralization_style': 'disseminated' if intervals.category_matches('mineralization', 'disseminated').any() else 'vein-hosted'
+        }
     
-#     def _error_response(self, error_msg: str) -> Dict:
-#         """Return standardized error response"""
-#         return {
-#             'error': True,
-#             'error_message': error_msg,
-#             'confidence_score': 0.0,
-#             'anomalies_detected': False,
-#             'recommendations': ['Error in analysis - please check data and try again'],
-#             'ai_interpretation': f"Analysis failed: {error_msg}"
-#         }
+    def _error_response(self, error_msg: str) -> Dict:
+        """Return standardized error response"""
+        return {
+            'error': True,
+            'error_message': error_msg,
+            'confidence_score': 0.0,
+            'anomalies_detected': False,
+            'recommendations': ['Error in analysis - please check data and try again'],
+            'ai_interpretation': f"Analysis failed: {error_msg}"
+        }
 
-# # Global instance
-# ai_analyzer = GeologicalAIAnalyzer()
\ No newline at end of file
+# Global instance
+ai_analyzer = GeologicalAIAnalyzer()
@@ -0,0 +1,19 @@
+# backend/apps/ai_analysis/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from mining_ai_project.cache import invalidate
+
+from .models import AIModel
+from .registry import AI_MODEL_NAMESPACE, registry
+
+
+@receiver([post_save, post_delete], sender=AIModel)
+def ai_model_changed(sender, instance, **kwargs):
+    """Reload an edited or deleted AIModel row, and its weights, on next use
+
+    This process forgets it at once; other processes (e.g. Celery workers)
+    see the ai_models generation move on once the change is committed.
+    """
+    registry.forget(instance.pk)
+    invalidate(AI_MODEL_NAMESPACE)
@@ -0,0 +1,31 @@
+# backend/apps/ai_analysis/tasks.py
+from celery.concurrency.prefork import TaskPool as PreforkPool
+from celery.signals import worker_process_init, worker_ready
+from django.conf import settings
+
+from mining_ai_project.celery import app
+
+from .jobs import run_job
+from .registry import registry
+
+
+@worker_process_init.connect
+def warm_models(**kwargs):
+    """Load AI_WARM_MODELS in each worker process before it takes its first job"""
+    registry.warm(getattr(settings, 'AI_WARM_MODELS', []))
+
+
+@worker_ready.connect
+def warm_models_in_worker(sender, **kwargs):
+    """Thread pools run jobs in the worker process itself, which then warms the models
+
+    Use ``--pool threads`` so concurrent jobs can share micro-batches.
+    """
+    if not isinstance(sender.pool, PreforkPool):
+        warm_models()
+
+
+@app.task(name='ai_analysis.run_analysis_job', ignore_result=True)
+def run_analysis_job(job_id: str):
+    """Run a queued AnalysisJob; its state and result are kept on the row"""
+    run_job(job_id)
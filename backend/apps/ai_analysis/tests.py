@@ -0,0 +1,320 @@
+import datetime
+import tempfile
+import threading
+from unittest import mock
+
+import numpy as np
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.geological_data.models import DrillHole, Property
+from apps.users.models import MiningUser
+
+from .batching import MicroBatcher
+from .embeddings import EmbeddingStore
+from .features import DrillIntervals
+from .models import AIModel, AnalysisJob
+from .registry import LoadedModel, ModelRegistry
+from .services import GeologicalAIAnalyzer
+
+DIMENSIONS = 4
+
+
+def encoder():
+    """A fake encoder that embeds a text as its length, and records what it was asked for"""
+    def encode(texts):
+        encode.calls.append(list(texts))
+        return np.array([[len(text)] * DIMENSIONS for text in texts], dtype=np.float32)
+    encode.calls = []
+    return encode
+
+
+class RecordingBatch:
+    """A fake run_batch that records its batches and holds the first one until released
+
+    Items submitted while the first batch is held queue up for the next, so
+    what the batcher gathers does not depend on thread timing.
+    """
+
+    def __init__(self):
+        self.batches = []
+        self.started = threading.Event()
+        self.released = threading.Event()
+
+    def __call__(self, items):
+        self.batches.append(list(items))
+        if len(self.batches) == 1:
+            self.started.set()
+            self.released.wait(5)
+        if 'bad' in items:
+            raise ValueError('bad item')
+        if 'short' in items:
+            return []
+        return [item.upper() for item in items]
+
+
+class MicroBatcherTests(TestCase):
+    def batcher(self, **options):
+        run_batch = RecordingBatch()
+        batcher = MicroBatcher(run_batch, **{'max_wait': 0, **options})
+        self.addCleanup(batcher.close)
+        return batcher, run_batch
+
+    def submit_behind_first(self, batcher, run_batch, items):
+        """Futures for items queued while a first batch of one runs"""
+        first = batcher.submit('first')
+        self.assertTrue(run_batch.started.wait(5))
+        futures = [batcher.submit(item) for item in items]
+        run_batch.released.set()
+        self.assertEqual(first.result(5), 'FIRST')
+        return futures
+
+    def test_waiting_items_run_as_one_batch(self):
+        batcher, run_batch = self.batcher()
+        futures = self.submit_behind_first(batcher, run_batch, ['a', 'b', 'c'])
+        self.assertEqual([future.result(5) for future in futures], ['A', 'B', 'C'])
+        self.assertEqual(run_batch.batches, [['first'], ['a', 'b', 'c']])
+        self.assertEqual((batcher.batches, batcher.items), (2, 4))
+
+    def test_batches_stop_at_the_size_and_token_limits(self):
+        batcher, run_batch = self.batcher(max_batch_size=2)
+        futures = self.submit_behind_first(batcher, run_batch, ['a', 'b', 'c'])
+        [future.result(5) for future in futures]
+        self.assertEqual(run_batch.batches[1:], [['a', 'b'], ['c']])
+
+        # Two items padded to 4 tokens fit in 8, a third padded to 5 would not
+        batcher, run_batch = self.batcher(max_tokens=8)
+        futures = self.submit_behind_first(batcher, run_batch, ['xxxx', 'yyy', 'zzzzz'])
+        [future.result(5) for future in futures]
+        self.assertEqual(run_batch.batches[1:], [['yyy', 'xxxx'], ['zzzzz']])
+
+    def test_batches_are_split_into_buckets_by_length(self):
+        batcher, run_batch = self.batcher(bucket_width=3)
+        futures = self.submit_behind_first(batcher, run_batch, ['x' * 9, 'x', 'x' * 5, 'xx'])
+        self.assertEqual([future.result(5) for future in futures], ['X' * 9, 'X', 'X' * 5, 'XX'])
+        self.assertEqual(run_batch.batches[1:], [['x', 'xx'], ['x' * 5], ['x' * 9]])
+
+    def test_cancelled_items_are_skipped(self):
+        batcher, run_batch = self.batcher()
+        first = batcher.submit('first')
+        self.assertTrue(run_batch.started.wait(5))
+        cancelled, kept = batcher.submit('a'), batcher.submit('b')
+        self.assertTrue(cancelled.cancel())
+        run_batch.released.set()
+        self.assertEqual((first.result(5), kept.result(5)), ('FIRST', 'B'))
+        self.assertEqual(run_batch.batches, [['first'], ['b']])
+
+    def test_failures_reach_only_the_callers_in_the_failed_bucket(self):
+        batcher, run_batch = self.batcher(bucket_width=1)
+        bad, short, good = self.submit_behind_first(batcher, run_batch, ['bad', 'short', 'good'])
+        with self.assertRaisesMessage(ValueError, 'bad item'):
+            bad.result(5)
+        with self.assertRaisesMessage(ValueError, 'run_batch returned 0 outputs for 1 items'):
+            short.result(5)
+        self.assertEqual(good.result(5), 'GOOD')
+
+    def test_closed_batcher_finishes_queued_items_and_refuses_new_ones(self):
+        batcher, run_batch = self.batcher()
+        first = batcher.submit('first')
+        self.assertTrue(run_batch.started.wait(5))
+        queued = batcher.submit('a')
+        batcher.close()
+        run_batch.released.set()
+        self.assertEqual((first.result(5), queued.result(5)), ('FIRST', 'A'))
+        with self.assertRaisesMessage(RuntimeError, 'batcher is closed'):
+            batcher.submit('b')
+
+
+class LoadedModelTests(TestCase):
+    def test_unload_waits_for_callers_still_encoding(self):
+        started, released = threading.Event(), threading.Event()
+        encoders = []
+
+        class FakeEncoder:
+            def __init__(self, tokenizer, model):
+                self.closed = False
+                encoders.append(self)
+
+            def encode(self, texts):
+                started.set()
+                released.wait(5)
+                if self.closed:
+                    raise RuntimeError('text-encoder is closed')
+                return np.zeros((len(texts), DIMENSIONS), dtype=np.float32)
+
+            def close(self):
+                self.closed = True
+
+        loaded = LoadedModel(AIModel(name='Test Analyzer'))
+        with mock.patch('apps.ai_analysis.inference.TextEncoder', FakeEncoder):
+            results = []
+            caller = threading.Thread(target=lambda: results.append(loaded.encode(['a', 'b'])))
+            caller.start()
+            self.assertTrue(started.wait(5))
+            loaded.unload()
+            self.assertFalse(encoders[0].closed)
+            released.set()
+            caller.join(5)
+
+            self.assertEqual(results[0].shape, (2, DIMENSIONS))
+            self.assertTrue(encoders[0].closed)
+            # A caller that still holds the unloaded model gets an encoder of its own
+            self.assertEqual(loaded.encode(['c']).shape, (1, DIMENSIONS))
+            self.assertEqual(len(encoders), 2)
+            self.assertTrue(encoders[1].closed)
+
+
+class DrillIntervalsTests(TestCase):
+    # Interval texts are embedding store keys, so they must stay as the per-dict analysis wrote them
+    samples = [
+        {'to_depth': 1.5, 'rock_type': 'granite', 'gold_grade': 0.2, 'mineralization': None},
+        {'from_depth': 1.5, 'to_depth': 3, 'rock_type': 'granite', 'gold_grade': 2, 'silver_grade': 0,
+         'alteration': 'sericite', 'mineralization': 'quartz vein'},
+        {'from_depth': 3, 'to_depth': 4.25, 'rock_type': 'schist', 'gold_grade': 1.5, 'copper_grade': 0.35,
+         'alteration': 'chlorite'},
+        {'from_depth': 4.25, 'to_depth': 6.0, 'rock_type': 'granite', 'gold_grade': 0.1, 'alteration': None,
+         'mineralization': 'disseminated pyrite'},
+    ]
+
+    def test_texts_from_dicts(self):
+        self.assertEqual(DrillIntervals.from_samples(self.samples).texts(), [
+            'Depth 0-1.5m: Rock type granite, Au 0.2g/t, Mineralization: None',
+            'Depth 1.5-3m: Rock type granite, Au 2g/t, Alteration: sericite, Mineralization: quartz vein',
+            'Depth 3-4.25m: Rock type schist, Au 1.5g/t, Cu 0.35%, Alteration: chlorite, Mineralization: none',
+            'Depth 4.25-6.0m: Rock type granite, Au 0.1g/t, Mineralization: disseminated pyrite',
+        ])
+
+    def test_texts_from_database_rows(self):
+        fields = ['from_depth', 'to_depth', 'rock_type', 'gold_grade', 'silver_grade', 'copper_grade',
+                  'alteration', 'mineralization']
+        rows = [(0.0, 1.5, 'igneous', 0.2, None, None, None, None),
+                (1.5, 3.0, 'igneous', 2.0, 0.0, None, 'sericite', 'quartz vein')]
+        self.assertEqual(DrillIntervals.from_rows(rows, fields).texts(), [
+            'Depth 0.0-1.5m: Rock type igneous, Au 0.2g/t, Mineralization: none',
+            'Depth 1.5-3.0m: Rock type igneous, Au 2.0g/t, Alteration: sericite, Mineralization: quartz vein',
+        ])
+
+    def test_statistics(self):
+        details = GeologicalAIAnalyzer()._simulate_drill_analysis(self.samples)['detailed_results']
+        self.assertEqual(details['total_samples_analyzed'], 4)
+        self.assertAlmostEqual(details['average_gold_grade'], 0.95)
+        self.assertAlmostEqual(details['grade_variability'], np.std([0.2, 2, 1.5, 0.1]))
+        self.assertEqual(details['mineralization_zones'], [
+            {'from_depth': 1.5, 'to_depth': 4.25, 'max_grade': 2.0, 'avg_grade': 1.75, 'sample_count': 2},
+        ])
+        self.assertEqual(details['geological_features'], {
+            'dominant_rock_type': 'granite',
+            'alteration_types': ['sericite', 'chlorite'],
+            'structural_features': ['fracturing', 'veining'],
+            'mineralization_style': 'disseminated',
+        })
+
+
+class EmbeddingStoreTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def store(self, max_bytes=None):
+        return EmbeddingStore(self.directory, 'test-v1', max_bytes=max_bytes)
+
+    def test_texts_are_encoded_once(self):
+        encode = encoder()
+        store = self.store()
+        vectors = store.get_or_encode(['Quartz vein', 'quartz  VEIN ', 'Shale'], encode)
+        self.assertEqual(encode.calls, [['Quartz vein', 'Shale']])
+        np.testing.assert_array_equal(vectors[:, 0], [11, 11, 5])
+
+        # Another store on the same directory reads the stored vectors
+        again = self.store().get_or_encode(['shale', 'Gneiss'], encode)
+        self.assertEqual(encode.calls[1:], [['Gneiss']])
+        np.testing.assert_array_equal(again[:, 0], [5, 6])
+
+    def test_shrink_keeps_the_most_recently_used_vectors(self):
+        store = self.store()
+        texts = ['a', 'bb', 'ccc', 'dddd']
+        with mock.patch('time.time_ns', side_effect=range(1, 100)):
+            store.get_or_encode(texts, encoder())
+            # 'a' is read again, so 'bb' becomes the least recently used
+            store.lookup([store.key('a')])
+        dropped = store.shrink(3 * DIMENSIONS * 2)
+        self.assertEqual((dropped, len(store)), (1, 3))
+
+        encode = encoder()
+        vectors = self.store().get_or_encode(texts, encode)
+        self.assertEqual(encode.calls, [['bb']])
+        np.testing.assert_array_equal(vectors[:, 0], [1, 2, 3, 4])
+
+    def test_adding_past_the_cap_compacts_the_store(self):
+        store = self.store(max_bytes=4 * DIMENSIONS * 2)
+        store.get_or_encode([f'text {number}' for number in range(5)], encoder())
+        # Compaction keeps three quarters of the cap
+        self.assertEqual(len(store), 3)
+        self.assertLessEqual(store.size_bytes, store.max_bytes)
+        reopened = self.store()
+        reopened.reload()
+        self.assertEqual(len(reopened), 3)
+
+
+class AnalysisJobViewTests(TestCase):
+    def setUp(self):
+        self.user = MiningUser.objects.create_user('geologist', password='unused')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        geo_property = Property.objects.create(name='Test Property', description='', area_hectares=100)
+        self.hole = DrillHole.objects.create(
+            geo_property=geo_property, hole_id='DH-001', latitude='49.1000000', longitude='-123.1000000',
+            elevation=900, total_depth=200, azimuth=90, dip=-60, drilling_date=datetime.date(2024, 1, 1),
+        )
+
+    def test_analysis_is_queued_and_polled(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(f'/api/ai/drill-hole/{self.hole.pk}/')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(response['Location'], response.json()['url'])
+        job = AnalysisJob.objects.get(pk=response.json()['id'])
+        self.assertEqual((job.user, job.drill_hole, job.status), (self.user, self.hole, AnalysisJob.QUEUED))
+
+        status_response = self.client.get(response['Location'])
+        self.assertEqual(status_response.status_code, 200)
+        self.assertEqual(status_response.json()['status'], AnalysisJob.QUEUED)
+        self.assertIn('Retry-After', status_response)
+
+    def test_jobs_are_only_visible_to_their_user(self):
+        job = AnalysisJob.objects.create(user=self.user, analysis_type='drill_hole', drill_hole=self.hole)
+        other = APIClient()
+        other.force_authenticate(MiningUser.objects.create_user('someone-else', password='unused'))
+        self.assertEqual(other.get(f'/api/ai/jobs/{job.pk}/').status_code, 404)
+
+
+class ModelRegistryTests(TestCase):
+    key = ('Test Analyzer', 'drilling', '1.0')
+
+    def setUp(self):
+        cache.clear()
+        # Stands in for another process: the signals only forget rows in the global registry
+        self.registry = ModelRegistry()
+        self.row = self.registry.get_ai_model(self.key)
+        self.registry.get(self.key)
+
+    def test_edit_in_another_process_reloads_the_row_and_weights(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            AIModel.objects.filter(pk=self.row.pk).update(huggingface_model_id='someone/else')
+            AIModel.objects.get(pk=self.row.pk).save()
+        self.assertEqual(self.registry.get_ai_model(self.key).huggingface_model_id, 'someone/else')
+        self.assertFalse(self.registry.is_resident(self.key))
+
+    def test_delete_in_another_process_recreates_the_row(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            AIModel.objects.filter(pk=self.row.pk).delete()
+        row = self.registry.get_ai_model(self.key)
+        self.assertNotEqual(row.pk, self.row.pk)
+        self.assertTrue(AIModel.objects.filter(pk=row.pk).exists())
+
+    def test_unchanged_rows_are_read_once(self):
+        with self.assertNumQueries(0):
+            self.registry.get_ai_model(self.key)
+            self.registry.get(self.key)
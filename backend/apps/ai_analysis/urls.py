@@ -1,8 +1,9 @@
-# from django.urls import path
-# from .views import *
+from django.urls import path
+from .views import *
 
-# urlpatterns = [
-#     path('drill-hole/<int:drill_hole_id>/', analyze_drill_hole, name='analyze-drill-hole'),
-#     path('magnetic/<int:property_id>/', analyze_magnetic_survey, name='analyze-magnetic-survey'),
-#     path('history/', get_analysis_history, name='analysis-history')
-# ]
+urlpatterns = [
+    path('api/ai/drill-hole/<int:drill_hole_id>/', analyze_drill_hole, name='analyze-drill-hole'),
+    path('api/ai/magnetic/<int:property_id>/', analyze_magnetic_survey, name='analyze-magnetic-survey'),
+    path('api/ai/jobs/<uuid:job_id>/', analysis_job, name='analysis-job'),
+    path('api/ai/history/', get_analysis_history, name='analysis-history')
+]
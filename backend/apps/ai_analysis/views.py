@@ -1,162 +1,129 @@
-# from rest_framework import status
-# from rest_framework.decorators import api_view, permission_classes
-# from rest_framework.permissions import IsAuthenticated
-# from rest_framework.response import Response
-# from django.shortcuts import get_object_or_404
-# from apps.geological_data.models import DrillHole, Property
-# from .models import *
-# from .services import ai_analyzer
-# import numpy as np
-# import logging
-
-
-# logger = logging.getLogger(__name__)
-
-# @api_view(['POST'])
-# @permission_classes([IsAuthenticated])
-# def analyze_drill_hole(request, drill_hole_id):
-#     """Analyze a specific drill hole with AI"""
-#     try:
-#         drill_hole = get_object_or_404(DrillHole, id=drill_hole_id)
-
-#         # Get drill samples (simulated for now)
-#         drill_samples = [
-#             {
-#                 'from_depth': 0,
-#                 'to_depth':10,
-#                 'rock_type': 'granite',
-#                 'gold_grade': 0.5,
-#                 'alteration': 'sericite',
-#                 'mineralization': 'disseminated pyrite'
-#             },
-#             {
-#                 'from_depth': 10,
-#                 'to_depth':20,
-#                 'rock_type': 'granite',
-#                 'gold_grade': 2.1,
-#                 'alteration': 'chlorite-sericite',
-#                 'mineralization': 'quartz veining with pyrite'
-#             }
-#         ]
-
-#         # Run AI analysis
-#         results = ai_analyzer.analyze_drill_data(drill_hole_id, drill_samples)
-
-#         if results.get('error'):
-#             return Response({'error': results['error_message']}, status=500)
-        
-#         # Save results to db
-#         ai_model, _ = AIModel.objects.get_or_create(
-#             name='Demo Drilling Analyzer',
-#             model_type='drilling',
-#             version='1.0'
-#         )
-
-#         analysis_result = AIAnalysisResult.objects.create(
-#             drill_hole=drill_hole,
-#             analysis_type='drill_hole',
-#             ai_model=ai_model,
-#             confidence_score=results['confidence_score'],
-#             predicted_grade=results.get('predicted_grade'),
-#             anomalies_detected=results['anomalies_detected'],
-#             detailed_results=results.get('detaled_results', {}),
-#             ai_interpretation=results['ai_interpretation'],
-#             recommendations=results['recommendations'],
-#             processing_time=results.get('processing_time', 0)
-#         )
-
-#         # Update drill hole
-#         drill_hole.ai_processed = True
-#         drill_hole.ai_confidence_score = results['confidence_score']
-#         drill_hole.save()
-
-#         # Update user engagement
-#         request.user.ai_interactions =+ 1
-#         request.user.save()
-
-#         return Response({
-#             'success': True,
-#             'analysis_id': analysis_result.id,
-#             'results': {
-#                 'confidence_score': results['confidence_score'],
-#                 'predicted_grade': results.get('predicted_grade'),
-#                 'anlmalies_detected': results['anomalies_detected'],
-#                 'ai_interpretations': results['ai_interpretation'],
-#                 'recommendations': results['recommendations'],
-#                 'processing_time': results('processing_time')
-#             }
-#         })
-#     except Exception as e:
-#         logger.error(f"error in drill hole analysis: {e}")
-#         return Response({'error': str(e)}, status=500)
-    
-# @api_view(['POST'])
-# @permission_classes([IsAuthenticated])
-# def analyze_magnetic_survey(request, property_id):
-#     """Analyze magnetic survey data"""
-#     try:
-#         property_obj = get_object_or_404(Property, id=property_id)
-        
-#         # Simulate magnetic survey data
-#         survey_data = np.random.normal(50000, 1000, (50, 50))  # nT values
-        
-#         results = ai_analyzer.analyze_magnetic_survey(survey_data, property_id)
-        
-#         # Save results
-#         ai_model, _ = AIModel.objects.get_or_create(
-#             name="Demo Magnetic Analyzer",
-#             model_type="magnetic",
-#             version="1.0"
-#         )
-        
-#         analysis_result = AIAnalysisResult.objects.create(
-#             property=property_obj,
-#             analysis_type='magnetic_survey',
-#             ai_model=ai_model,
-#             confidence_score=results['confidence_score'],
-#             anomalies_detected=results['anomalies_detected'],
-#             detailed_results=results.get('detailed_results', {}),
-#             ai_interpretation=results['ai_interpretation'],
-#             recommendations=results['recommendations'],
-#             processing_time=results.get('processing_time', 0)
-#         )
-        
-#         request.user.ai_interactions += 1
-#         request.user.save()
-        
-#         return Response({
-#             'success': True,
-#             'analysis_id': analysis_result.id,
-#             'results': results
-#         })
-        
-#     except Exception as e:
-#         logger.error(f"Error in magnetic survey analysis: {e}")
-#         return Response({'error': str(e)}, status=500)
-
-# @api_view(['GET'])
-# @permission_classes([IsAuthenticated])
-# def get_analysis_history(request):
-#     """Get user's AI analysis history"""
-#     # Get recent analyses
-#     recent_analyses = AIAnalysisResult.objects.filter(
-#         drill_hole__isnull=False
-#     ).select_related('drill_hole', 'ai_model').order_by('-created_at')[:10]
-    
-#     history = []
-#     for analysis in recent_analyses:
-#         history.append({
-#             'id': analysis.id,
-#             'type': analysis.analysis_type,
-#             'target': str(analysis.drill_hole or analysis.property),
-#             'confidence_score': analysis.confidence_score,
-#             'anomalies_detected': analysis.anomalies_detected,
-#             'created_at': analysis.created_at,
-#             'ai_model': analysis.ai_model.name
-#         })
-    
-#     return Response({
-#         'analyses': history,
-#         'total_analyses': AIAnalysisResult.objects.count(),
-#         'user_ai_interactions': request.user.ai_interactions
-#     })
\ No newline at end of file
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from apps.geological_data.block_model import model_id
+from apps.geological_data.models import DrillHole, Property
+from apps.geostatistics.services import parameter_hash
+from .models import *
+from .jobs import submit_job
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+# Seconds a client is asked to wait before polling an unfinished job again
+JOB_POLL_INTERVAL = 1
+
+# Where the result of each geostatistics job type is read back
+GEOSTATISTICS_ROUTES = {
+    'variogram': 'geostatistics-property-variogram',
+    'kriging': 'geostatistics-property-kriging',
+}
+
+
+def job_payload(request, job):
+    """Job status for the API, with the analysis once the job has succeeded"""
+    payload = {
+        'id': str(job.id),
+        'url': request.build_absolute_uri(reverse('analysis-job', args=[job.id])),
+        'status': job.status,
+        'analysis_type': job.analysis_type,
+        'drill_hole': job.drill_hole_id,
+        'geo_property': job.geo_property_id,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at,
+    }
+    if job.status == AnalysisJob.FAILED:
+        payload['error'] = job.error
+    if job.analysis_type == 'block_model':
+        identifier = model_id(job.parameters)
+        payload['model'] = identifier
+        if job.status == AnalysisJob.SUCCEEDED:
+            url = reverse('property-block-model', args=[job.geo_property_id])
+            payload['model_url'] = request.build_absolute_uri(f'{url}?model={identifier}')
+    if job.analysis_type in GEOSTATISTICS_ROUTES:
+        identifier = parameter_hash(job.parameters)
+        payload['result'] = identifier
+        if job.status == AnalysisJob.SUCCEEDED:
+            url = reverse(GEOSTATISTICS_ROUTES[job.analysis_type], args=[job.geo_property_id])
+            payload['result_url'] = request.build_absolute_uri(f'{url}?result={identifier}')
+    if job.result is not None:
+        result = job.result
+        payload['analysis_id'] = result.id
+        payload['results'] = {
+            'confidence_score': result.confidence_score,
+            'predicted_grade': result.predicted_grade,
+            'anomalies_detected': result.anomalies_detected,
+            'ai_interpretation': result.ai_interpretation,
+            'recommendations': result.recommendations,
+            'detailed_results': result.detailed_results,
+            'processing_time': result.processing_time,
+        }
+    return payload
+
+
+def job_accepted(request, job):
+    """202 response for a queued job, pointing at its status URL"""
+    payload = job_payload(request, job)
+    response = Response(payload, status=status.HTTP_202_ACCEPTED)
+    response['Location'] = payload['url']
+    return response
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def analyze_drill_hole(request, drill_hole_id):
+    """Queue an AI analysis of a drill hole's samples; poll the returned job for the result"""
+    drill_hole = get_object_or_404(DrillHole, id=drill_hole_id)
+    return job_accepted(request, submit_job(request.user, 'drill_hole', drill_hole=drill_hole))
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def analyze_magnetic_survey(request, property_id):
+    """Queue an analysis of magnetic survey data; poll the returned job for the result"""
+    property_obj = get_object_or_404(Property, id=property_id)
+    return job_accepted(request, submit_job(request.user, 'magnetic_survey', geo_property=property_obj))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def analysis_job(request, job_id):
+    """Status of one of the user's analysis jobs, with the results once it has succeeded"""
+    job = get_object_or_404(AnalysisJob.objects.select_related('result'), pk=job_id, user=request.user)
+    response = Response(job_payload(request, job))
+    if not job.is_finished:
+        response['Retry-After'] = str(JOB_POLL_INTERVAL)
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_analysis_history(request):
+    """Get user's AI analysis history"""
+    # Get recent analyses
+    recent_analyses = AIAnalysisResult.objects.filter(
+        drill_hole__isnull=False
+    ).select_related('drill_hole', 'geo_property', 'ai_model').order_by('-created_at')[:10]
+
+    history = []
+    for analysis in recent_analyses:
+        history.append({
+            'id': analysis.id,
+            'type': analysis.analysis_type,
+            'target': str(analysis.drill_hole or analysis.geo_property),
+            'confidence_score': analysis.confidence_score,
+            'anomalies_detected': analysis.anomalies_detected,
+            'created_at': analysis.created_at,
+            'ai_model': analysis.ai_model.name
+        })
+
+    return Response({
+        'analyses': history,
+        'total_analyses': AIAnalysisResult.objects.count(),
+        'user_analysis_jobs': request.user.analysis_jobs.count()
+    })
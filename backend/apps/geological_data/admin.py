@@ -1,7 +1,27 @@
 # backend/apps/geological_data/admin.py
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db.models import Count
+from django.utils.functional import cached_property
 from django.utils.html import format_html
 from .models import Property, DrillHole, DrillSample
+from .pagination import estimate_count
+
+
+class EstimatedCountPaginator(Paginator):
+    """Changelist paginator that uses the planner's row estimate on large tables
+
+    Small or non-PostgreSQL results fall back to an exact COUNT(*).
+    """
+    exact_count_below = 100000
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        if estimate is None or estimate < self.exact_count_below:
+            return super().count
+        return estimate
+
 
 @admin.register(Property)
 class PropertyAdmin(admin.ModelAdmin):
@@ -26,12 +46,16 @@ class PropertyAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(annotated_drill_hole_count=Count('drill_holes'))
+
     def drill_hole_count(self, obj):
-        count = obj.drill_holes.count()
+        count = obj.annotated_drill_hole_count
         if count > 0:
             return format_html('<strong>{}</strong>', count)
         return count
     drill_hole_count.short_description = 'Drill Holes'
+    drill_hole_count.admin_order_field = 'annotated_drill_hole_count'
 
 class DrillSampleInline(admin.TabularInline):
     model = DrillSample
@@ -46,12 +70,13 @@ class DrillSampleInline(admin.TabularInline):
 class DrillHoleAdmin(admin.ModelAdmin):
     list_display = ['hole_id', 'property_name', 'total_depth', 'sample_count_display', 'avg_gold_grade_display', 'drilling_date']
     list_filter = ['drilling_date']
-    search_fields = ['hole_id', 'property__name']
+    list_select_related = ['geo_property']
+    search_fields = ['hole_id', 'geo_property__name']
     inlines = [DrillSampleInline]
     
     fieldsets = (
         ('Basic Information', {
-            'fields': ('property', 'hole_id', 'drilling_date')
+            'fields': ('geo_property', 'hole_id', 'drilling_date')
         }),
         ('Location', {
             'fields': ('latitude', 'longitude', 'elevation')
@@ -66,16 +91,21 @@ class DrillHoleAdmin(admin.ModelAdmin):
     )
     readonly_fields = ['created_at']
     
+    def get_queryset(self, request):
+        return DrillHole.annotate_sample_stats(super().get_queryset(request))
+
     def property_name(self, obj):
-        return obj.property.name
+        return obj.geo_property.name
     property_name.short_description = 'Property'
-    
+    property_name.admin_order_field = 'geo_property__name'
+
     def sample_count_display(self, obj):
         count = obj.sample_count
         if count > 0:
             return format_html('<strong>{}</strong>', count)
         return count
     sample_count_display.short_description = 'Samples'
+    sample_count_display.admin_order_field = 'annotated_sample_count'
     
     def avg_gold_grade_display(self, obj):
         avg_grade = obj.average_gold_grade
@@ -83,12 +113,18 @@ class DrillHoleAdmin(admin.ModelAdmin):
             return f"{avg_grade:.2f} g/t"
         return "No gold assays"
     avg_gold_grade_display.short_description = 'Avg Au Grade'
+    avg_gold_grade_display.admin_order_field = 'annotated_average_gold_grade'
 
 @admin.register(DrillSample)
 class DrillSampleAdmin(admin.ModelAdmin):
     list_display = ['drill_hole_display', 'depth_interval', 'rock_type', 'gold_grade_display', 'silver_grade_display', 'copper_grade_display']
     list_filter = ['rock_type', 'drill_hole__drilling_date']
-    search_fields = ['drill_hole__hole_id', 'drill_hole__property__name', 'rock_type']
+    list_select_related = ['drill_hole__geo_property']
+    search_fields = ['drill_hole__hole_id', 'drill_hole__geo_property__name', 'rock_type']
+    raw_id_fields = ['drill_hole']
+    # Millions of rows: estimate the total and skip the unfiltered count
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         ('Sample Location', {
@@ -108,7 +144,7 @@ class DrillSampleAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at']
     
     def drill_hole_display(self, obj):
-        return f"{obj.drill_hole.property.name} - {obj.drill_hole.hole_id}"
+        return f"{obj.drill_hole.geo_property.name} - {obj.drill_hole.hole_id}"
     drill_hole_display.short_description = 'Drill Hole'
     
     def depth_interval(self, obj):
@@ -118,7 +154,7 @@ class DrillSampleAdmin(admin.ModelAdmin):
     def gold_grade_display(self, obj):
         if obj.gold_grade is not None:
             color = "green" if obj.gold_grade > 1.0 else "black"
-            return format_html('<span style="color: {}">{:.2f} g/t</span>', color, obj.gold_grade)
+            return format_html('<span style="color: {}">{} g/t</span>', color, f"{obj.gold_grade:.2f}")
         return "-"
     gold_grade_display.short_description = 'Au (g/t)'
     
@@ -0,0 +1,74 @@
+# backend/apps/geological_data/array_store.py
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import numpy as np
+from django.conf import settings
+
+
+class ArrayStore:
+    """Derived arrays on disk, one .npz per (kind, property, data version)
+
+    Files are written to a temporary name and renamed into place, so readers
+    in other processes never see a partial archive. Writing a new version
+    removes the older versions of the same kind for that property. A ``tag``
+    keeps several files of one kind side by side within a version.
+    """
+
+    def __init__(self, root: Optional[os.PathLike] = None):
+        self._root = Path(root) if root else None
+
+    @property
+    def root(self) -> Path:
+        # Read on use, so stores created at import follow settings overrides
+        if self._root is not None:
+            return self._root
+        return Path(getattr(settings, 'GEOLOGICAL_ARRAY_ROOT', Path(settings.MEDIA_ROOT) / 'arrays'))
+
+    def path(self, kind: str, property_id: int, version: int, suffix: str = '.npz', tag: str = '') -> Path:
+        name = f'property-{property_id}-v{version}'
+        if tag:
+            name += f'-{tag}'
+        return self.root / kind / f'{name}{suffix}'
+
+    def load(self, kind: str, property_id: int, version: int, tag: str = '') -> Optional[Dict[str, np.ndarray]]:
+        try:
+            with np.load(self.path(kind, property_id, version, tag=tag)) as archive:
+                return {name: archive[name] for name in archive.files}
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+
+    def save(self, kind: str, property_id: int, version: int, arrays: Dict[str, np.ndarray], tag: str = ''):
+        target = self.path(kind, property_id, version, tag=tag)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, temporary = tempfile.mkstemp(dir=target.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                np.savez(out, **arrays)
+            os.replace(temporary, target)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        self.discard_stale(kind, property_id, version)
+
+    def discard_stale(self, kind: str, property_id: int, version: int):
+        """Remove files of older data versions for a property"""
+        directory = self.root / kind
+        current = f'property-{property_id}-v{version}'
+        for path in directory.glob(f'property-{property_id}-v*'):
+            if path.name.endswith('.tmp') or path.name.startswith((f'{current}.', f'{current}-')):
+                continue
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def get_or_build(self, kind: str, property_id: int, version: int,
+                     builder: Callable[[], Dict[str, np.ndarray]], tag: str = '') -> Dict[str, np.ndarray]:
+        arrays = self.load(kind, property_id, version, tag)
+        if arrays is None:
+            arrays = builder()
+            self.save(kind, property_id, version, arrays, tag)
+        return arrays
@@ -0,0 +1,205 @@
+# backend/apps/geological_data/block_model.py
+import hashlib
+import json
+import os
+import tempfile
+from typing import Dict, Optional
+
+import numpy as np
+from django.conf import settings
+
+from .array_store import ArrayStore
+from .compositing import get_property_composites
+from .desurvey import desurvey_depths, get_sample_coordinates
+from .interpolation import ellipsoid_transform, estimate_blocks
+from .models import Property
+from .sample_arrays import GRADE_COLUMNS
+
+# Largest grid a single model may have (float32, so 4 bytes per block)
+MAX_BLOCKS = 50_000_000
+
+DEFAULT_PARAMETERS = {
+    'grade': 'gold_grade',
+    'block_size': [10.0, 10.0, 5.0],
+    'composite_length': 2.0,
+    'search_radii': [100.0, 100.0, 50.0],
+    'search_azimuth': 0.0,
+    'search_dip': 0.0,
+    'power': 2.0,
+    'max_samples': 16,
+    'min_samples': 2,
+}
+
+_store = ArrayStore()
+
+
+def clean_parameters(data: Dict) -> Dict:
+    """Merge request data over the defaults and validate it, raising ValueError"""
+    parameters = dict(DEFAULT_PARAMETERS)
+    for name in DEFAULT_PARAMETERS:
+        if data.get(name) not in (None, ''):
+            parameters[name] = data[name]
+
+    if parameters['grade'] not in GRADE_COLUMNS:
+        raise ValueError(f"Unknown grade column: {parameters['grade']}")
+    for name in ('block_size', 'search_radii'):
+        value = parameters[name]
+        if isinstance(value, str):
+            value = value.split(',')
+        try:
+            value = [float(part) for part in value]
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} must be three numbers")
+        if len(value) != 3 or not all(part > 0 for part in value):
+            raise ValueError(f"{name} must be three positive numbers")
+        parameters[name] = value
+    try:
+        for name in ('composite_length', 'search_azimuth', 'search_dip', 'power'):
+            parameters[name] = float(parameters[name])
+        for name in ('max_samples', 'min_samples'):
+            parameters[name] = int(parameters[name])
+    except (TypeError, ValueError):
+        raise ValueError("composite_length, search angles, power and sample limits must be numbers")
+    if not parameters['composite_length'] > 0 or not parameters['power'] > 0:
+        raise ValueError("composite_length and power must be positive")
+    if not 1 <= parameters['min_samples'] <= parameters['max_samples'] <= 256:
+        raise ValueError("Sample limits must satisfy 1 <= min_samples <= max_samples <= 256")
+    return parameters
+
+
+def grid_for_points(points: np.ndarray, block_size, max_blocks: int = MAX_BLOCKS):
+    """Origin corner and (nz, ny, nx) shape of the block-aligned grid covering ``points``"""
+    block_size = np.asarray(block_size, dtype=np.float64)
+    origin = np.floor(points.min(axis=0) / block_size) * block_size
+    counts = np.floor((points.max(axis=0) - origin) / block_size).astype(int) + 1
+    shape = (int(counts[2]), int(counts[1]), int(counts[0]))
+    if int(np.prod(shape)) > max_blocks:
+        raise ValueError(f"The grid would have {int(np.prod(shape)):,} blocks; use larger blocks "
+                         f"(limit {max_blocks:,})")
+    return origin, shape
+
+
+def model_id(parameters: Dict) -> str:
+    """Stable identifier for a set of cleaned parameters"""
+    encoded = json.dumps(parameters, sort_keys=True).encode('utf-8')
+    return hashlib.sha1(encoded).hexdigest()[:12]
+
+
+def _paths(geo_property: Property, identifier: str):
+    return (_store.path('block_models', geo_property.pk, geo_property.data_version, '.npy', identifier),
+            _store.path('block_models', geo_property.pk, geo_property.data_version, '.json', identifier))
+
+
+def load_metadata(geo_property: Property, identifier: str) -> Optional[Dict]:
+    _, metadata_path = _paths(geo_property, identifier)
+    try:
+        with open(metadata_path) as stream:
+            return json.load(stream)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def list_models(geo_property: Property) -> list:
+    """Metadata of every block model built for the property's current data version"""
+    directory = _store.root / 'block_models'
+    prefix = f'property-{geo_property.pk}-v{geo_property.data_version}-'
+    models = []
+    for path in sorted(directory.glob(f'{prefix}*.json')):
+        metadata = load_metadata(geo_property, path.name[len(prefix):-len('.json')])
+        if metadata is not None:
+            models.append(metadata)
+    return models
+
+
+def open_model(geo_property: Property, identifier: str) -> Optional[np.ndarray]:
+    """Memory-map a built model read-only, shape (nz, ny, nx) with benches along axis 0"""
+    grid_path, _ = _paths(geo_property, identifier)
+    try:
+        return np.load(grid_path, mmap_mode='r')
+    except FileNotFoundError:
+        return None
+
+
+def build_block_model(geo_property: Property, parameters: Dict, workers: Optional[int] = None) -> Dict:
+    """IDW-estimate a block model from the property's composites and store it
+
+    Composites are desurveyed to their midpoints and the grid covers their
+    extent, aligned to whole blocks. The model is written to a .npy file that
+    endpoints memory-map, next to a JSON file describing the grid. A model
+    with the same parameters for the same data version is reused. Blocks are
+    spread over at most ``workers`` processes (BLOCK_MODEL_WORKERS by default).
+    """
+    if workers is None:
+        workers = getattr(settings, 'BLOCK_MODEL_WORKERS', None)
+    identifier = model_id(parameters)
+    metadata = load_metadata(geo_property, identifier)
+    if metadata is not None:
+        return metadata
+
+    composites = get_property_composites(geo_property, parameters['composite_length'])
+    grades = composites[parameters['grade']]
+    assayed = ~np.isnan(grades)
+    if not assayed.any():
+        raise ValueError("The property has no assayed composites to interpolate")
+
+    coordinates = get_sample_coordinates(geo_property)
+    midpoint = (composites['from_depth'] + composites['to_depth']) / 2
+    points = desurvey_depths(coordinates, composites['hole'][assayed], midpoint[assayed])
+
+    origin, shape = grid_for_points(points, parameters['block_size'])
+
+    grid = {
+        'shape': shape,
+        'block_size': parameters['block_size'],
+        'transform': ellipsoid_transform(parameters['search_radii'], parameters['search_azimuth'],
+                                         parameters['search_dip']).tolist(),
+        'power': parameters['power'],
+        'max_samples': parameters['max_samples'],
+        'min_samples': parameters['min_samples'],
+    }
+
+    grid_path, metadata_path = _paths(geo_property, identifier)
+    grid_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temporary = tempfile.mkstemp(dir=grid_path.parent, suffix='.tmp')
+    os.close(fd)
+    try:
+        # Create the .npy; every block is then written by exactly one chunk
+        np.lib.format.open_memmap(temporary, mode='w+', dtype=np.float32, shape=shape).flush()
+        estimated = estimate_blocks(points - origin, grades[assayed], grid, temporary, workers=workers)
+        os.replace(temporary, grid_path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+    metadata = {
+        'model': identifier,
+        'property': geo_property.pk,
+        'data_version': geo_property.data_version,
+        'epsg': int(coordinates['epsg']),
+        'origin': origin.tolist(),
+        'block_size': parameters['block_size'],
+        'shape': list(shape),
+        'estimated_blocks': estimated,
+        'composites': int(assayed.sum()),
+        'parameters': parameters,
+    }
+    with open(metadata_path, 'w') as stream:
+        json.dump(metadata, stream)
+    _store.discard_stale('block_models', geo_property.pk, geo_property.data_version)
+    return metadata
+
+
+def bench_index(metadata: Dict, elevation: float) -> int:
+    """Bench (axis 0 index) containing an elevation"""
+    return int(np.floor((elevation - metadata['origin'][2]) / metadata['block_size'][2]))
+
+
+def region_slices(metadata: Dict, bounds) -> tuple:
+    """Index slices (z, y, x) covering blocks whose centres fall inside
+    ``bounds`` = (xmin, ymin, zmin, xmax, ymax, zmax)"""
+    origin = np.asarray(metadata['origin'])
+    size = np.asarray(metadata['block_size'])
+    shape = metadata['shape'][::-1]  # x, y, z
+    low = np.clip(np.ceil((np.asarray(bounds[:3]) - origin) / size - 0.5), 0, shape).astype(int)
+    high = np.clip(np.floor((np.asarray(bounds[3:]) - origin) / size - 0.5) + 1, 0, shape).astype(int)
+    return tuple(slice(low[axis], max(low[axis], high[axis])) for axis in (2, 1, 0))
@@ -0,0 +1,117 @@
+# backend/apps/geological_data/compositing.py
+from typing import Dict, Optional
+
+import numpy as np
+
+from .models import Property
+from .sample_arrays import GRADE_COLUMNS, LRUCache, SampleArrays, column_records, load_property_samples
+
+# Composite runs kept in memory per process
+COMPOSITE_CACHE_SIZE = 32
+
+# Pieces shorter than this (in metres) are rounding noise at bin edges
+_EPSILON = 1e-9
+
+MAX_COMPOSITE_LENGTH = 1000.0
+
+
+def composite_samples(arrays: SampleArrays, length: float,
+                      top_cuts: Optional[Dict[str, float]] = None,
+                      min_coverage: float = 0.5) -> Dict[str, np.ndarray]:
+    """Composite every hole's samples to fixed run lengths measured from the collar
+
+    Each sample is split at the run boundaries it crosses, and the pieces are
+    summed per (hole, run) in one pass over all holes. Grades are
+    length-weighted over the assayed part of each run, after capping at
+    ``top_cuts`` (a grade column -> cap mapping). Runs whose sampled length is
+    below ``min_coverage`` of the run length are dropped; this covers both the
+    short residual at the bottom of a hole and runs straddling sampling gaps.
+    Interval ends are clipped to the sampled extent inside the run.
+    """
+    if not length > 0 or length > MAX_COMPOSITE_LENGTH:
+        raise ValueError(f"length must be between 0 and {MAX_COMPOSITE_LENGTH:g} m")
+    if not 0 <= min_coverage <= 1:
+        raise ValueError("min_coverage must be between 0 and 1")
+    top_cuts = top_cuts or {}
+    for name, cap in top_cuts.items():
+        if name not in GRADE_COLUMNS:
+            raise ValueError(f"Unknown grade column: {name}")
+        if not cap > 0:
+            raise ValueError(f"Top cut for {name} must be positive")
+
+    from_depth, to_depth = arrays.from_depth, arrays.to_depth
+
+    # Split samples at run boundaries: sample i covers runs first[i]..last[i]
+    first = np.floor(from_depth / length).astype(np.int64)
+    last = np.maximum(np.ceil(to_depth / length).astype(np.int64) - 1, first)
+    pieces = last - first + 1
+    source = np.repeat(np.arange(len(arrays)), pieces)
+    starts = np.cumsum(pieces) - pieces
+    run = first[source] + (np.arange(len(source)) - starts[source])
+
+    piece_from = np.maximum(from_depth[source], run * length)
+    piece_to = np.minimum(to_depth[source], (run + 1) * length)
+    keep = piece_to - piece_from > _EPSILON
+    source, run, piece_from, piece_to = source[keep], run[keep], piece_from[keep], piece_to[keep]
+    piece_length = piece_to - piece_from
+
+    # Group pieces by (hole, run); samples are already sorted by hole then depth
+    hole = arrays.hole[source].astype(np.int64)
+    key = hole * (int(run.max()) + 1 if len(run) else 1) + run
+    order = np.argsort(key, kind='stable')
+    key, hole, run = key[order], hole[order], run[order]
+    source, piece_from, piece_to, piece_length = source[order], piece_from[order], piece_to[order], piece_length[order]
+    group_starts = np.flatnonzero(np.r_[len(key) > 0, key[1:] != key[:-1]])
+
+    sampled = np.add.reduceat(piece_length, group_starts)
+    result = {
+        'hole': hole[group_starts].astype(np.int32),
+        'from_depth': np.minimum.reduceat(piece_from, group_starts),
+        'to_depth': np.maximum.reduceat(piece_to, group_starts),
+        'length': sampled,
+    }
+    for name in GRADE_COLUMNS:
+        grade = arrays.grades[name][source]
+        if name in top_cuts:
+            grade = np.minimum(grade, top_cuts[name])
+        assayed = ~np.isnan(grade)
+        weighted_length = np.where(assayed, piece_length, 0.0)
+        weighted_grade = np.where(assayed, grade * piece_length, 0.0)
+        assayed_length = np.add.reduceat(weighted_length, group_starts)
+        totals = np.add.reduceat(weighted_grade, group_starts)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result[name] = np.where(assayed_length > 0, totals / assayed_length, np.nan)
+
+    covered = sampled >= min_coverage * length - _EPSILON
+    result = {name: column[covered] for name, column in result.items()}
+    result['hole_dictionary'] = arrays.hole_names
+    result['hole_pk'] = arrays.hole_pk
+    return result
+
+
+_composites = LRUCache(COMPOSITE_CACHE_SIZE)
+
+
+def get_property_composites(geo_property: Property, length: float,
+                            top_cuts: Optional[Dict[str, float]] = None,
+                            min_coverage: float = 0.5) -> Dict[str, np.ndarray]:
+    """Composite a property's samples, cached per data version and parameters"""
+    top_cuts = top_cuts or {}
+    key = (geo_property.pk, geo_property.data_version, float(length),
+           tuple(sorted(top_cuts.items())), float(min_coverage))
+    return _composites.get_or_create(key, lambda: composite_samples(
+        load_property_samples(geo_property), length, top_cuts, min_coverage
+    ))
+
+
+def composite_records(composites: Dict[str, np.ndarray]) -> list:
+    """One dict per composite, for JSON responses"""
+    hole = composites['hole']
+    return column_records([
+        ('drill_hole', composites['hole_pk'][hole]),
+        ('hole_id', composites['hole_dictionary'][hole]),
+        ('from_depth', composites['from_depth']),
+        ('to_depth', composites['to_depth']),
+        ('length', composites['length']),
+        *[(name, composites[name]) for name in GRADE_COLUMNS],
+    ])
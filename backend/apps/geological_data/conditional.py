@@ -0,0 +1,87 @@
+# backend/apps/geological_data/conditional.py
+import hashlib
+from typing import Optional, Tuple
+
+from django.db.models import Count, Max, Sum
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .models import DrillHole, DrillSample, Property
+
+
+class _NotModified(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """Answer unchanged GETs with 304 Not Modified before any serializer runs
+
+    The ETag and Last-Modified of an action in ``conditional_actions`` come
+    from the ``data_version`` and ``last_updated`` stamps of the properties
+    in ``get_validator_queryset()``, read with one aggregate query. Actions
+    whose output can change without a version bump must stay out of the
+    list.
+    """
+    conditional_actions = ('list', 'retrieve')
+
+    def get_validator_queryset(self):
+        """Properties whose stamps cover the response; all of them by default"""
+        return Property.objects.all()
+
+    def get_validators(self) -> Optional[Tuple[str, Optional[float]]]:
+        try:
+            stamps = self.get_validator_queryset().order_by().aggregate(
+                versions=Sum('data_version'), count=Count('id'), last_updated=Max('last_updated'),
+            )
+        except (TypeError, ValueError):
+            # Malformed ids in the URL; the handler reports them
+            return None
+        last_updated = stamps['last_updated']
+        token = '|'.join(str(part) for part in (
+            stamps['versions'], stamps['count'], last_updated and last_updated.isoformat(),
+            self.request.accepted_renderer.format,
+        ))
+        etag = quote_etag(hashlib.sha1(token.encode('utf-8')).hexdigest()[:20])
+        return etag, int(last_updated.timestamp()) if last_updated else None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._conditional_validators = None
+        if request.method in ('GET', 'HEAD') and self.action in self.conditional_actions:
+            self._conditional_validators = self.get_validators()
+        if self._conditional_validators:
+            etag, last_modified = self._conditional_validators
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is not None:
+                raise _NotModified(self._set_validator_headers(response))
+
+    def handle_exception(self, exc):
+        if isinstance(exc, _NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, '_conditional_validators', None) and response.status_code == 200:
+            self._set_validator_headers(response)
+        return response
+
+    def _set_validator_headers(self, response):
+        etag, last_modified = self._conditional_validators
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
+def properties_of_holes(drill_hole_ids):
+    return Property.objects.filter(
+        pk__in=DrillHole.objects.filter(pk__in=drill_hole_ids).values('geo_property_id')
+    )
+
+
+def properties_of_samples(sample_ids):
+    return Property.objects.filter(
+        pk__in=DrillSample.objects.filter(pk__in=sample_ids).values('drill_hole__geo_property_id')
+    )
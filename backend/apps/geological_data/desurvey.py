@@ -0,0 +1,202 @@
+# backend/apps/geological_data/desurvey.py
+from typing import Dict, Tuple
+
+import numpy as np
+
+from .array_store import ArrayStore
+from .models import DrillHole, Property
+from .sample_arrays import LRUCache, SampleArrays, load_property_samples
+
+# WGS84 ellipsoid and UTM constants
+_A = 6378137.0
+_F = 1 / 298.257223563
+_K0 = 0.9996
+_FALSE_EASTING = 500000.0
+_FALSE_NORTHING_SOUTH = 10000000.0
+
+_N = _F / (2 - _F)
+_RECTIFYING_RADIUS = _A / (1 + _N) * (1 + _N ** 2 / 4 + _N ** 4 / 64)
+_ALPHA = (
+    _N / 2 - 2 * _N ** 2 / 3 + 5 * _N ** 3 / 16,
+    13 * _N ** 2 / 48 - 3 * _N ** 3 / 5,
+    61 * _N ** 3 / 240,
+)
+_E = 2 * np.sqrt(_N) / (1 + _N)
+
+# Properties whose sample coordinates are kept in memory per process
+COORDINATE_CACHE_SIZE = 16
+
+
+def utm_zone(latitude: float, longitude: float) -> Tuple[int, bool]:
+    """Return (zone number, southern hemisphere) for a point"""
+    zone = int(np.floor((longitude + 180) / 6)) % 60 + 1
+    return zone, latitude < 0
+
+
+def utm_epsg(zone: int, south: bool) -> int:
+    return (32700 if south else 32600) + zone
+
+
+def project_utm(latitude: np.ndarray, longitude: np.ndarray, zone: int, south: bool) -> Tuple[np.ndarray, np.ndarray]:
+    """Project WGS84 degrees to UTM easting/northing in metres
+
+    Uses the Krüger series to third order in n, which is well under a
+    millimetre inside a zone and stays accurate a few degrees outside it, so
+    a property straddling a zone boundary can stay on one grid.
+    """
+    phi = np.radians(np.asarray(latitude, dtype=np.float64))
+    lam = np.radians(np.asarray(longitude, dtype=np.float64) - (zone * 6 - 183))
+
+    t = np.sinh(np.arctanh(np.sin(phi)) - _E * np.arctanh(_E * np.sin(phi)))
+    xi = np.arctan2(t, np.cos(lam))
+    eta = np.arctanh(np.sin(lam) / np.sqrt(1 + t ** 2))
+
+    easting, northing = eta.copy(), xi.copy()
+    for j, alpha in enumerate(_ALPHA, start=1):
+        easting += alpha * np.cos(2 * j * xi) * np.sinh(2 * j * eta)
+        northing += alpha * np.sin(2 * j * xi) * np.cosh(2 * j * eta)
+
+    easting = _FALSE_EASTING + _K0 * _RECTIFYING_RADIUS * easting
+    northing = _K0 * _RECTIFYING_RADIUS * northing
+    if south:
+        northing = northing + _FALSE_NORTHING_SOUTH
+    return easting, northing
+
+
+def direction_vectors(azimuth: np.ndarray, dip: np.ndarray) -> np.ndarray:
+    """Unit (east, north, up) vectors; dip is positive downwards as on DrillHole"""
+    azimuth, dip = np.radians(azimuth), np.radians(dip)
+    return np.stack([np.cos(dip) * np.sin(azimuth), np.cos(dip) * np.cos(azimuth), -np.sin(dip)], axis=-1)
+
+
+def _ratio_factor(dogleg: np.ndarray) -> np.ndarray:
+    """Minimum curvature ratio factor 2/β·tan(β/2), 1 for straight segments"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        factor = 2 / dogleg * np.tan(dogleg / 2)
+    return np.where(dogleg > 1e-9, factor, 1.0)
+
+
+def _slerp(start: np.ndarray, end: np.ndarray, dogleg: np.ndarray, fraction: np.ndarray) -> np.ndarray:
+    """Direction a fraction of the way along the arc between two unit vectors"""
+    fraction, dogleg = fraction[:, None], dogleg[:, None]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        curved = (np.sin((1 - fraction) * dogleg) * start + np.sin(fraction * dogleg) * end) / np.sin(dogleg)
+    straight = start + fraction * (end - start)
+    return np.where(dogleg > 1e-9, curved, straight)
+
+
+def desurvey(collars: np.ndarray, station_hole: np.ndarray, station_depth: np.ndarray,
+             station_azimuth: np.ndarray, station_dip: np.ndarray,
+             hole: np.ndarray, depth: np.ndarray) -> np.ndarray:
+    """Positions of downhole depths by minimum curvature, vectorized over all holes
+
+    ``collars`` is an (n_holes, 3) array of collar east/north/elevation.
+    Survey stations are sorted by hole then depth, and every hole needs a
+    station at depth 0; a hole with only that station is a straight line.
+    Below the last station a hole continues along the last measured
+    direction. Returns an (n, 3) array for the ``hole``/``depth`` pairs.
+    """
+    if not len(depth):
+        return np.empty((0, 3))
+    directions = direction_vectors(station_azimuth, station_dip)
+
+    # Station positions: accumulate minimum curvature segments within each hole
+    same_hole = station_hole[1:] == station_hole[:-1]
+    dogleg = np.arccos(np.clip(np.einsum('ij,ij->i', directions[:-1], directions[1:]), -1, 1))
+    step = (station_depth[1:] - station_depth[:-1])[:, None] / 2 * (directions[:-1] + directions[1:])
+    step *= _ratio_factor(dogleg)[:, None]
+    step[~same_hole] = 0
+    travelled = np.vstack([np.zeros((1, 3)), np.cumsum(step, axis=0)])
+    new_hole = np.r_[True, ~same_hole]
+    hole_start = np.flatnonzero(new_hole)[np.cumsum(new_hole) - 1]
+    station_position = collars[station_hole] + travelled - travelled[hole_start]
+
+    # Find the station at or above each depth: fold holes onto one axis
+    span = float(max(station_depth.max(initial=0), depth.max(initial=0))) + 1
+    station_key = station_hole * span + station_depth
+    above = np.searchsorted(station_key, hole * span + depth, side='right') - 1
+    below = np.minimum(above + 1, len(station_key) - 1)
+    has_next = (below != above) & (station_hole[below] == hole)
+
+    start = directions[above]
+    end = np.where(has_next[:, None], directions[below], start)
+    interval = np.where(has_next, station_depth[below] - station_depth[above], 1.0)
+    offset = depth - station_depth[above]
+    fraction = np.where(has_next, offset / interval, 0.0)
+    arc = np.arccos(np.clip(np.einsum('ij,ij->i', start, end), -1, 1))
+
+    # Partial minimum curvature step from the station to the depth
+    partial_end = _slerp(start, end, arc, fraction)
+    partial_arc = arc * fraction
+    partial = offset[:, None] / 2 * (start + partial_end) * _ratio_factor(partial_arc)[:, None]
+    return station_position[above] + partial
+
+
+def _collar_stations(holes) -> Dict[str, np.ndarray]:
+    """One survey station per hole at the collar, from DrillHole azimuth/dip"""
+    count = len(holes)
+    return {
+        'station_hole': np.arange(count),
+        'station_depth': np.zeros(count),
+        'station_azimuth': np.array([hole['azimuth'] for hole in holes], dtype=np.float64),
+        'station_dip': np.array([hole['dip'] for hole in holes], dtype=np.float64),
+    }
+
+
+def desurvey_samples(arrays: SampleArrays, holes) -> Dict[str, np.ndarray]:
+    """Midpoint XYZ of every sample in ``arrays``, in the property's UTM zone
+
+    ``holes`` are DrillHole value dicts in the order of ``arrays.hole_pk``.
+    """
+    latitude = np.array([float(hole['latitude']) for hole in holes], dtype=np.float64)
+    longitude = np.array([float(hole['longitude']) for hole in holes], dtype=np.float64)
+    elevation = np.array([hole['elevation'] for hole in holes], dtype=np.float64)
+
+    if len(holes):
+        zone, south = utm_zone(float(latitude.mean()), float(longitude.mean()))
+    else:
+        zone, south = 1, False
+    easting, northing = project_utm(latitude, longitude, zone, south)
+    collars = np.column_stack([easting, northing, elevation])
+
+    stations = _collar_stations(holes)
+    midpoint = (arrays.from_depth + arrays.to_depth) / 2
+    xyz = desurvey(collars, **stations, hole=arrays.hole, depth=midpoint)
+
+    return {
+        'x': xyz[:, 0], 'y': xyz[:, 1], 'z': xyz[:, 2],
+        'collar_x': collars[:, 0], 'collar_y': collars[:, 1], 'collar_z': collars[:, 2],
+        **stations,
+        'hole_pk': arrays.hole_pk,
+        'epsg': np.array(utm_epsg(zone, south)),
+    }
+
+
+def desurvey_depths(coordinates: Dict[str, np.ndarray], hole: np.ndarray, depth: np.ndarray) -> np.ndarray:
+    """Position arbitrary depths (e.g. composite midpoints) with a property's stored surveys"""
+    collars = np.column_stack([coordinates['collar_x'], coordinates['collar_y'], coordinates['collar_z']])
+    return desurvey(
+        collars, coordinates['station_hole'], coordinates['station_depth'],
+        coordinates['station_azimuth'], coordinates['station_dip'], hole, depth,
+    )
+
+
+_coordinates = LRUCache(COORDINATE_CACHE_SIZE)
+_store = ArrayStore()
+
+
+def get_sample_coordinates(geo_property: Property) -> Dict[str, np.ndarray]:
+    """Desurveyed sample midpoints, aligned with load_property_samples()
+
+    Cached in memory and in the array store per data version, which changes
+    whenever a hole or sample of the property is saved or deleted.
+    """
+    def build():
+        arrays = load_property_samples(geo_property)
+        by_pk = {hole['id']: hole for hole in DrillHole.objects.filter(pk__in=arrays.hole_pk.tolist()).values(
+            'id', 'latitude', 'longitude', 'elevation', 'azimuth', 'dip'
+        )}
+        return desurvey_samples(arrays, [by_pk[pk] for pk in arrays.hole_pk.tolist()])
+
+    key = (geo_property.pk, geo_property.data_version)
+    return _coordinates.get_or_create(key, lambda: _store.get_or_build('coordinates', *key, build))
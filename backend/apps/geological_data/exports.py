@@ -0,0 +1,188 @@
+# backend/apps/geological_data/exports.py
+import csv
+import tempfile
+import zipfile
+from itertools import islice
+from typing import Dict, List, Union
+
+import numpy as np
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import FileResponse, StreamingHttpResponse
+
+from .models import DrillSample
+from .renderers import CSVRenderer, NDJSONRenderer, NPZRenderer
+
+GRADE_FIELDS = ['gold_grade', 'silver_grade', 'copper_grade']
+ROCK_TYPE_CODES = [code for code, _ in DrillSample.ROCK_TYPES]
+
+# Rows fetched per round trip from the database cursor
+EXPORT_CHUNK_SIZE = 20000
+
+# .npz exports are assembled in memory up to this size, then on disk
+NPZ_SPOOL_BYTES = 16 * 1024 * 1024
+
+SAMPLE_COLUMN_DTYPES = [
+    ('hole', np.int32), ('from_depth', np.float64), ('to_depth', np.float64),
+    ('gold_grade', np.float64), ('silver_grade', np.float64), ('copper_grade', np.float64),
+    ('rock_type', np.int8),
+]
+
+# A column held whole, or as the chunks it was read in
+Column = Union[np.ndarray, List[np.ndarray]]
+
+
+def sample_columns(queryset, chunk_size: int = EXPORT_CHUNK_SIZE) -> Dict[str, np.ndarray]:
+    """Build typed column arrays for drill samples straight from a values_list cursor
+
+    Grades are float64 with NaN for missing assays. ``hole`` and ``rock_type`` are
+    dictionary encoded: each holds integer codes into ``hole_dictionary`` /
+    ``rock_type_dictionary``, and ``hole_pk`` gives the DrillHole id for every
+    ``hole_dictionary`` entry.
+    """
+    return {name: np.concatenate(column) if isinstance(column, list) else column
+            for name, column in sample_column_chunks(queryset, chunk_size).items()}
+
+
+def sample_column_chunks(queryset, chunk_size: int = EXPORT_CHUNK_SIZE) -> Dict[str, Column]:
+    """sample_columns with each per-sample column left as the list of chunks it was read in"""
+    rows = queryset.order_by('drill_hole_id', 'from_depth').values_list(
+        'drill_hole_id', 'drill_hole__hole_id', 'from_depth', 'to_depth',
+        *GRADE_FIELDS, 'rock_type'
+    ).iterator(chunk_size=chunk_size)
+
+    hole_codes, hole_pks, hole_names = {}, [], []
+    rock_codes = {code: index for index, code in enumerate(ROCK_TYPE_CODES)}
+    rock_names = list(ROCK_TYPE_CODES)
+    chunks = []
+
+    while True:
+        block = list(islice(rows, chunk_size))
+        if not block:
+            break
+        columns = list(zip(*block))
+
+        for pk, name in zip(columns[0], columns[1]):
+            if pk not in hole_codes:
+                hole_codes[pk] = len(hole_pks)
+                hole_pks.append(pk)
+                hole_names.append(name)
+        for code in set(columns[7]) - rock_codes.keys():
+            rock_codes[code] = len(rock_names)
+            rock_names.append(code)
+
+        chunks.append({
+            'hole': np.fromiter((hole_codes[pk] for pk in columns[0]), dtype=np.int32, count=len(block)),
+            'from_depth': np.array(columns[2], dtype=np.float64),
+            'to_depth': np.array(columns[3], dtype=np.float64),
+            # None becomes NaN when cast to float
+            'gold_grade': np.array(columns[4], dtype=np.float64),
+            'silver_grade': np.array(columns[5], dtype=np.float64),
+            'copper_grade': np.array(columns[6], dtype=np.float64),
+            'rock_type': np.fromiter((rock_codes[code] for code in columns[7]), dtype=np.int8, count=len(block)),
+        })
+
+    data = {}
+    for name, dtype in SAMPLE_COLUMN_DTYPES:
+        data[name] = [chunk[name] for chunk in chunks] or [np.empty(0, dtype=dtype)]
+
+    data['hole_dictionary'] = np.array(hole_names, dtype=str)
+    data['hole_pk'] = np.array(hole_pks, dtype=np.int64)
+    data['rock_type_dictionary'] = np.array(rock_names, dtype=str)
+    return data
+
+
+def write_npz(out, columns: Dict[str, Column]):
+    """Write columns as an uncompressed .npz archive, one column at a time
+
+    A column given as chunks is written chunk after chunk, so it is never
+    joined into one array first. ``np.load`` reads the result as usual.
+    """
+    with zipfile.ZipFile(out, 'w', zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for name, column in columns.items():
+            chunks = column if isinstance(column, list) else [np.asarray(column)]
+            with archive.open(f'{name}.npy', 'w', force_zip64=True) as entry:
+                if len(chunks) == 1:
+                    np.lib.format.write_array(entry, chunks[0], allow_pickle=False)
+                    continue
+                header = np.lib.format.header_data_from_array_1_0(chunks[0])
+                header['shape'] = (sum(len(chunk) for chunk in chunks),) + chunks[0].shape[1:]
+                np.lib.format.write_array_header_1_0(entry, header)
+                for chunk in chunks:
+                    entry.write(np.ascontiguousarray(chunk).tobytes())
+
+
+def npz_response(columns: Dict[str, Column], filename: str) -> FileResponse:
+    """Send columns as an .npz attachment, spooled to disk once it outgrows NPZ_SPOOL_BYTES"""
+    spool = tempfile.SpooledTemporaryFile(max_size=NPZ_SPOOL_BYTES)
+    write_npz(spool, columns)
+    spool.seek(0)
+    return FileResponse(spool, as_attachment=True, filename=filename, content_type=NPZRenderer.media_type)
+
+
+class _Echo:
+    """File-like object that hands written CSV lines straight back"""
+
+    def write(self, value):
+        return value
+
+
+def stream_rows(queryset, fields, export_format: str, chunk_size: int = EXPORT_CHUNK_SIZE):
+    """Yield NDJSON or CSV text for a queryset, chunk by chunk from a server-side cursor
+
+    ``fields`` is a list of ``(output name, ORM lookup)`` pairs.
+    """
+    names = [name for name, _ in fields]
+    rows = queryset.prefetch_related(None).values_list(
+        *[lookup for _, lookup in fields]
+    ).iterator(chunk_size=chunk_size)
+
+    if export_format == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(names)
+        while True:
+            block = list(islice(rows, chunk_size))
+            if not block:
+                break
+            yield ''.join(writer.writerow(row) for row in block)
+    else:
+        encoder = DjangoJSONEncoder()
+        while True:
+            block = list(islice(rows, chunk_size))
+            if not block:
+                break
+            yield ''.join(encoder.encode(dict(zip(names, row))) + '\n' for row in block)
+
+
+class StreamingExportMixin:
+    """Let a viewset's list action stream its filtered queryset as NDJSON or CSV
+
+    Selected with ``?format=ndjson`` / ``?format=csv``, a ``.ndjson`` / ``.csv``
+    suffix or the Accept header. Pagination is skipped; memory stays flat because
+    rows are read from the database in chunks and written out as they arrive.
+    """
+    export_fields = []
+    export_filename = 'export'
+
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if getattr(self, 'action', None) == 'list':
+            renderers += [NDJSONRenderer(), CSVRenderer()]
+        return renderers
+
+    def is_streaming_export(self) -> bool:
+        renderer = getattr(self.request, 'accepted_renderer', None)
+        return renderer is not None and renderer.format in ('ndjson', 'csv')
+
+    def list(self, request, *args, **kwargs):
+        if not self.is_streaming_export():
+            return super().list(request, *args, **kwargs)
+
+        renderer = request.accepted_renderer
+
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(
+            stream_rows(queryset, self.export_fields, renderer.format),
+            content_type=f'{renderer.media_type}; charset=utf-8',
+        )
+        response['Content-Disposition'] = f'attachment; filename="{self.export_filename}.{renderer.format}"'
+        return response
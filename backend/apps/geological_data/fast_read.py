@@ -0,0 +1,167 @@
+# backend/apps/geological_data/fast_read.py
+from typing import Dict, List
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.response import Response
+
+from .models import DrillHole, DrillSample
+
+# Model properties that can run on a .values() row, with the columns they read
+PROPERTY_COLUMNS = {
+    (DrillSample, 'interval_length'): ('from_depth', 'to_depth'),
+    (DrillSample, 'midpoint_depth'): ('from_depth', 'to_depth'),
+    (DrillHole, 'sample_count'): ('annotated_sample_count',),
+    (DrillHole, 'average_gold_grade'): ('annotated_average_gold_grade',),
+}
+
+
+class Unsupported(Exception):
+    """A serializer field whose output cannot be reproduced from a values() row"""
+
+
+class _RowAttributes:
+    """Attribute access over a values() row, so model properties can run on it"""
+    __slots__ = ('row',)
+
+    def __init__(self, row):
+        self.row = row
+
+    def __getattr__(self, name):
+        try:
+            return self.row[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+def _column_reader(column, to_representation=None):
+    if to_representation is None:
+        return lambda row: row[column]
+
+    def read(row):
+        value = row[column]
+        return None if value is None else to_representation(value)
+    return read
+
+
+def _property_reader(prop, to_representation):
+    def read(row):
+        value = prop.fget(_RowAttributes(row))
+        return None if value is None else to_representation(value)
+    return read
+
+
+def _lookup(model, source: str) -> str:
+    """The values() lookup for a dotted serializer source, if it names concrete fields"""
+    parts = source.split('.')
+    for index, part in enumerate(parts):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            raise Unsupported(source)
+        if not field.concrete or (field.is_relation and index == len(parts) - 1):
+            raise Unsupported(source)
+        if field.is_relation:
+            model = field.related_model
+    return '__'.join(parts)
+
+
+class RowMapper:
+    """Serializer output built from .values() rows, with the field tree compiled once
+
+    Every readable field of the (already ?fields= / ?expand= trimmed)
+    serializer becomes a reader over a row that calls the field's own
+    ``to_representation``, so values come out exactly as the serializer
+    would render them. Primary key relations read the raw id, properties
+    listed in PROPERTY_COLUMNS run on the row, and nested ``many=True``
+    serializers over reverse foreign keys are filled from one extra query
+    per page. Anything else raises Unsupported.
+    """
+
+    def __init__(self, serializer):
+        self.model = serializer.Meta.model
+        self.columns = [self.model._meta.pk.attname]
+        self.readers = []
+        self.nested = []
+
+        for field in serializer._readable_fields:
+            source = field.source
+            if isinstance(field, serializers.ListSerializer):
+                relation = self.model._meta.get_field(source) if source != '*' else None
+                if relation is None or not relation.one_to_many or relation.concrete:
+                    raise Unsupported(source)
+                self.nested.append((field.field_name, relation.field.name, RowMapper(field.child)))
+                self.readers.append((field.field_name, None))
+            elif isinstance(field, (serializers.BaseSerializer, serializers.SerializerMethodField)):
+                raise Unsupported(field.field_name)
+            elif isinstance(field, PrimaryKeyRelatedField):
+                try:
+                    relation = self.model._meta.get_field(source)
+                except FieldDoesNotExist:
+                    raise Unsupported(source)
+                if field.pk_field is not None or not relation.concrete or not relation.many_to_one:
+                    raise Unsupported(source)
+                column = relation.attname
+                self._add_column(column)
+                self.readers.append((field.field_name, _column_reader(column)))
+            elif (self.model, source) in PROPERTY_COLUMNS:
+                for column in PROPERTY_COLUMNS[(self.model, source)]:
+                    self._add_column(column)
+                prop = getattr(self.model, source)
+                self.readers.append((field.field_name, _property_reader(prop, field.to_representation)))
+            else:
+                column = _lookup(self.model, source)
+                self._add_column(column)
+                self.readers.append((field.field_name, _column_reader(column, field.to_representation)))
+
+    def _add_column(self, column: str):
+        if column not in self.columns:
+            self.columns.append(column)
+
+    def map_rows(self, rows) -> List[Dict]:
+        rows = list(rows)
+        results = [
+            {name: read(row) if read is not None else [] for name, read in self.readers}
+            for row in rows
+        ]
+        pk = self.model._meta.pk.attname
+        for name, foreign_key, child in self.nested:
+            by_parent = {row[pk]: result[name] for row, result in zip(rows, results)}
+            child_rows = (
+                child.model._default_manager
+                .filter(**{f'{foreign_key}__in': list(by_parent)})
+                .values(foreign_key, *child.columns)
+            )
+            child_rows = list(child_rows)
+            for child_row, child_result in zip(child_rows, child.map_rows(child_rows)):
+                by_parent[child_row[foreign_key]].append(child_result)
+        return results
+
+
+class FastListMixin:
+    """Serve GET list pages from .values() rows instead of model instances
+
+    The serializer is only built once per request, to compile a RowMapper.
+    Serializers with fields the mapper cannot reproduce, and streaming
+    exports, use the regular list. ``fast_list = False`` turns it off.
+    """
+    fast_list = True
+
+    def list(self, request, *args, **kwargs):
+        if not self.fast_list or getattr(self, 'is_streaming_export', lambda: False)():
+            return super().list(request, *args, **kwargs)
+        try:
+            mapper = RowMapper(self.get_serializer())
+        except Unsupported:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        # Keyset pagination reads its cursor keys from the rows
+        ordering = [field for field in getattr(self.paginator, 'ordering', ()) if field not in mapper.columns]
+        rows = queryset.values(*mapper.columns, *ordering)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(mapper.map_rows(page))
+        return Response(mapper.map_rows(rows))
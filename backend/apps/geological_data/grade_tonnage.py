@@ -0,0 +1,166 @@
+# backend/apps/geological_data/grade_tonnage.py
+import threading
+from typing import Callable, Dict, Iterable, Optional
+
+import numpy as np
+
+from .models import Property
+from .sample_arrays import GRADE_COLUMNS, LRUCache, load_property_samples
+
+# Block model curves kept in memory per process
+BLOCK_MODEL_CURVE_CACHE_SIZE = 16
+
+
+class GradeTonnageCurve:
+    """Grades sorted ascending with suffix sums of weight and metal
+
+    ``weights`` are metres for samples or tonnes for blocks. The totals above
+    any cutoff are a binary search plus two lookups, so a whole curve of
+    cutoffs costs O(k log n).
+    """
+
+    def __init__(self, grades: np.ndarray, weights: np.ndarray):
+        order = np.argsort(grades, kind='stable')
+        self.grades = np.asarray(grades, dtype=np.float64)[order]
+        self.weights = np.asarray(weights, dtype=np.float64)[order]
+        self._accumulate()
+
+    def _accumulate(self):
+        # weight_above[i] / metal_above[i] total everything from position i upwards
+        self.weight_above = np.r_[np.cumsum(self.weights[::-1])[::-1], 0.0]
+        self.metal_above = np.r_[np.cumsum((self.grades * self.weights)[::-1])[::-1], 0.0]
+
+    def __len__(self):
+        return len(self.grades)
+
+    def merge(self, grades: np.ndarray, weights: np.ndarray) -> 'GradeTonnageCurve':
+        """Return a curve with extra values inserted at their sorted positions"""
+        grades = np.asarray(grades, dtype=np.float64)
+        weights = np.asarray(weights, dtype=np.float64)
+        order = np.argsort(grades, kind='stable')
+        grades, weights = grades[order], weights[order]
+        positions = np.searchsorted(self.grades, grades, side='right')
+
+        merged = GradeTonnageCurve.__new__(GradeTonnageCurve)
+        merged.grades = np.insert(self.grades, positions, grades)
+        merged.weights = np.insert(self.weights, positions, weights)
+        merged._accumulate()
+        return merged
+
+    def above(self, cutoffs) -> Dict[str, np.ndarray]:
+        """Weight, metal and mean grade at or above each cutoff"""
+        cutoffs = np.atleast_1d(np.asarray(cutoffs, dtype=np.float64))
+        index = np.searchsorted(self.grades, cutoffs, side='left')
+        weight = self.weight_above[index]
+        metal = self.metal_above[index]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_grade = np.where(weight > 0, metal / weight, np.nan)
+        return {'cutoff': cutoffs, 'weight': weight, 'metal': metal, 'mean_grade': mean_grade}
+
+    def default_cutoffs(self, steps: int = 100) -> np.ndarray:
+        """Evenly spaced cutoffs from zero to the top grade"""
+        top = float(self.grades[-1]) if len(self.grades) else 0.0
+        return np.linspace(0.0, top, steps)
+
+
+class _SampleCurveStore:
+    """Per-property sample curves, tagged with the data version they reflect"""
+
+    def __init__(self):
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def get(self, geo_property: Property) -> Dict[str, GradeTonnageCurve]:
+        with self.lock:
+            entry = self.entries.get(geo_property.pk)
+            if entry is not None and entry['version'] == geo_property.data_version:
+                return entry['curves']
+
+        arrays = load_property_samples(geo_property)
+        curves = {}
+        for name in GRADE_COLUMNS:
+            grades = arrays.grades[name]
+            assayed = ~np.isnan(grades)
+            curves[name] = GradeTonnageCurve(grades[assayed], arrays.length[assayed])
+        with self.lock:
+            self.entries[geo_property.pk] = {'version': geo_property.data_version, 'curves': curves}
+        return curves
+
+    def add_samples(self, property_id: int, version_before: int, version_after: int, samples: Iterable):
+        """Fold newly created samples into a cached curve
+
+        Only applies when the cached curve reflects ``version_before``, i.e.
+        nothing else changed in between; otherwise the entry is dropped and
+        rebuilt on the next read.
+        """
+        samples = list(samples)
+        with self.lock:
+            entry = self.entries.get(property_id)
+            if entry is None:
+                return
+            if entry['version'] != version_before:
+                del self.entries[property_id]
+                return
+            length = np.array([sample.to_depth - sample.from_depth for sample in samples], dtype=np.float64)
+            curves = {}
+            for name, curve in entry['curves'].items():
+                grades = np.array([getattr(sample, name) for sample in samples], dtype=np.float64)
+                assayed = ~np.isnan(grades)
+                curves[name] = curve.merge(grades[assayed], length[assayed]) if assayed.any() else curve
+            self.entries[property_id] = {'version': version_after, 'curves': curves}
+
+    def is_cached(self, property_id: int) -> bool:
+        return property_id in self.entries
+
+    def discard(self, property_id: int):
+        with self.lock:
+            self.entries.pop(property_id, None)
+
+
+sample_curves = _SampleCurveStore()
+_block_model_curves = LRUCache(BLOCK_MODEL_CURVE_CACHE_SIZE)
+
+
+def apply_new_samples(samples_by_property: Dict[int, list], bump: Callable[[], None]):
+    """Run ``bump`` and fold the samples it accounts for into cached curves
+
+    Versions are read either side of the bump, so a curve is only merged when
+    the bump moved its property on by exactly one; anything else committed in
+    between drops the curve and the next read rebuilds it.
+    """
+    cached = [pk for pk in samples_by_property if sample_curves.is_cached(pk)]
+    if not cached:
+        bump()
+        return
+    versions = Property.objects.filter(pk__in=cached).values_list('pk', 'data_version')
+    before = dict(versions)
+    bump()
+    after = dict(versions.all())
+    for pk in cached:
+        if pk in before and after.get(pk) == before[pk] + 1:
+            sample_curves.add_samples(pk, before[pk], after[pk], samples_by_property[pk])
+        else:
+            sample_curves.discard(pk)
+
+
+def get_sample_curve(geo_property: Property, grade_column: str) -> GradeTonnageCurve:
+    """Length-weighted curve over the property's assayed samples (weights in metres)"""
+    return sample_curves.get(geo_property)[grade_column]
+
+
+def get_block_model_curve(geo_property: Property, identifier: str, density: float) -> Optional[GradeTonnageCurve]:
+    """Tonnage-weighted curve over an estimated block model (weights in tonnes)"""
+    from .block_model import load_metadata, open_model
+
+    def build():
+        metadata = load_metadata(geo_property, identifier)
+        grid = open_model(geo_property, identifier)
+        if metadata is None or grid is None:
+            return None
+        grades = np.asarray(grid, dtype=np.float64).reshape(-1)
+        grades = grades[~np.isnan(grades)]
+        block_tonnes = float(np.prod(metadata['block_size'])) * density
+        return GradeTonnageCurve(grades, np.full(len(grades), block_tonnes))
+
+    key = (geo_property.pk, geo_property.data_version, identifier, float(density))
+    return _block_model_curves.get_or_create(key, build)
@@ -0,0 +1,280 @@
+# backend/apps/geological_data/importers.py
+import csv
+import io
+import json
+import logging
+import math
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+from django.db import IntegrityError, transaction
+from mining_ai_project.cache import invalidate
+
+from .grade_tonnage import apply_new_samples
+from .interval_index import get_hole_intervals, invalidate_holes
+from .models import DrillHole, DrillSample
+
+logger = logging.getLogger(__name__)
+
+GRADE_FIELDS = ['gold_grade', 'silver_grade', 'copper_grade']
+ROCK_TYPE_CODES = {code for code, _ in DrillSample.ROCK_TYPES}
+ALTERATION_MAX_LENGTH = DrillSample._meta.get_field('alteration').max_length
+
+# Rows written per savepoint; a failing chunk is reported without rolling back the others
+DEFAULT_CHUNK_SIZE = 5000
+DEFAULT_BATCH_SIZE = 1000
+
+
+def read_rows(stream, file_format: str) -> Iterator[Dict]:
+    """Yield raw row dicts from a CSV or NDJSON text stream"""
+    if file_format == 'csv':
+        yield from csv.DictReader(stream)
+    elif file_format == 'ndjson':
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            # Keep malformed lines so they are reported against their row number
+            yield row if isinstance(row, dict) else {'__invalid__': line}
+    else:
+        raise ValueError(f"Unsupported import format: {file_format}")
+
+
+def guess_format(filename: str, default: str = 'csv') -> str:
+    """Guess the import format from a file name"""
+    name = (filename or '').lower()
+    if name.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    if name.endswith('.csv'):
+        return 'csv'
+    return default
+
+
+def open_text(upload) -> io.TextIOBase:
+    """Wrap an uploaded (binary) file so it can be read as UTF-8 text"""
+    return io.TextIOWrapper(upload, encoding='utf-8-sig', newline='')
+
+
+def _to_float(value) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.strip()
+        if not value:
+            return None
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError("Value must be finite")
+    return value
+
+
+class DrillSampleImporter:
+    """Validate and bulk insert assay intervals for the drill holes of one property"""
+
+    def __init__(self, geo_property, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 batch_size: int = DEFAULT_BATCH_SIZE):
+        self.geo_property = geo_property
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+
+        # A hole named "12" and the hole with pk 12 are different holes, so
+        # the hole_id column is resolved by name and drill_hole by pk only
+        holes = DrillHole.objects.filter(geo_property=geo_property).values_list('id', 'hole_id')
+        self.holes_by_name = {}
+        self.holes_by_pk = {}
+        for pk, hole_id in holes:
+            self.holes_by_name[hole_id] = pk
+            self.holes_by_pk[str(pk)] = pk
+
+    def run(self, rows: Iterable[Dict]) -> Dict:
+        """Import rows and return a summary with row-level errors"""
+        errors = {}
+        row_numbers, samples = [], []
+        total_rows = 0
+
+        # Per-row field validation (row 1 is the first data row)
+        for row_number, row in enumerate(rows, start=1):
+            total_rows = row_number
+            sample, row_errors = self._build_sample(row)
+            if row_errors:
+                errors[row_number] = row_errors
+            else:
+                row_numbers.append(row_number)
+                samples.append(sample)
+
+        with transaction.atomic():
+            # Imports into the same holes take turns (locked in pk order), so
+            # the intervals read below stay current until the samples are written
+            touched = {sample.drill_hole_id for sample in samples}
+            list(DrillHole.objects.select_for_update().filter(pk__in=touched).order_by('pk')
+                 .values_list('pk', flat=True))
+
+            # Interval validation against each hole's existing and incoming intervals
+            rejected = self._find_overlaps(samples)
+            accepted = []
+            for index, sample in enumerate(samples):
+                if rejected[index]:
+                    errors[row_numbers[index]] = ["Sample intervals cannot overlap"]
+                else:
+                    accepted.append((row_numbers[index], sample))
+
+            written = self._write(accepted, errors)
+        created = len(written)
+        if written:
+            # bulk_create sends no signals, so bump the version stamp here
+            apply_new_samples({self.geo_property.pk: written},
+                              lambda: type(self.geo_property).bump_data_version([self.geo_property.pk]))
+            written_holes = {sample.drill_hole_id for sample in written}
+            transaction.on_commit(lambda: invalidate_holes(written_holes))
+            invalidate('geological')
+
+        logger.info(
+            f"Imported {created} samples into {self.geo_property} "
+            f"({len(errors)} rows rejected)"
+        )
+        return {
+            'total_rows': total_rows,
+            'created': created,
+            'rejected': len(errors),
+            'errors': [
+                {'row': row_number, 'errors': errors[row_number]}
+                for row_number in sorted(errors)
+            ],
+        }
+
+    def _build_sample(self, row: Dict):
+        """Convert a raw row to an unsaved DrillSample, collecting field errors"""
+        if '__invalid__' in row:
+            return None, ["Row is not a valid JSON object"]
+
+        row_errors = []
+        if row.get('hole_id') not in (None, ''):
+            hole_key, holes = row['hole_id'], self.holes_by_name
+        else:
+            hole_key, holes = row.get('drill_hole'), self.holes_by_pk
+        hole_pk = holes.get(str(hole_key).strip()) if hole_key not in (None, '') else None
+        if hole_pk is None:
+            row_errors.append(f"Unknown drill hole for this property: {hole_key!r}")
+
+        values = {}
+        for field in ['from_depth', 'to_depth'] + GRADE_FIELDS:
+            try:
+                values[field] = _to_float(row.get(field))
+            except (TypeError, ValueError):
+                row_errors.append(f"{field} must be a number")
+                values[field] = None
+
+        from_depth, to_depth = values['from_depth'], values['to_depth']
+        if from_depth is None or to_depth is None:
+            if not row_errors:
+                row_errors.append("from_depth and to_depth are required")
+        else:
+            if from_depth < 0:
+                row_errors.append("From depth cannot be negative")
+            if to_depth <= from_depth:
+                row_errors.append("To depth must be greater than from depth")
+
+        for field in GRADE_FIELDS:
+            if values[field] is not None and values[field] < 0:
+                row_errors.append(f"{field} cannot be negative")
+        if values['copper_grade'] is not None and values['copper_grade'] > 100:
+            row_errors.append("copper_grade cannot exceed 100%")
+
+        rock_type = str(row.get('rock_type') or 'other').strip().lower()
+        if rock_type not in ROCK_TYPE_CODES:
+            row_errors.append(f"Unknown rock type: {rock_type!r}")
+
+        alteration = str(row.get('alteration') or '').strip()
+        if len(alteration) > ALTERATION_MAX_LENGTH:
+            row_errors.append(f"alteration is longer than {ALTERATION_MAX_LENGTH} characters")
+
+        if row_errors:
+            return None, row_errors
+
+        return DrillSample(
+            drill_hole_id=hole_pk,
+            rock_type=rock_type,
+            alteration=alteration,
+            mineralization=str(row.get('mineralization') or '').strip(),
+            **values
+        ), []
+
+    def _find_overlaps(self, samples: List[DrillSample]) -> np.ndarray:
+        """Return a mask of incoming samples that overlap another interval in their hole"""
+        rejected = np.zeros(len(samples), dtype=bool)
+        if not samples:
+            return rejected
+
+        holes = np.fromiter((s.drill_hole_id for s in samples), dtype=np.int64, count=len(samples))
+        starts = np.fromiter((s.from_depth for s in samples), dtype=np.float64, count=len(samples))
+        ends = np.fromiter((s.to_depth for s in samples), dtype=np.float64, count=len(samples))
+
+        # Read from the database: a cached index can lag behind other workers' writes
+        indexes = get_hole_intervals(np.unique(holes).tolist(), cached=False)
+        hole_order = sorted(indexes)
+        existing = np.column_stack([
+            np.repeat(np.array(hole_order, dtype=np.float64), [len(indexes[pk]) for pk in hole_order]),
+            np.concatenate([indexes[pk].from_depth for pk in hole_order]),
+            np.concatenate([indexes[pk].to_depth for pk in hole_order]),
+        ])
+
+        # Holes are folded into one depth axis by offsetting each hole by a
+        # fixed span, so a single sorted sweep covers every hole at once
+        hole_keys = np.union1d(holes, existing[:, 0].astype(np.int64))
+        span = max(ends.max(), existing[:, 2].max() if len(existing) else 0.0) + 1.0
+        offset = np.searchsorted(hole_keys, holes) * span
+        starts, ends = starts + offset, ends + offset
+
+        # Incoming vs stored intervals (stored intervals are already disjoint)
+        if len(existing):
+            existing_offset = np.searchsorted(hole_keys, existing[:, 0].astype(np.int64)) * span
+            existing_starts = existing[:, 1] + existing_offset
+            existing_ends = existing[:, 2] + existing_offset
+            first_after = np.searchsorted(existing_ends, starts, side='right')
+            candidate = np.minimum(first_after, len(existing) - 1)
+            rejected |= (first_after < len(existing)) & (existing_starts[candidate] < ends)
+
+        # Incoming vs incoming, sorted by hole then depth
+        remaining = np.flatnonzero(~rejected)
+        order = remaining[np.lexsort((ends[remaining], starts[remaining]))]
+        sorted_starts, sorted_ends = starts[order], ends[order]
+        reach = np.maximum.accumulate(sorted_ends)
+        clash = np.zeros(len(order), dtype=bool)
+        clash[1:] = sorted_starts[1:] < reach[:-1]
+        if not clash.any():
+            return rejected
+
+        # Only holes with a clash need the exact first-come walk
+        clash_holes = set(holes[order[clash]].tolist())
+        last_end = {}
+        for index in order:
+            hole = holes[index]
+            if hole not in clash_holes:
+                continue
+            if starts[index] < last_end.get(hole, -np.inf):
+                rejected[index] = True
+            else:
+                last_end[hole] = ends[index]
+        return rejected
+
+    def _write(self, accepted, errors: Dict) -> List[DrillSample]:
+        """Insert accepted samples in chunked savepoints, returning those written"""
+        written = []
+        for start in range(0, len(accepted), self.chunk_size):
+            chunk = accepted[start:start + self.chunk_size]
+            try:
+                with transaction.atomic():
+                    DrillSample.objects.bulk_create(
+                        [sample for _, sample in chunk], batch_size=self.batch_size
+                    )
+            except IntegrityError as e:
+                logger.error(f"Sample import chunk failed: {e}")
+                for row_number, _ in chunk:
+                    errors[row_number] = [f"Database rejected this chunk: {e}"]
+                continue
+            written.extend(sample for _, sample in chunk)
+        return written
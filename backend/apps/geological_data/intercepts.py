@@ -0,0 +1,145 @@
+# backend/apps/geological_data/intercepts.py
+from typing import Dict, Optional
+
+import numpy as np
+
+from .sample_arrays import GRADE_COLUMNS, SampleArrays, column_records
+
+# Grade column -> (unit, element symbol) used in intercept summaries
+GRADE_UNITS = {
+    'gold_grade': ('g/t', 'Au'),
+    'silver_grade': ('g/t', 'Ag'),
+    'copper_grade': ('%', 'Cu'),
+}
+
+# Sampling gaps narrower than this (in metres) are treated as contiguous
+_TOLERANCE = 1e-6
+
+
+def _sample_runs(arrays: SampleArrays, grade: np.ndarray, cutoff: float,
+                 min_width: float, max_dilution: float):
+    """Return (first, last) sample indices of every intercept, inclusive
+
+    Consecutive samples at or above ``cutoff`` form a run. Runs in the same
+    hole are joined when the below-cutoff material between them is at most
+    ``max_dilution`` metres; an unsampled gap always ends an intercept.
+    """
+    from_depth, to_depth, hole = arrays.from_depth, arrays.to_depth, arrays.hole
+
+    # Segments are stretches of contiguous sampling inside one hole
+    new_segment = np.ones(len(from_depth), dtype=bool)
+    new_segment[1:] = (hole[1:] != hole[:-1]) | (from_depth[1:] > to_depth[:-1] + _TOLERANCE)
+    segment = np.cumsum(new_segment)
+
+    with np.errstate(invalid='ignore'):
+        above = grade >= cutoff
+    previous_above = np.r_[False, above[:-1]] & ~new_segment
+    next_above = np.r_[above[1:], False] & ~np.r_[new_segment[1:], True]
+    run_first = np.flatnonzero(above & ~previous_above)
+    run_last = np.flatnonzero(above & ~next_above)
+
+    # Join neighbouring runs across short internal dilution
+    joined = ((segment[run_first[1:]] == segment[run_last[:-1]])
+              & (from_depth[run_first[1:]] - to_depth[run_last[:-1]] <= max_dilution + _TOLERANCE))
+    group_first = np.flatnonzero(np.r_[len(run_first) > 0, ~joined])
+    group_last = np.r_[group_first[1:] - 1, len(run_first) - 1] if len(group_first) else group_first
+    first, last = run_first[group_first], run_last[group_last]
+
+    wide = to_depth[last] - from_depth[first] >= min_width - _TOLERANCE
+    return first[wide], last[wide]
+
+
+def _interval_columns(arrays: SampleArrays, grade: np.ndarray, first: np.ndarray, last: np.ndarray):
+    """Length-weighted grade of each [first, last] sample range via prefix sums
+
+    Unassayed samples inside an intercept count as zero grade.
+    """
+    length = arrays.to_depth - arrays.from_depth
+    metal = np.where(np.isnan(grade), 0.0, grade) * length
+    cumulative_length = np.r_[0.0, np.cumsum(length)]
+    cumulative_metal = np.r_[0.0, np.cumsum(metal)]
+    sampled = cumulative_length[last + 1] - cumulative_length[first]
+    return {
+        'hole': arrays.hole[first],
+        'from_depth': arrays.from_depth[first],
+        'to_depth': arrays.to_depth[last],
+        'length': sampled,
+        'grade': (cumulative_metal[last + 1] - cumulative_metal[first]) / sampled,
+    }
+
+
+def find_intercepts(arrays: SampleArrays, grade_column: str = 'gold_grade', cutoff: float = 0.5,
+                    min_width: float = 1.0, max_dilution: float = 0.0,
+                    including_cutoff: Optional[float] = None,
+                    including_min_width: Optional[float] = None) -> Dict[str, np.ndarray]:
+    """Significant intercepts for every hole in one pass over the sorted sample arrays
+
+    With ``including_cutoff``, higher-grade sub-intervals (no internal
+    dilution, at least ``including_min_width`` metres) are returned as
+    ``including_*`` columns, where ``including_parent`` is the row of the
+    intercept that contains them.
+    """
+    if grade_column not in GRADE_COLUMNS:
+        raise ValueError(f"Unknown grade column: {grade_column}")
+    if not cutoff >= 0 or not min_width >= 0 or not max_dilution >= 0:
+        raise ValueError("cutoff, min_width and max_dilution must not be negative")
+    if including_min_width is None:
+        including_min_width = min_width
+    if including_cutoff is not None and not including_cutoff > cutoff:
+        raise ValueError("including_cutoff must be above cutoff")
+    if not including_min_width >= 0:
+        raise ValueError("including_min_width must not be negative")
+
+    grade = arrays.grades[grade_column]
+    first, last = _sample_runs(arrays, grade, cutoff, min_width, max_dilution)
+    result = _interval_columns(arrays, grade, first, last)
+
+    if including_cutoff is not None:
+        inner_first, inner_last = _sample_runs(arrays, grade, including_cutoff, including_min_width, 0.0)
+        parent = np.searchsorted(first, inner_first, side='right') - 1
+        contained = parent >= 0
+        contained[contained] = last[parent[contained]] >= inner_last[contained]
+        inner = _interval_columns(arrays, grade, inner_first[contained], inner_last[contained])
+        result.update({f'including_{name}': column for name, column in inner.items()})
+        result['including_parent'] = parent[contained]
+
+    result['hole_dictionary'] = arrays.hole_names
+    result['hole_pk'] = arrays.hole_pk
+    return result
+
+
+def describe_interval(length: float, grade: float, grade_column: str) -> str:
+    unit, element = GRADE_UNITS[grade_column]
+    return f"{length:.1f} m @ {grade:.2f} {unit} {element}"
+
+
+def intercept_records(intercepts: Dict[str, np.ndarray], grade_column: str) -> list:
+    """One dict per intercept with nested "including" intervals and a summary line"""
+    hole = intercepts['hole']
+    records = column_records([
+        ('drill_hole', intercepts['hole_pk'][hole]),
+        ('hole_id', intercepts['hole_dictionary'][hole]),
+        ('from_depth', intercepts['from_depth']),
+        ('to_depth', intercepts['to_depth']),
+        ('length', intercepts['length']),
+        ('grade', intercepts['grade']),
+    ])
+    for record in records:
+        record['including'] = []
+
+    if 'including_parent' in intercepts:
+        inner = column_records([
+            ('from_depth', intercepts['including_from_depth']),
+            ('to_depth', intercepts['including_to_depth']),
+            ('length', intercepts['including_length']),
+            ('grade', intercepts['including_grade']),
+        ])
+        for parent, record in zip(intercepts['including_parent'].tolist(), inner):
+            records[parent]['including'].append(record)
+
+    for record in records:
+        summary = describe_interval(record['length'], record['grade'], grade_column)
+        for inner_record in record['including']:
+            summary += ' including ' + describe_interval(inner_record['length'], inner_record['grade'], grade_column)
+        record['summary'] = summary
+    return records
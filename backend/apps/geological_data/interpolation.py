@@ -0,0 +1,104 @@
+# backend/apps/geological_data/interpolation.py
+"""Inverse-distance block estimation kernels
+
+Kept free of Django imports so process pool workers only load NumPy and
+SciPy, whichever start method the platform uses.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+# Distances below this (in search-ellipsoid units) count as a direct hit
+_EPSILON = 1e-9
+
+# Per-process state set up once by _init_worker
+_worker = {}
+
+# Pools are started from threaded processes (Celery's thread pool, the local
+# job pool), where a forked child can inherit locks held by other threads
+_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def ellipsoid_transform(radii, azimuth: float, dip: float) -> np.ndarray:
+    """Matrix mapping offsets into a space where the search ellipsoid is the unit sphere
+
+    The major axis points along ``azimuth``/``dip`` (dip positive downwards),
+    the semi-major axis is horizontal and perpendicular to it, and the minor
+    axis completes the right-handed set.
+    """
+    azimuth, dip = np.radians(azimuth), np.radians(dip)
+    major = np.array([np.cos(dip) * np.sin(azimuth), np.cos(dip) * np.cos(azimuth), -np.sin(dip)])
+    semi = np.array([np.cos(azimuth), -np.sin(azimuth), 0.0])
+    minor = np.cross(major, semi)
+    return np.vstack([major, semi, minor]) / np.asarray(radii, dtype=np.float64)[:, None]
+
+
+def block_centres(grid: Dict, start: int, stop: int) -> np.ndarray:
+    """Centres of flat block indices [start, stop) of a (nz, ny, nx) grid, relative to its origin"""
+    nz, ny, nx = grid['shape']
+    index = np.arange(start, stop)
+    ijk = np.column_stack([index % nx, (index // nx) % ny, index // (nx * ny)])
+    return (ijk + 0.5) * np.asarray(grid['block_size'], dtype=np.float64)
+
+
+def _init_worker(points: np.ndarray, values: np.ndarray, grid: Dict, output_path: str):
+    _worker['tree'] = cKDTree(points)
+    _worker['values'] = np.r_[values, 0.0]  # cKDTree reports missing neighbours as len(points)
+    _worker['grid'] = grid
+    _worker['output_path'] = output_path
+
+
+def _estimate_chunk(bounds) -> int:
+    """Estimate one chunk of blocks and write it straight into the output file"""
+    start, stop = bounds
+    tree, values, grid = _worker['tree'], _worker['values'], _worker['grid']
+
+    query = block_centres(grid, start, stop) @ np.asarray(grid['transform']).T
+    distance, neighbour = tree.query(
+        query, k=list(range(1, grid['max_samples'] + 1)), distance_upper_bound=1.0
+    )
+    found = np.isfinite(distance)
+    weight = np.where(found, 1.0 / np.maximum(distance, _EPSILON) ** grid['power'], 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        estimate = (weight * values[neighbour]).sum(axis=1) / weight.sum(axis=1)
+    estimate[found.sum(axis=1) < grid['min_samples']] = np.nan
+
+    output = np.load(_worker['output_path'], mmap_mode='r+')
+    output.reshape(-1)[start:stop] = estimate
+    output.flush()
+    del output
+    return int(np.isfinite(estimate).sum())
+
+
+def estimate_blocks(points: np.ndarray, values: np.ndarray, grid: Dict, output_path: str,
+                    chunk_size: int = 100000, workers: Optional[int] = None) -> int:
+    """IDW-estimate every block of ``grid`` into the float32 .npy at ``output_path``
+
+    ``points`` are sample positions relative to the grid origin. ``grid``
+    holds ``shape`` (nz, ny, nx), ``block_size``, the ellipsoid
+    ``transform``, ``power``, ``max_samples`` and ``min_samples``. Blocks
+    are processed in chunks of ``chunk_size`` so memory stays bounded, each
+    chunk written into the memory-mapped output; with more than one worker
+    the chunks are spread over a process pool. Returns the number of blocks
+    that received an estimate.
+    """
+    transformed = np.asarray(points, dtype=np.float64) @ np.asarray(grid['transform']).T
+    total = int(np.prod(grid['shape']))
+    chunks = [(start, min(start + chunk_size, total)) for start in range(0, total, chunk_size)]
+    workers = min(workers or os.cpu_count() or 1, len(chunks)) or 1
+
+    initargs = (transformed, np.asarray(values, dtype=np.float64), grid, str(output_path))
+    if workers == 1 or len(chunks) <= 1:
+        _init_worker(*initargs)
+        try:
+            return sum(_estimate_chunk(chunk) for chunk in chunks)
+        finally:
+            _worker.clear()
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(_START_METHOD),
+                             initializer=_init_worker, initargs=initargs) as pool:
+        return sum(pool.map(_estimate_chunk, chunks))
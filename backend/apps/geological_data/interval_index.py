@@ -0,0 +1,119 @@
+# backend/apps/geological_data/interval_index.py
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.core.cache import cache
+
+from .models import DrillSample
+
+INTERVAL_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+class HoleIntervals:
+    """Sample intervals of one drill hole, sorted by from_depth
+
+    ``reach`` is the running maximum of to_depth, so the intervals touching a
+    depth window are found with two binary searches even if stored
+    intervals happen to overlap.
+    """
+
+    def __init__(self, ids: np.ndarray, from_depth: np.ndarray, to_depth: np.ndarray):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.from_depth = np.asarray(from_depth, dtype=np.float64)
+        self.to_depth = np.asarray(to_depth, dtype=np.float64)
+        self.reach = np.maximum.accumulate(self.to_depth) if len(self.to_depth) else self.to_depth
+
+    def __len__(self):
+        return len(self.ids)
+
+    def window(self, start: float, end: float) -> np.ndarray:
+        """Positions of intervals overlapping the open depth range (start, end)"""
+        first = np.searchsorted(self.reach, start, side='right')
+        last = np.searchsorted(self.from_depth, end, side='left')
+        candidates = np.arange(first, max(first, last))
+        return candidates[self.to_depth[candidates] > start]
+
+    def overlaps(self, start: float, end: float, exclude: Optional[int] = None) -> bool:
+        """Whether (start, end) overlaps a stored interval other than ``exclude``"""
+        found = self.ids[self.window(start, end)]
+        return bool(len(found) and (exclude is None or (found != exclude).any()))
+
+    def gaps(self, total_depth: Optional[float] = None, min_gap: float = 0.0) -> List[Tuple[float, float]]:
+        """Unsampled depth ranges longer than ``min_gap``, from the collar to ``total_depth``"""
+        starts = np.r_[0.0, self.reach]
+        ends = np.r_[self.from_depth, np.inf if total_depth is None else total_depth]
+        if total_depth is None:
+            starts, ends = starts[:-1], ends[:-1]
+        gap = (ends - starts) > max(min_gap, 0.0)
+        return list(zip(starts[gap].tolist(), ends[gap].tolist()))
+
+
+def _generation_key(drill_hole_id: int) -> str:
+    return f'geological_data:intervals:{drill_hole_id}:generation'
+
+
+def _index_key(drill_hole_id: int, generation: int) -> str:
+    return f'geological_data:intervals:{drill_hole_id}:{generation}'
+
+
+def _generations(drill_hole_ids: List[int]) -> Dict[int, int]:
+    """Current generation per hole, starting unseen holes at a fresh value
+
+    Starting from the clock rather than zero means an evicted generation
+    can never point back at an index cached before the eviction.
+    """
+    keys = {_generation_key(pk): pk for pk in drill_hole_ids}
+    generations = {keys[key]: value for key, value in cache.get_many(list(keys)).items()}
+    for pk in drill_hole_ids:
+        if pk not in generations:
+            cache.add(_generation_key(pk), time.time_ns(), None)
+            generations[pk] = cache.get(_generation_key(pk), 0)
+    return generations
+
+
+def get_hole_intervals(drill_hole_ids: Iterable[int], cached: bool = True) -> Dict[int, HoleIntervals]:
+    """Interval indexes for several holes, from the shared cache or one query
+
+    Holes with uncommitted sample changes in the current transaction are
+    read from the database and never written back to the cache. With
+    ``cached=False`` every hole is read from the database.
+    """
+    from .signals import holes_changed_in_transaction
+
+    drill_hole_ids = list(dict.fromkeys(int(pk) for pk in drill_hole_ids))
+    if not drill_hole_ids:
+        return {}
+    changed = holes_changed_in_transaction() if cached else set(drill_hole_ids)
+    shared = [pk for pk in drill_hole_ids if pk not in changed]
+    generations = _generations(shared)
+    keys = {_index_key(pk, generations[pk]): pk for pk in shared}
+    indexes = {keys[key]: index for key, index in cache.get_many(list(keys)).items()}
+
+    missing = [pk for pk in drill_hole_ids if pk not in indexes]
+    if missing:
+        rows = np.array(
+            DrillSample.objects.filter(drill_hole_id__in=missing)
+            .order_by('drill_hole_id', 'from_depth', 'id')
+            .values_list('drill_hole_id', 'id', 'from_depth', 'to_depth'),
+            dtype=np.float64,
+        ).reshape(-1, 4)
+        holes = rows[:, 0].astype(np.int64)
+        built = {}
+        for pk in missing:
+            start, stop = np.searchsorted(holes, pk, side='left'), np.searchsorted(holes, pk, side='right')
+            built[pk] = HoleIntervals(rows[start:stop, 1], rows[start:stop, 2], rows[start:stop, 3])
+        cache.set_many({_index_key(pk, generations[pk]): built[pk] for pk in missing if pk in generations},
+                       INTERVAL_CACHE_TIMEOUT)
+        indexes.update(built)
+    return indexes
+
+
+def invalidate_holes(drill_hole_ids: Iterable[int]):
+    """Move holes on to a new generation once their sample changes are committed"""
+    for pk in drill_hole_ids:
+        try:
+            cache.incr(_generation_key(pk))
+        except ValueError:
+            # No generation cached, so no index can be either
+            pass
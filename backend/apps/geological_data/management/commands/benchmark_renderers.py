@@ -0,0 +1,84 @@
+# backend/apps/geological_data/management/commands/benchmark_renderers.py
+import datetime
+import decimal
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from mining_ai_project.renderers import FastJSONRenderer, MessagePackRenderer, msgpack, orjson
+
+
+def synthetic_payload(samples: int, samples_per_hole: int = 100):
+    """A drill-hole list with nested samples, shaped like ?expand=samples output
+
+    Coordinates are left as Decimals and dates as datetimes, as they are in
+    responses built directly from model values.
+    """
+    rng = random.Random(0)
+    holes = []
+    for hole_number in range(max(1, samples // samples_per_hole)):
+        depths = [float(depth) for depth in range(samples_per_hole + 1)]
+        holes.append({
+            'id': hole_number + 1,
+            'hole_id': f'DH-{hole_number + 1:05d}',
+            'geo_property': 1,
+            'geo_property_name': 'Benchmark',
+            'latitude': decimal.Decimal(f'{49 + rng.random():.7f}'),
+            'longitude': decimal.Decimal(f'{-123 + rng.random():.7f}'),
+            'elevation': 900 + rng.random() * 100,
+            'total_depth': depths[-1],
+            'azimuth': rng.random() * 360,
+            'dip': 45 + rng.random() * 45,
+            'drilling_date': datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc),
+            'samples': [{
+                'id': hole_number * samples_per_hole + index + 1,
+                'drill_hole': hole_number + 1,
+                'from_depth': depths[index],
+                'to_depth': depths[index + 1],
+                'interval_length': 1.0,
+                'midpoint_depth': depths[index] + 0.5,
+                'gold_grade': rng.lognormvariate(0, 1),
+                'silver_grade': rng.lognormvariate(1, 1),
+                'copper_grade': None,
+                'rock_type': 'volcanic',
+                'alteration': 'sericite',
+                'mineralization': 'disseminated pyrite',
+            } for index in range(samples_per_hole)],
+        })
+    return holes
+
+
+class Command(BaseCommand):
+    help = "Time the API renderers on a synthetic hole list with nested samples"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--samples', type=int, default=10000, help="Samples in the payload")
+        parser.add_argument('--repeat', type=int, default=5, help="Renders per renderer; the best is reported")
+
+    def handle(self, *args, **options):
+        if options['samples'] < 1 or options['repeat'] < 1:
+            raise CommandError("--samples and --repeat must be positive")
+        payload = synthetic_payload(options['samples'])
+
+        renderers = [('DRF JSONRenderer', JSONRenderer())]
+        if orjson is not None:
+            renderers.append(('FastJSONRenderer (orjson)', FastJSONRenderer()))
+        else:
+            self.stderr.write("orjson is not installed; FastJSONRenderer would fall back to DRF's encoder")
+        if msgpack is not None:
+            renderers.append(('MessagePackRenderer', MessagePackRenderer()))
+
+        baseline = None
+        for name, renderer in renderers:
+            timings = []
+            for _ in range(options['repeat']):
+                start_time = time.perf_counter()
+                body = renderer.render(payload, renderer.media_type, {})
+                timings.append(time.perf_counter() - start_time)
+            best = min(timings)
+            baseline = baseline or best
+            self.stdout.write(
+                f"{name:<28} {best * 1000:8.1f} ms  {len(body) / 1024:8.0f} KiB  {baseline / best:5.1f}x"
+            )
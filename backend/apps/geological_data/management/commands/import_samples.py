@@ -0,0 +1,52 @@
+# backend/apps/geological_data/management/commands/import_samples.py
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.geological_data.importers import DrillSampleImporter, guess_format, read_rows
+from apps.geological_data.models import Property
+
+
+class Command(BaseCommand):
+    help = "Bulk import drill sample assay intervals for a property from CSV or NDJSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument('property', help="Property id or name")
+        parser.add_argument('path', help="CSV or NDJSON file with one assay interval per row")
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help="Defaults to the file extension")
+        parser.add_argument('--chunk-size', type=int, default=5000, help="Rows written per transaction")
+        parser.add_argument('--errors', help="Write row-level errors to this JSON file")
+
+    def handle(self, *args, **options):
+        lookup = options['property']
+        try:
+            if lookup.isdigit():
+                geo_property = Property.objects.get(pk=int(lookup))
+            else:
+                geo_property = Property.objects.get(name=lookup)
+        except Property.DoesNotExist:
+            raise CommandError(f"Property not found: {lookup}")
+
+        file_format = options['format'] or guess_format(options['path'])
+        importer = DrillSampleImporter(geo_property, chunk_size=options['chunk_size'])
+
+        start_time = time.time()
+        with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+            summary = importer.run(read_rows(stream, file_format))
+        elapsed = time.time() - start_time
+
+        if options['errors']:
+            with open(options['errors'], 'w') as out:
+                json.dump(summary['errors'], out, indent=2)
+        else:
+            for error in summary['errors'][:20]:
+                self.stderr.write(f"Row {error['row']}: {'; '.join(error['errors'])}")
+            if len(summary['errors']) > 20:
+                self.stderr.write(f"... {len(summary['errors']) - 20} more rows rejected")
+
+        rate = summary['total_rows'] / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {summary['created']} of {summary['total_rows']} rows into "
+            f"{geo_property.name} in {elapsed:.2f}s ({rate:,.0f} rows/s)"
+        ))
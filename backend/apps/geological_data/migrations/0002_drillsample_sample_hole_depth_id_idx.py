@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-18 01:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("geological_data", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="drillsample",
+            index=models.Index(
+                fields=["drill_hole", "from_depth", "id"],
+                name="sample_hole_depth_id_idx",
+            ),
+        ),
+    ]
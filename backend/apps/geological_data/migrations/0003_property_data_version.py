@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 01:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("geological_data", "0002_drillsample_sample_hole_depth_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="property",
+            name="data_version",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:02
+
+from django.db import migrations, models
+
+from apps.geological_data.spatial import encode_geohash
+
+
+def populate_geohash(apps, schema_editor):
+    for model_name in ["Property", "DrillHole"]:
+        model = apps.get_model("geological_data", model_name)
+        rows = model.objects.exclude(latitude=None).exclude(longitude=None)
+        for obj in rows.only("id", "latitude", "longitude").iterator():
+            obj.geohash = encode_geohash(obj.latitude, obj.longitude)
+            obj.save(update_fields=["geohash"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("geological_data", "0003_property_data_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="drillhole",
+            name="geohash",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=12
+            ),
+        ),
+        migrations.AddField(
+            model_name="property",
+            name="geohash",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=12
+            ),
+        ),
+        migrations.RunPython(populate_geohash, migrations.RunPython.noop),
+    ]
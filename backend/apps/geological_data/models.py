@@ -2,7 +2,9 @@
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from apps.users.models import MiningUser
+from .spatial import encode_geohash
 
 class Property(models.Model):
     name = models.CharField(max_length=200, unique=True)
@@ -48,6 +50,12 @@ class Property(models.Model):
     last_updated = models.DateTimeField(auto_now=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Geohash of the coordinates, used to prefilter map viewport queries
+    geohash = models.CharField(max_length=12, blank=True, db_index=True, editable=False)
+
+    # Bumped whenever the property's drill holes or samples change
+    data_version = models.PositiveIntegerField(default=0, editable=False)
+
     class Meta:
         verbose_name_plural = "Properties"
         ordering = ['name']
@@ -55,6 +63,24 @@ class Property(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.geohash = encode_geohash(self.latitude, self.longitude)
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def bump_data_version(cls, property_ids):
+        """Mark the drill data of these properties as changed"""
+        cls.objects.filter(pk__in=property_ids).update(
+            data_version=models.F('data_version') + 1, last_updated=timezone.now()
+        )
+
+    @classmethod
+    def bump_data_version_for_holes(cls, drill_hole_ids):
+        """Mark the properties owning these drill holes as changed"""
+        cls.objects.filter(drill_holes__in=drill_hole_ids).update(
+            data_version=models.F('data_version') + 1, last_updated=timezone.now()
+        )
+
 class DrillHole(models.Model):
     geo_property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='drill_holes')
     hole_id = models.CharField(max_length=50)
@@ -78,6 +104,9 @@ class DrillHole(models.Model):
         help_text="Dip in degrees (-90 to +90, negative = upward)"
     )
     drilling_date = models.DateField()
+
+    # Geohash of the collar, used to prefilter map viewport queries
+    geohash = models.CharField(max_length=12, blank=True, db_index=True, editable=False)
     
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -88,13 +117,40 @@ class DrillHole(models.Model):
     def __str__(self):
         return f"{self.geo_property.name} - {self.hole_id}"
 
+    def save(self, *args, **kwargs):
+        self.geohash = encode_geohash(self.latitude, self.longitude)
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def annotate_sample_stats(cls, queryset):
+        """Annotate the values behind sample_count and average_gold_grade"""
+        return queryset.annotate(
+            annotated_sample_count=models.Count('samples'),
+            annotated_average_gold_grade=models.Avg('samples__gold_grade'),
+        )
+
+    def _prefetched_samples(self):
+        return getattr(self, '_prefetched_objects_cache', {}).get('samples')
+
     @property
     def sample_count(self):
+        if hasattr(self, 'annotated_sample_count'):
+            return self.annotated_sample_count
+        samples = self._prefetched_samples()
+        if samples is not None:
+            return len(samples)
         return self.samples.count()
 
     @property
     def average_gold_grade(self):
         """Calculate average gold grade for this hole"""
+        if hasattr(self, 'annotated_average_gold_grade'):
+            return self.annotated_average_gold_grade
+        samples = self._prefetched_samples()
+        if samples is not None:
+            grades = [s.gold_grade for s in samples if s.gold_grade is not None]
+            return sum(grades) / len(grades) if grades else None
+
         samples_with_gold = self.samples.filter(gold_grade__isnull=False)
         if not samples_with_gold.exists():
             return None
@@ -142,6 +198,10 @@ class DrillSample(models.Model):
     class Meta:
         unique_together = ['drill_hole', 'from_depth', 'to_depth']
         ordering = ['drill_hole', 'from_depth']
+        indexes = [
+            # Keyset pagination walks samples hole by hole in (from_depth, id) order
+            models.Index(fields=['drill_hole', 'from_depth', 'id'], name='sample_hole_depth_id_idx'),
+        ]
 
     # def clean(self):
     #     """Validate depth relationships"""
@@ -167,11 +227,6 @@ class DrillSample(models.Model):
     """Temperory clean function"""
     def clean(self):
         """Validate depth relationships"""
-        # Debug logging
-        print(f"DEBUG: drill_hole_id = {self.drill_hole_id}")
-        print(f"DEBUG: from_depth = {self.from_depth}")
-        print(f"DEBUG: to_depth = {self.to_depth}")
-        
         if self.to_depth <= self.from_depth:
             raise ValidationError("To depth must be greater than from depth")
         if self.from_depth < 0:
@@ -181,13 +236,11 @@ class DrillSample(models.Model):
         if not self.drill_hole_id:
             raise ValidationError("Drill hole is required")
         
-        # Check for overlapping intervals in the same hole
+        # Check for overlapping intervals in the same hole. One indexed query;
+        # the cached interval index can lag behind other workers' writes
         overlapping = DrillSample.objects.filter(
-            drill_hole_id=self.drill_hole_id
-        ).exclude(pk=self.pk).filter(
-            from_depth__lt=self.to_depth,
-            to_depth__gt=self.from_depth
-        )
+            drill_hole_id=self.drill_hole_id, from_depth__lt=self.to_depth, to_depth__gt=self.from_depth,
+        ).exclude(pk=self.pk)
         if overlapping.exists():
             raise ValidationError("Sample intervals cannot overlap")
 
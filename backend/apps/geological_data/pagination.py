@@ -0,0 +1,157 @@
+# backend/apps/geological_data/pagination.py
+import base64
+import json
+from operator import attrgetter
+from typing import Optional
+
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def estimate_count(queryset) -> Optional[int]:
+    """Return the planner's row estimate for a queryset, or None when unavailable"""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination over a fixed, unique ordering
+
+    Each page filters on the last row's ordering key instead of using OFFSET,
+    so a deep page costs the same as the first one. The total is estimated by
+    default; pass ``?count=exact`` for an exact COUNT(*) or ``?count=none``
+    to skip it.
+    """
+    ordering = ('id',)
+    page_size = api_settings.PAGE_SIZE or 20
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.total, self.total_is_estimate = self.get_count(queryset, request)
+
+        keys, reverse = self.decode_cursor(request)
+        if reverse:
+            queryset = queryset.order_by(*[f'-{field}' for field in self.ordering])
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if keys is not None:
+            queryset = queryset.filter(self.keyset_filter(keys, reverse))
+
+        # Fetch one extra row to know whether there is another page
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.next_keys = self.previous_keys = None
+        if results:
+            if has_more or reverse:
+                self.next_keys = self.key_of(results[-1])
+            if keys is not None and (has_more or not reverse):
+                self.previous_keys = self.key_of(results[0])
+        return results
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param, 'estimate')
+        if mode == 'none':
+            return None, False
+        if mode == 'exact':
+            return queryset.count(), False
+        return estimate_count(queryset), True
+
+    def keyset_filter(self, keys, reverse: bool) -> Q:
+        """Expand (a, b, c) > (x, y, z) into a filter the ORM can express
+
+        The redundant a >= x in front gives the planner a range to start an
+        index scan on, which the ORed branches alone do not.
+        """
+        lookup = 'lt' if reverse else 'gt'
+        condition = Q()
+        for depth, field in enumerate(self.ordering):
+            branch = Q(**{f'{field}__{lookup}': keys[depth]})
+            for previous, value in zip(self.ordering[:depth], keys[:depth]):
+                branch &= Q(**{previous: value})
+            condition |= branch
+        return Q(**{f'{self.ordering[0]}__{lookup}e': keys[0]}) & condition
+
+    def key_of(self, item):
+        if isinstance(item, dict):
+            return [item[field] for field in self.ordering]
+        return [attrgetter(field.replace('__', '.'))(item) for field in self.ordering]
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            keys, reverse = payload['k'], bool(payload.get('r'))
+            if not isinstance(keys, list) or len(keys) != len(self.ordering):
+                raise ValueError
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError):
+            raise NotFound(self.invalid_cursor_message)
+        return keys, reverse
+
+    def encode_cursor(self, keys, reverse: bool = False) -> str:
+        payload = json.dumps({'k': keys, 'r': reverse}, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if self.next_keys is None:
+            return None
+        return self.encode_cursor(self.next_keys)
+
+    def get_previous_link(self):
+        if self.previous_keys is None:
+            return None
+        return self.encode_cursor(self.previous_keys, reverse=True)
+
+    def get_paginated_response(self, data):
+        payload = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+        }
+        if self.total is not None:
+            payload['count'] = self.total
+            payload['count_is_estimate'] = self.total_is_estimate
+        payload['results'] = data
+        return Response(payload)
+
+
+class DrillSampleKeysetPagination(KeysetPagination):
+    """Keyset pagination over samples hole by hole, in depth order
+
+    The ordering is the sample_hole_depth_id_idx index, so each page is an
+    index range scan with no sort. Holes come in pk order rather than by
+    property and hole name as on numbered pages.
+    """
+    ordering = ('drill_hole_id', 'from_depth', 'id')
@@ -0,0 +1,54 @@
+# backend/apps/geological_data/renderers.py
+import csv
+import io
+import json
+
+import numpy as np
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+
+
+class NPZRenderer(BaseRenderer):
+    """Render a dict of column arrays as an uncompressed NumPy .npz archive"""
+    media_type = 'application/x-npz'
+    format = 'npz'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        buffer = io.BytesIO()
+        np.savez(buffer, **{key: np.asarray(value) for key, value in data.items()})
+        return buffer.getvalue()
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Newline-delimited JSON; list endpoints stream this format themselves"""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(json.dumps(row, cls=DjangoJSONEncoder) + '\n' for row in rows).encode(self.charset)
+
+
+class CSVRenderer(BaseRenderer):
+    """Comma-separated values; list endpoints stream this format themselves"""
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if rows and isinstance(rows[0], dict):
+            writer.writerow(rows[0].keys())
+            writer.writerows(row.values() for row in rows)
+        return buffer.getvalue().encode(self.charset)
@@ -0,0 +1,96 @@
+# backend/apps/geological_data/sample_arrays.py
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable
+
+import numpy as np
+
+from .exports import sample_columns
+from .models import DrillSample, Property
+
+# Properties whose sample arrays are kept in memory per process
+ARRAY_CACHE_SIZE = 16
+
+GRADE_COLUMNS = ['gold_grade', 'silver_grade', 'copper_grade']
+
+
+class SampleArrays:
+    """Struct-of-arrays view of a property's samples, sorted by hole then depth
+
+    Samples of hole ``i`` occupy ``hole_offsets[i]:hole_offsets[i + 1]``.
+    Grades are float64 with NaN for missing assays.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.hole = columns['hole']
+        self.hole_pk = columns['hole_pk']
+        self.hole_names = columns['hole_dictionary']
+        self.from_depth = columns['from_depth']
+        self.to_depth = columns['to_depth']
+        self.grades = {name: columns[name] for name in GRADE_COLUMNS}
+        self.rock_type = columns['rock_type']
+        self.rock_type_names = columns['rock_type_dictionary']
+        self.hole_offsets = np.searchsorted(self.hole, np.arange(len(self.hole_pk) + 1))
+
+    def __len__(self):
+        return len(self.from_depth)
+
+    @property
+    def hole_count(self) -> int:
+        return len(self.hole_pk)
+
+    @property
+    def length(self) -> np.ndarray:
+        return self.to_depth - self.from_depth
+
+
+class LRUCache:
+    """Small thread-safe LRU for derived arrays"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_or_create(self, key: Hashable, factory: Callable):
+        with self.lock:
+            if key in self.items:
+                self.items.move_to_end(key)
+                return self.items[key]
+        value = factory()
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            while len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+        return value
+
+
+_sample_arrays = LRUCache(ARRAY_CACHE_SIZE)
+
+
+def load_property_samples(geo_property: Property) -> SampleArrays:
+    """Return the property's samples as arrays, cached per data version"""
+    return _sample_arrays.get_or_create(
+        (geo_property.pk, geo_property.data_version),
+        lambda: SampleArrays(sample_columns(
+            DrillSample.objects.filter(drill_hole__geo_property_id=geo_property.pk)
+        )),
+    )
+
+
+def column_records(fields) -> list:
+    """Turn parallel column arrays into a list of dicts, NaN becoming None
+
+    ``fields`` is a list of ``(output name, array)`` pairs.
+    """
+    values = []
+    for _, column in fields:
+        column = np.asarray(column)
+        if column.dtype.kind == 'f':
+            missing = np.isnan(column)
+            column = column.astype(object)
+            column[missing] = None
+        values.append(column.tolist())
+    names = [name for name, _ in fields]
+    return [dict(zip(names, row)) for row in zip(*values)]
@@ -1,8 +1,84 @@
 from rest_framework import serializers
 from .models import Property, DrillHole, DrillSample
 
-class PropertyListSerializer(serializers.ModelSerializer):
-    drill_hole_count = serializers.IntegerField(source='drill_holes.count', read_only=True)
+
+def _query_list(request, name):
+    value = request.query_params.get(name, '') if request is not None else ''
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+
+def _join(path, name):
+    return f'{path}.{name}' if path else name
+
+
+def selected_fields(request, path=''):
+    """Field names requested with ?fields= at a nesting path, or an empty set for all"""
+    prefix = _join(path, '')
+    return {
+        name[len(prefix):].split('.')[0]
+        for name in _query_list(request, 'fields')
+        if name.startswith(prefix)
+    }
+
+
+def field_requested(request, path, name):
+    selected = selected_fields(request, path)
+    return not selected or name in selected
+
+
+def is_expanded(request, path):
+    """Whether an opt-in nested relation was requested with ?expand= (or ?fields=)
+
+    Expanding a dotted path expands every relation on the way to it, so
+    ``?expand=drill_holes.samples`` implies ``drill_holes``.
+    """
+    prefix = _join(path, '')
+    if any(name == path or name.startswith(prefix) for name in _query_list(request, 'expand')):
+        return True
+    return any(name.startswith(prefix) for name in _query_list(request, 'fields'))
+
+
+class SparseFieldsMixin:
+    """Support ``?fields=`` sparse fieldsets and ``?expand=`` opt-in nesting
+
+    Both take comma separated names; nested serializers are addressed with
+    dotted paths, e.g. ``?expand=drill_holes.samples&fields=id,drill_holes.hole_id``.
+    Relations listed in ``expandable_fields`` are left out unless expanded.
+    """
+    expandable_fields = ()
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None:
+            return fields
+
+        path = self._field_path()
+        for name in self.expandable_fields:
+            if not is_expanded(request, _join(path, name)):
+                fields.pop(name, None)
+
+        # Only trim reads; writes still need every writable field
+        if request.method in ('GET', 'HEAD'):
+            selected = selected_fields(request, path)
+            if selected:
+                for name in list(fields):
+                    if name not in selected:
+                        fields.pop(name)
+        return fields
+
+    def _field_path(self):
+        names = []
+        node = self
+        while node is not None:
+            if node.field_name:
+                names.append(node.field_name)
+            node = node.parent
+        return '.'.join(reversed(names))
+
+
+class PropertyListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    drill_hole_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Property
@@ -10,8 +86,14 @@ class PropertyListSerializer(serializers.ModelSerializer):
                  'commodity_focus', 'exploration_stage', 'access_road', 'power_available',
                  'drill_hole_count', 'last_updated']
 
+    def get_drill_hole_count(self, obj):
+        # Annotated by PropertyViewSet for lists; fall back for create/update responses
+        if hasattr(obj, 'drill_hole_count'):
+            return obj.drill_hole_count
+        return obj.drill_holes.count()
+
 
-class DrillSampleSerializer(serializers.ModelSerializer):
+class DrillSampleSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     interval_length = serializers.ReadOnlyField()
     midpoint_depth = serializers.ReadOnlyField() 
 
@@ -22,8 +104,9 @@ class DrillSampleSerializer(serializers.ModelSerializer):
                  'alteration', 'mineralization']
         
 
-class DrillHoleSerializer(serializers.ModelSerializer):
+class DrillHoleSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     samples = DrillSampleSerializer(many=True, read_only=True)
+    expandable_fields = ['samples']
     sample_count = serializers.ReadOnlyField()
     average_gold_grade = serializers.ReadOnlyField()
     geo_property_name = serializers.CharField(source='geo_property.name', read_only=True)
@@ -34,8 +117,9 @@ class DrillHoleSerializer(serializers.ModelSerializer):
                  'elevation', 'total_depth', 'azimuth', 'dip', 'drilling_date', 
                  'sample_count', 'average_gold_grade', 'samples']
 
-class PropertyDetailSerializer(serializers.ModelSerializer):
+class PropertyDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     drill_holes = DrillHoleSerializer(many=True, read_only=True)
+    expandable_fields = ['drill_holes']
 
     class Meta:
         model = Property
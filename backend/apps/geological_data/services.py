@@ -0,0 +1,68 @@
+# backend/apps/geological_data/services.py
+from typing import Dict
+
+from django.core.cache import cache
+from django.db.models import Avg, Count, F, Max, Min, Q, Sum
+
+from .models import Property
+
+STATISTICS_CACHE_TIMEOUT = 60 * 60 * 24
+GRADE_METALS = ['gold', 'silver', 'copper']
+
+
+def compute_property_statistics(geo_property: Property) -> Dict:
+    """Compute drill statistics for a property in a single aggregate query"""
+    samples = 'drill_holes__samples'
+    length = F(f'{samples}__to_depth') - F(f'{samples}__from_depth')
+
+    aggregates = {
+        'total_drill_holes': Count('drill_holes', distinct=True),
+        'total_samples': Count(f'{samples}__id'),
+        'total_meters': Sum(length),
+    }
+    for metal in GRADE_METALS:
+        grade = f'{samples}__{metal}_grade'
+        assayed = Q(**{f'{grade}__isnull': False})
+        aggregates.update({
+            f'{metal}_avg_grade': Avg(grade),
+            f'{metal}_max_grade': Max(grade),
+            f'{metal}_min_grade': Min(grade),
+            f'{metal}_count': Count(grade),
+            f'{metal}_grade_meters': Sum(F(grade) * length, filter=assayed),
+            f'{metal}_meters': Sum(length, filter=assayed),
+        })
+
+    totals = Property.objects.filter(pk=geo_property.pk).aggregate(**aggregates)
+
+    stats = {
+        'total_drill_holes': totals['total_drill_holes'],
+        'total_samples': totals['total_samples'],
+        'total_meters': totals['total_meters'] or 0,
+    }
+    for metal in GRADE_METALS:
+        if not totals[f'{metal}_count']:
+            continue
+        meters = totals[f'{metal}_meters']
+        stats[f'{metal}_statistics'] = {
+            'avg_grade': totals[f'{metal}_avg_grade'],
+            'max_grade': totals[f'{metal}_max_grade'],
+            'min_grade': totals[f'{metal}_min_grade'],
+            'count': totals[f'{metal}_count'],
+            # Length-weighted average: sum(grade * interval) / sum(interval)
+            'weighted_avg_grade': totals[f'{metal}_grade_meters'] / meters if meters else None,
+        }
+    return stats
+
+
+def get_property_statistics(geo_property: Property) -> Dict:
+    """Return cached statistics, keyed by the property's data version
+
+    Only the drill totals are cached; the name is read from the property,
+    since renaming it does not change its data version.
+    """
+    cache_key = f'geological:property-stats:{geo_property.pk}:{geo_property.data_version}'
+    stats = cache.get(cache_key)
+    if stats is None:
+        stats = compute_property_statistics(geo_property)
+        cache.set(cache_key, stats, STATISTICS_CACHE_TIMEOUT)
+    return {'geo_property_name': geo_property.name, **stats}
@@ -0,0 +1,144 @@
+# backend/apps/geological_data/signals.py
+import threading
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from mining_ai_project.cache import invalidate
+
+from .grade_tonnage import apply_new_samples, sample_curves
+from .interval_index import invalidate_holes
+from .models import DrillHole, DrillSample, Property
+from .spatial import get_spatial_index
+
+_local = threading.local()
+
+
+class _PendingBumps:
+    """Property/hole ids changed in the current transaction, bumped once on commit"""
+
+    def __init__(self):
+        self.property_ids = set()
+        self.drill_hole_ids = set()
+        self.added_samples = []
+        # Holes whose samples were edited or deleted, not just added
+        self.changed_hole_ids = set()
+
+    def flush(self):
+        if self.property_ids:
+            Property.bump_data_version(self.property_ids)
+        if self.drill_hole_ids:
+            apply_new_samples(self._added_by_property(),
+                              lambda: Property.bump_data_version_for_holes(self.drill_hole_ids))
+            invalidate_holes(self.drill_hole_ids)
+        invalidate('geological')
+
+    def _added_by_property(self):
+        """New samples grouped by property, for properties with no other change"""
+        if not self.added_samples or not sample_curves.entries:
+            return {}
+        owners = dict(DrillHole.objects.filter(pk__in=self.drill_hole_ids).values_list('pk', 'geo_property_id'))
+        excluded = self.property_ids | {owners.get(pk) for pk in self.changed_hole_ids}
+        added = {}
+        for sample in self.added_samples:
+            property_id = owners.get(sample.drill_hole_id)
+            if property_id is not None and property_id not in excluded:
+                added.setdefault(property_id, []).append(sample)
+        return added
+
+
+def _queued_bumps():
+    """Return the batch already queued for the open transaction, if any"""
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        return None
+    pending = getattr(_local, 'pending', None)
+    # A rolled back or already committed batch is no longer queued
+    if pending is None or not any(entry[1] == pending.flush for entry in connection.run_on_commit):
+        return None
+    return pending
+
+
+def _pending_bumps():
+    """Return the batch for the open transaction, or None in autocommit mode"""
+    if not transaction.get_connection().in_atomic_block:
+        return None
+    pending = _queued_bumps()
+    if pending is None:
+        pending = _local.pending = _PendingBumps()
+        transaction.on_commit(pending.flush)
+    return pending
+
+
+def holes_changed_in_transaction():
+    """Ids of holes whose samples changed in the open, uncommitted transaction"""
+    pending = _queued_bumps()
+    return pending.drill_hole_ids if pending is not None else set()
+
+
+def _origin_model(origin):
+    if isinstance(origin, QuerySet):
+        return origin.model
+    return type(origin) if origin is not None else None
+
+
+def schedule_bump(property_id=None, drill_hole_id=None, added_sample=None):
+    """Bump a property's data version now, or once at commit inside a transaction
+
+    ``added_sample`` is a newly created sample of ``drill_hole_id``; cached
+    grade-tonnage curves take it in rather than being rebuilt.
+    """
+    pending = _pending_bumps()
+    immediate = pending is None
+    if immediate:
+        pending = _PendingBumps()
+    if property_id is not None:
+        pending.property_ids.add(property_id)
+    if drill_hole_id is not None:
+        pending.drill_hole_ids.add(drill_hole_id)
+        if added_sample is not None:
+            pending.added_samples.append(added_sample)
+        else:
+            pending.changed_hole_ids.add(drill_hole_id)
+    if immediate:
+        pending.flush()
+
+
+@receiver(post_save, sender=Property)
+@receiver(post_save, sender=DrillHole)
+def coordinates_saved(sender, instance, **kwargs):
+    """Keep the in-memory spatial index in step with saved coordinates"""
+    pk, latitude, longitude = instance.pk, instance.latitude, instance.longitude
+    transaction.on_commit(lambda: get_spatial_index(sender).record_save(pk, latitude, longitude))
+
+
+@receiver(post_delete, sender=Property)
+@receiver(post_delete, sender=DrillHole)
+def coordinates_deleted(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: get_spatial_index(sender).record_delete(pk))
+
+
+@receiver([post_save, post_delete], sender=Property)
+def property_changed(sender, instance, **kwargs):
+    """Drop cached geological responses; hole and sample changes do so when their bump flushes"""
+    invalidate('geological')
+
+
+@receiver([post_save, post_delete], sender=DrillHole)
+def drill_hole_changed(sender, instance, origin=None, **kwargs):
+    """Bump the owning property's data version when a hole changes"""
+    if _origin_model(origin) is Property:
+        return
+    schedule_bump(property_id=instance.geo_property_id)
+
+
+@receiver([post_save, post_delete], sender=DrillSample)
+def drill_sample_changed(sender, instance, origin=None, created=False, **kwargs):
+    """Bump the owning property's data version when a sample changes"""
+    # Cascades from a hole or property delete are covered by that delete
+    if _origin_model(origin) in (DrillHole, Property):
+        return
+    schedule_bump(drill_hole_id=instance.drill_hole_id, added_sample=instance if created else None)
@@ -0,0 +1,356 @@
+# backend/apps/geological_data/spatial.py
+import logging
+import math
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Q
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+GEOHASH_PRECISION = 9
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Pending inserts/moves are searched by brute force until the tree is rebuilt
+REBUILD_MIN_CHANGES = 256
+REBUILD_CHANGE_RATIO = 0.05
+
+
+def encode_geohash(latitude, longitude, precision: int = GEOHASH_PRECISION) -> str:
+    """Encode a coordinate as a geohash string"""
+    if latitude is None or longitude is None:
+        return ''
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    latitude, longitude = float(latitude), float(longitude)
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        target, bounds = (longitude, lng_range) if even else (latitude, lat_range)
+        middle = (bounds[0] + bounds[1]) / 2
+        value <<= 1
+        if target >= middle:
+            value |= 1
+            bounds[0] = middle
+        else:
+            bounds[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def geohash_cell_size(precision: int) -> Tuple[float, float]:
+    """Return (height, width) in degrees of a geohash cell"""
+    total_bits = 5 * precision
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def geohash_cover(min_lat, min_lng, max_lat, max_lng, max_cells: int = 32) -> List[str]:
+    """Return geohash prefixes covering a bounding box, as fine as max_cells allows"""
+    cells = ['']
+    for precision in range(1, GEOHASH_PRECISION + 1):
+        height, width = geohash_cell_size(precision)
+        rows = math.floor(max_lat / height) - math.floor(min_lat / height) + 1
+        columns = math.floor(max_lng / width) - math.floor(min_lng / width) + 1
+        if rows * columns > max_cells:
+            break
+        cells = sorted({
+            encode_geohash(
+                min(max_lat, (math.floor(min_lat / height) + row + 0.5) * height),
+                min(max_lng, (math.floor(min_lng / width) + column + 0.5) * width),
+                precision,
+            )
+            for row in range(rows)
+            for column in range(columns)
+        })
+    return cells
+
+
+def _unit_vectors(latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    lat, lng = np.radians(latitudes), np.radians(longitudes)
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lng), cos_lat * np.sin(lng), np.sin(lat)))
+
+
+def _chord_to_km(chord: np.ndarray) -> np.ndarray:
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0, 1))
+
+
+def _km_to_chord(distance_km: float) -> float:
+    return 2 * math.sin(min(distance_km / EARTH_RADIUS_KM, math.pi) / 2)
+
+
+class _BruteForceTree:
+    """Stand-in for scipy's cKDTree when scipy is not installed"""
+
+    def __init__(self, points: np.ndarray):
+        self.data = points
+
+    def query_ball_point(self, point, r):
+        distances = np.linalg.norm(self.data - point, axis=1)
+        return np.flatnonzero(distances <= r).tolist()
+
+    def query(self, point, k):
+        distances = np.linalg.norm(self.data - point, axis=1)
+        order = np.argsort(distances)[:k]
+        return distances[order], order
+
+
+def _build_tree(points: np.ndarray):
+    try:
+        from scipy.spatial import cKDTree
+    except ImportError:
+        return _BruteForceTree(points)
+    return cKDTree(points)
+
+
+class SpatialIndex:
+    """In-memory KD-tree over the coordinates of one model
+
+    Points live on the unit sphere so straight-line (chord) distance orders
+    results the same way as great-circle distance. Saves and deletes made in
+    this process are applied incrementally: they go to a small pending set
+    that is searched by brute force, and the tree is rebuilt once enough of
+    them pile up. Writes from other processes bump a shared version stamp in
+    the cache, which triggers a full reload here on the next query.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.version_key = f'geological:spatial-version:{model._meta.label_lower}'
+        self.lock = threading.RLock()
+        self.loaded_version = None
+        self.ids = np.empty(0, dtype=np.int64)
+        self.tree = None
+        self.removed = set()
+        self.pending: Dict[int, Tuple[float, float]] = {}
+
+    # Maintenance
+
+    def _shared_version(self) -> int:
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, 1, None)
+            version = cache.get(self.version_key, 1)
+        return version
+
+    def _bump_shared_version(self) -> int:
+        try:
+            return cache.incr(self.version_key)
+        except ValueError:
+            cache.add(self.version_key, 1, None)
+            return self._shared_version()
+
+    def _load(self):
+        rows = np.array(
+            self.model.objects.filter(latitude__isnull=False, longitude__isnull=False)
+            .values_list('id', 'latitude', 'longitude'),
+            dtype=np.float64,
+        ).reshape(-1, 3)
+        self._rebuild(rows[:, 0].astype(np.int64), rows[:, 1], rows[:, 2])
+        logger.info(f"Built spatial index for {self.model.__name__} ({len(self.ids)} points)")
+
+    def _rebuild(self, ids, latitudes, longitudes):
+        self.ids = ids
+        self.tree = _build_tree(_unit_vectors(latitudes, longitudes)) if len(ids) else None
+        self.removed = set()
+        self.pending = {}
+
+    def _compact(self):
+        """Fold pending changes into a fresh tree"""
+        keep = ~np.isin(self.ids, list(self.removed))
+        points = self.tree.data[keep] if self.tree is not None else np.empty((0, 3))
+        ids = self.ids[keep]
+        if self.pending:
+            pending_ids = np.fromiter(self.pending.keys(), dtype=np.int64, count=len(self.pending))
+            coords = np.array(list(self.pending.values()), dtype=np.float64)
+            points = np.vstack((points, _unit_vectors(coords[:, 0], coords[:, 1])))
+            ids = np.concatenate((ids, pending_ids))
+        self.ids = ids
+        self.tree = _build_tree(points) if len(ids) else None
+        self.removed = set()
+        self.pending = {}
+
+    def _ensure_current(self):
+        version = self._shared_version()
+        if self.loaded_version != version:
+            self._load()
+            self.loaded_version = version
+
+    def record_save(self, pk: int, latitude, longitude):
+        """Apply a saved object's coordinates to this process's index"""
+        with self.lock:
+            stale = self.loaded_version != self._shared_version()
+            version = self._bump_shared_version()
+            if stale or self.loaded_version is None:
+                return
+            self.removed.add(pk)
+            self.pending.pop(pk, None)
+            if latitude is not None and longitude is not None:
+                self.pending[pk] = (float(latitude), float(longitude))
+            self.loaded_version = version
+            if len(self.pending) + len(self.removed) > max(REBUILD_MIN_CHANGES, REBUILD_CHANGE_RATIO * len(self.ids)):
+                self._compact()
+
+    def record_delete(self, pk: int):
+        self.record_save(pk, None, None)
+
+    # Queries
+
+    def _candidates(self, point: np.ndarray, radius_chord: Optional[float] = None, k: Optional[int] = None):
+        """Return (ids, chord distances) from the tree and pending changes"""
+        ids, distances = [], []
+        if self.tree is not None and len(self.ids):
+            if radius_chord is not None:
+                index = np.asarray(self.tree.query_ball_point(point, radius_chord), dtype=np.int64)
+            else:
+                count = min(len(self.ids), k + len(self.removed))
+                _, index = self.tree.query(point, count)
+                index = np.atleast_1d(np.asarray(index, dtype=np.int64))
+            found = self.ids[index]
+            if self.removed:
+                keep = ~np.isin(found, list(self.removed))
+                index, found = index[keep], found[keep]
+            ids.append(found)
+            distances.append(np.linalg.norm(self.tree.data[index] - point, axis=1))
+        if self.pending:
+            pending_ids = np.fromiter(self.pending.keys(), dtype=np.int64, count=len(self.pending))
+            coords = np.array(list(self.pending.values()), dtype=np.float64)
+            pending_distances = np.linalg.norm(_unit_vectors(coords[:, 0], coords[:, 1]) - point, axis=1)
+            if radius_chord is not None:
+                keep = pending_distances <= radius_chord
+                pending_ids, pending_distances = pending_ids[keep], pending_distances[keep]
+            ids.append(pending_ids)
+            distances.append(pending_distances)
+        if not ids:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        ids, distances = np.concatenate(ids), np.concatenate(distances)
+        order = np.argsort(distances, kind='stable')
+        return ids[order], distances[order]
+
+    def within_radius(self, latitude: float, longitude: float, radius_km: float):
+        """Return (ids, distances in km) within radius_km, nearest first"""
+        with self.lock:
+            self._ensure_current()
+            point = _unit_vectors(np.array([latitude]), np.array([longitude]))[0]
+            ids, chords = self._candidates(point, radius_chord=_km_to_chord(radius_km))
+        return ids, _chord_to_km(chords)
+
+    def nearest(self, latitude: float, longitude: float, k: int):
+        """Return (ids, distances in km) of the k nearest points"""
+        with self.lock:
+            self._ensure_current()
+            point = _unit_vectors(np.array([latitude]), np.array([longitude]))[0]
+            ids, chords = self._candidates(point, k=k)
+        return ids[:k], _chord_to_km(chords[:k])
+
+
+_indexes: Dict[str, SpatialIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_spatial_index(model) -> SpatialIndex:
+    """Return the process-wide spatial index for a model"""
+    label = model._meta.label_lower
+    with _indexes_lock:
+        if label not in _indexes:
+            _indexes[label] = SpatialIndex(model)
+        return _indexes[label]
+
+
+class SpatialQueryMixin:
+    """Bounding box, radius and nearest-neighbour list actions for a viewset
+
+    ``within`` prefilters on the geohash column in the database; ``nearby``
+    and ``nearest`` go through the in-memory spatial index. Results keep the
+    viewset's other query-param filters.
+    """
+    spatial_actions = ('within', 'nearby', 'nearest')
+    max_spatial_results = 1000
+    max_nearest = 100
+
+    def _coordinate_param(self, name, low, high, default=None):
+        value = self.request.query_params.get(name, default)
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            raise ValidationError({name: 'A number is required.'})
+        if not low <= value <= high:
+            raise ValidationError({name: f'Must be between {low} and {high}.'})
+        return value
+
+    @action(detail=False, methods=['get'])
+    def within(self, request):
+        """Objects inside ?bbox=min_lng,min_lat,max_lng,max_lat"""
+        try:
+            min_lng, min_lat, max_lng, max_lat = [float(v) for v in request.query_params['bbox'].split(',')]
+        except (KeyError, ValueError):
+            raise ValidationError({'bbox': 'Expected min_lng,min_lat,max_lng,max_lat.'})
+        if min_lng > max_lng or min_lat > max_lat:
+            raise ValidationError({'bbox': 'Minimum values must not exceed maximum values.'})
+
+        cells = Q()
+        for prefix in geohash_cover(min_lat, min_lng, max_lat, max_lng):
+            cells |= Q(geohash__startswith=prefix)
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            cells,
+            latitude__gte=min_lat, latitude__lte=max_lat,
+            longitude__gte=min_lng, longitude__lte=max_lng,
+        )
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(queryset, many=True).data)
+
+    @action(detail=False, methods=['get'])
+    def nearby(self, request):
+        """Objects within ?radius_km of ?lat/?lng, nearest first"""
+        latitude = self._coordinate_param('lat', -90, 90)
+        longitude = self._coordinate_param('lng', -180, 180)
+        radius_km = self._coordinate_param('radius_km', 0, EARTH_RADIUS_KM * math.pi)
+
+        index = get_spatial_index(self.get_queryset().model)
+        ids, distances = index.within_radius(latitude, longitude, radius_km)
+        return self._ranked_response(ids, distances, self.max_spatial_results)
+
+    @action(detail=False, methods=['get'])
+    def nearest(self, request):
+        """The ?k objects closest to ?lat/?lng"""
+        latitude = self._coordinate_param('lat', -90, 90)
+        longitude = self._coordinate_param('lng', -180, 180)
+        k = int(self._coordinate_param('k', 1, self.max_nearest, default=10))
+
+        # Other filters may drop candidates, so widen the search until k survive
+        index = get_spatial_index(self.get_queryset().model)
+        fetch = k
+        while True:
+            ids, distances = index.nearest(latitude, longitude, fetch)
+            matched = self.filter_queryset(self.get_queryset()).filter(pk__in=ids.tolist()).count()
+            if matched >= k or len(ids) < fetch:
+                break
+            fetch *= 4
+        return self._ranked_response(ids, distances, k, report_truncation=False)
+
+    def _ranked_response(self, ids, distances, limit, report_truncation=True):
+        objects = self.filter_queryset(self.get_queryset()).in_bulk(ids[:self.max_spatial_results * 4].tolist())
+        ranked = [(objects[pk], distance) for pk, distance in zip(ids.tolist(), distances.tolist()) if pk in objects]
+        truncated = len(ranked) > limit
+        ranked = ranked[:limit]
+
+        data = self.get_serializer([obj for obj, _ in ranked], many=True).data
+        for item, (_, distance) in zip(data, ranked):
+            item['distance_km'] = round(distance, 3)
+        payload = {'count': len(data), 'results': data}
+        if report_truncation:
+            payload['truncated'] = truncated
+        return Response(payload)
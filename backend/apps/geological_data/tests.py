@@ -0,0 +1,429 @@
+# backend/apps/geological_data/tests.py
+import datetime
+import io
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from apps.ai_analysis.jobs import run_job
+from apps.ai_analysis.models import AnalysisJob
+from apps.users.models import MiningUser
+from mining_ai_project.cache import ResponseCacheMixin
+
+from . import compositing, desurvey, sample_arrays
+from .exports import sample_column_chunks, sample_columns, write_npz
+from .importers import DrillSampleImporter
+from .interpolation import ellipsoid_transform, estimate_blocks
+from .fast_read import RowMapper
+from .interval_index import get_hole_intervals
+from .models import DrillHole, DrillSample, Property
+from .pagination import DrillSampleKeysetPagination
+from .services import get_property_statistics
+from .views import DrillHoleViewSet, DrillSampleViewSet
+
+
+def make_property(name='Test Property', **fields):
+    return Property.objects.create(name=name, description='', area_hectares=100, **fields)
+
+
+def make_hole(geo_property, hole_id, **fields):
+    return DrillHole.objects.create(
+        geo_property=geo_property, hole_id=hole_id, latitude='49.1000000', longitude='-123.1000000',
+        elevation=900, total_depth=200, azimuth=90, dip=-60, drilling_date=datetime.date(2024, 1, 1), **fields
+    )
+
+
+def make_samples(hole, count, length=2.0):
+    return DrillSample.objects.bulk_create([
+        DrillSample(drill_hole=hole, from_depth=index * length, to_depth=(index + 1) * length,
+                    gold_grade=0.5 + index, rock_type='volcanic', alteration='sericite',
+                    mineralization='disseminated pyrite')
+        for index in range(count)
+    ])
+
+
+class GeologicalTestCase(TestCase):
+    def setUp(self):
+        # Interval indexes and response caches are keyed by pk, which the test database reuses
+        cache.clear()
+
+
+class DrillSampleImporterTests(GeologicalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.geo_property = make_property()
+        self.first = make_hole(self.geo_property, 'DH-001')
+        # Named like the first hole's pk, so the two lookups would collide if they shared a map
+        self.named_like_pk = make_hole(self.geo_property, str(self.first.pk))
+
+    def test_hole_id_column_resolves_by_name(self):
+        summary = DrillSampleImporter(self.geo_property).run([
+            {'hole_id': str(self.first.pk), 'from_depth': '0', 'to_depth': '1'},
+        ])
+        self.assertEqual(summary['created'], 1)
+        self.assertEqual(self.named_like_pk.samples.count(), 1)
+        self.assertEqual(self.first.samples.count(), 0)
+
+    def test_drill_hole_column_resolves_by_pk(self):
+        summary = DrillSampleImporter(self.geo_property).run([
+            {'drill_hole': self.first.pk, 'from_depth': '0', 'to_depth': '1'},
+        ])
+        self.assertEqual(summary['created'], 1)
+        self.assertEqual(self.first.samples.count(), 1)
+        self.assertEqual(self.named_like_pk.samples.count(), 0)
+
+    def test_hole_name_is_not_accepted_as_drill_hole(self):
+        summary = DrillSampleImporter(self.geo_property).run([
+            {'drill_hole': 'DH-001', 'from_depth': '0', 'to_depth': '1'},
+        ])
+        self.assertEqual(summary['created'], 0)
+        self.assertEqual(summary['errors'][0]['row'], 1)
+
+
+class QueryBudgetTests(GeologicalTestCase):
+    """Reads cost a fixed number of queries however many holes a property has"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = MiningUser.objects.create_user('geologist', password='unused')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.geo_property = make_property()
+
+    def add_holes(self, count):
+        for number in range(self.geo_property.drill_holes.count(), count):
+            make_samples(make_hole(self.geo_property, f'DH-{number:03d}'), 3)
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assert_fixed_queries(self, url, expected):
+        self.add_holes(2)
+        with_two = self.count_queries(url)
+        self.add_holes(12)
+        with_many = self.count_queries(url)
+        self.assertEqual((with_two, with_many), (expected, expected))
+
+    def test_property_detail_with_expanded_holes(self):
+        url = f'/api/geological/properties/{self.geo_property.pk}/?expand=drill_holes,drill_holes.samples'
+        self.assert_fixed_queries(url, 4)
+
+    def test_property_detail(self):
+        self.assert_fixed_queries(f'/api/geological/properties/{self.geo_property.pk}/', 2)
+
+    def test_hole_list_with_samples(self):
+        url = f'/api/geological/drill-holes/?geo_property={self.geo_property.pk}&expand=samples'
+        self.assert_fixed_queries(url, 4)
+
+    def test_hole_list(self):
+        self.assert_fixed_queries(f'/api/geological/drill-holes/?geo_property={self.geo_property.pk}', 3)
+
+    def test_nested_expand_implies_parents(self):
+        self.add_holes(2)
+        url = f'/api/geological/properties/{self.geo_property.pk}/?expand=drill_holes.samples'
+        self.assertEqual(self.count_queries(url), 4)
+        holes = self.client.get(url).json()['drill_holes']
+        self.assertEqual(len(holes), 2)
+        self.assertEqual([len(hole['samples']) for hole in holes], [3, 3])
+
+
+@override_settings(ANALYSIS_JOBS_LOCAL=True)
+class BlockModelJobTests(GeologicalTestCase):
+    def setUp(self):
+        super().setUp()
+        arrays = tempfile.TemporaryDirectory()
+        self.addCleanup(arrays.cleanup)
+        settings_override = override_settings(GEOLOGICAL_ARRAY_ROOT=arrays.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # Derived arrays are cached per (property pk, data version), and the test database reuses pks
+        for lru in (sample_arrays._sample_arrays, compositing._composites, desurvey._coordinates):
+            lru.items.clear()
+
+        self.user = MiningUser.objects.create_user('geologist', password='unused')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.geo_property = make_property(latitude='49.1000000', longitude='-123.1000000')
+        for number in range(3):
+            make_samples(make_hole(self.geo_property, f'DH-{number:03d}'), 10)
+        self.url = f'/api/geological/properties/{self.geo_property.pk}/block-model/'
+        self.parameters = {'block_size': '20,20,20', 'search_radii': '200,200,200'}
+
+    def post(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(self.url, self.parameters, format='json')
+        return response, callbacks
+
+    def test_post_queues_the_build_instead_of_running_it(self):
+        response, callbacks = self.post()
+        self.assertEqual(response.status_code, 202)
+        job = AnalysisJob.objects.get(pk=response.json()['id'])
+        self.assertEqual(response['Location'], response.json()['url'])
+        self.assertEqual((job.analysis_type, job.status), ('block_model', AnalysisJob.QUEUED))
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(self.client.get(self.url).json()['results'], [])
+
+        # A second request while the job is queued reuses it
+        again, callbacks = self.post()
+        self.assertEqual((again.status_code, again.json()['id'], len(callbacks)), (202, str(job.pk), 0))
+
+        run_job(job.pk)
+        status_payload = self.client.get(response['Location']).json()
+        self.assertEqual(status_payload['status'], AnalysisJob.SUCCEEDED)
+        metadata = self.client.get(status_payload['model_url']).json()
+        self.assertEqual(metadata['model'], status_payload['model'])
+        self.assertGreater(metadata['estimated_blocks'], 0)
+
+        built, callbacks = self.post()
+        self.assertEqual((built.status_code, built.json()['model'], len(callbacks)), (200, metadata['model'], 0))
+
+    def test_lost_job_is_failed_instead_of_reused(self):
+        response, _ = self.post()
+        lost = AnalysisJob.objects.get(pk=response.json()['id'])
+        AnalysisJob.objects.filter(pk=lost.pk).update(
+            status=AnalysisJob.RUNNING, started_at=timezone.now() - datetime.timedelta(hours=2),
+        )
+        again, callbacks = self.post()
+        self.assertEqual((again.status_code, len(callbacks)), (202, 1))
+        self.assertNotEqual(again.json()['id'], str(lost.pk))
+        lost.refresh_from_db()
+        self.assertEqual(lost.status, AnalysisJob.FAILED)
+
+    def test_invalid_parameters_are_rejected_before_queueing(self):
+        self.parameters['block_size'] = 'a,b,c'
+        response, callbacks = self.post()
+        self.assertEqual((response.status_code, len(callbacks)), (400, 0))
+        self.assertFalse(AnalysisJob.objects.exists())
+
+
+class EstimateBlocksTests(TestCase):
+    def test_process_pool_matches_a_single_process(self):
+        rng = np.random.default_rng(0)
+        points, values = rng.uniform(0, 100, (200, 3)), rng.uniform(0, 5, 200)
+        grid = {'shape': (10, 10, 10), 'block_size': [10.0, 10.0, 10.0], 'power': 2.0,
+                'transform': ellipsoid_transform([40, 40, 40], 0, 0), 'max_samples': 8, 'min_samples': 2}
+        with tempfile.TemporaryDirectory() as directory:
+            estimates = []
+            for workers in (1, 2):
+                path = f'{directory}/grades-{workers}.npy'
+                np.save(path, np.full(grid['shape'], np.nan, dtype=np.float32))
+                estimate_blocks(points, values, grid, path, chunk_size=300, workers=workers)
+                estimates.append(np.load(path))
+        np.testing.assert_array_equal(*estimates)
+        self.assertTrue(np.isfinite(estimates[0]).any())
+
+
+class SampleOverlapTests(GeologicalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.hole = make_hole(make_property(), 'DH-001')
+        make_samples(self.hole, 2)
+        # Cache the index, then add a sample without signals, as another worker's write looks to this process
+        get_hole_intervals([self.hole.pk])
+        DrillSample.objects.bulk_create([DrillSample(drill_hole=self.hole, from_depth=10, to_depth=12)])
+
+    def test_stale_index_does_not_let_an_overlap_through(self):
+        with self.assertRaisesMessage(ValidationError, "Sample intervals cannot overlap"):
+            DrillSample(drill_hole=self.hole, from_depth=11, to_depth=13).save()
+
+    def test_clean_checks_overlaps_with_one_query(self):
+        sample = DrillSample(drill_hole=self.hole, from_depth=12, to_depth=13)
+        with self.assertNumQueries(1):
+            sample.clean()
+
+    def test_importer_checks_the_database_not_the_index(self):
+        summary = DrillSampleImporter(self.hole.geo_property).run([
+            {'drill_hole': self.hole.pk, 'from_depth': '11', 'to_depth': '13'},
+            {'drill_hole': self.hole.pk, 'from_depth': '13', 'to_depth': '14'},
+        ])
+        self.assertEqual((summary['created'], [error['row'] for error in summary['errors']]), (1, [1]))
+
+    def test_adjacent_interval_is_accepted(self):
+        DrillSample(drill_hole=self.hole, from_depth=12, to_depth=13).save()
+        self.assertEqual(self.hole.samples.count(), 4)
+
+
+class PropertyStatisticsTests(GeologicalTestCase):
+    def test_rename_shows_in_cached_statistics(self):
+        geo_property = make_property('Old Name')
+        make_samples(make_hole(geo_property, 'DH-001'), 3)
+        self.assertEqual(get_property_statistics(geo_property)['total_samples'], 3)
+
+        geo_property.name = 'New Name'
+        geo_property.save()
+        geo_property.refresh_from_db()
+        with self.assertNumQueries(0):
+            stats = get_property_statistics(geo_property)
+        self.assertEqual((stats['geo_property_name'], stats['total_samples']), ('New Name', 3))
+
+
+class StreamingExportCacheTests(GeologicalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = MiningUser.objects.create_user('geologist', password='unused')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        make_samples(make_hole(make_property(), 'DH-001'), 3)
+
+    def test_export_does_not_wait_for_the_response_cache_lock(self):
+        # Another request holds the lock for every key
+        with mock.patch.object(cache, 'add', return_value=False), \
+                mock.patch.object(ResponseCacheMixin, '_wait_for', return_value=None) as wait_for:
+            for export_format in ('ndjson', 'csv'):
+                response = self.client.get(f'/api/geological/drill-samples/?format={export_format}')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(b''.join(response.streaming_content).splitlines()),
+                                 3 + (export_format == 'csv'))
+            self.assertFalse(wait_for.called)
+            self.client.get('/api/geological/drill-samples/')
+            self.assertTrue(wait_for.called)
+
+
+class SampleExportTests(GeologicalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = MiningUser.objects.create_user('geologist', password='unused')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.geo_property = make_property()
+        for hole_id in ('DH-001', 'DH-002'):
+            make_samples(make_hole(self.geo_property, hole_id), 5)
+        DrillSample.objects.filter(from_depth=2).update(gold_grade=None, rock_type='intrusive')
+
+    def assert_columns_equal(self, archive, expected):
+        self.assertEqual(sorted(archive.files), sorted(expected))
+        for name, column in expected.items():
+            np.testing.assert_array_equal(archive[name], column)
+
+    def test_chunked_columns_are_written_without_joining(self):
+        samples = DrillSample.objects.all()
+        buffer = io.BytesIO()
+        write_npz(buffer, sample_column_chunks(samples, chunk_size=3))
+        buffer.seek(0)
+        with np.load(buffer) as archive:
+            self.assert_columns_equal(archive, sample_columns(samples))
+
+    def test_property_samples_are_sent_as_a_file(self):
+        response = self.client.get(f'/api/geological/properties/{self.geo_property.pk}/samples/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn('samples.npz', response['Content-Disposition'])
+        with np.load(io.BytesIO(b''.join(response.streaming_content))) as archive:
+            self.assert_columns_equal(archive, sample_columns(DrillSample.objects.all()))
+
+
+class KeysetPaginationTests(GeologicalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = MiningUser.objects.create_user('geologist', password='unused')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        # Hole names sort opposite to their pks, which the cursor follows
+        for hole_id in ('DH-C', 'DH-B', 'DH-A'):
+            make_samples(make_hole(make_property(f'Property {hole_id}'), hole_id), 7)
+
+    def test_cursor_pages_walk_every_sample_once_in_index_order(self):
+        url, seen = '/api/geological/drill-samples/?pagination=cursor&page_size=4', []
+        while url:
+            page = self.client.get(url).json()
+            seen.extend(sample['id'] for sample in page['results'])
+            url = page['next']
+        expected = DrillSample.objects.order_by('drill_hole_id', 'from_depth', 'id').values_list('id', flat=True)
+        self.assertEqual(seen, list(expected))
+
+    @unittest.skipUnless(connection.vendor == 'sqlite', "Reads SQLite's query plan")
+    def test_cursor_page_is_an_index_scan_without_a_sort(self):
+        paginator = DrillSampleKeysetPagination()
+        first = DrillSample.objects.order_by('drill_hole_id', 'from_depth', 'id').first()
+        queryset = (DrillSample.objects.order_by(*paginator.ordering)
+                    .filter(paginator.keyset_filter(paginator.key_of(first), False))[:21])
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('sample_hole_depth_id_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+
+class FastListParityTests(GeologicalTestCase):
+    """The values() list path renders byte-identical responses to the serializer path"""
+
+    # Query strings checked on each list endpoint; {property} and {hole} are filled in
+    CASES = {
+        DrillHoleViewSet: ('/api/geological/drill-holes/', [
+            '',
+            'page=2',
+            'geo_property={property}',
+            'fields=id,hole_id,geo_property_name',
+            'fields=sample_count,average_gold_grade',
+            'expand=samples&geo_property={property}',
+            'expand=samples&fields=hole_id,samples.from_depth,samples.gold_grade',
+            'fields=hole_id,samples.interval_length,samples.midpoint_depth',
+        ]),
+        DrillSampleViewSet: ('/api/geological/drill-samples/', [
+            '',
+            'page=3',
+            'page_size=100',
+            'drill_hole={hole}',
+            'geo_property={property}&min_gold_grade=1',
+            'fields=id,interval_length,midpoint_depth',
+            'fields=drill_hole,gold_grade,silver_grade,copper_grade',
+            'pagination=cursor&count=exact',
+            'pagination=cursor&count=none&page_size=500',
+        ]),
+    }
+
+    def setUp(self):
+        super().setUp()
+        self.user = MiningUser(username='read-parity', is_staff=True)
+        for property_number in range(2):
+            geo_property = make_property(f'Property {property_number}')
+            for hole_number in range(12):
+                hole = make_hole(geo_property, f'DH-{hole_number:03d}')
+                samples = make_samples(hole, 5 + hole_number)
+                # Unassayed intervals render as null on both paths
+                DrillSample.objects.filter(pk__in=[sample.pk for sample in samples[::4]]).update(
+                    gold_grade=None, silver_grade=2.5,
+                )
+        self.geo_property = geo_property
+        self.hole = hole
+
+    def test_fast_list_matches_serializer_list(self):
+        factory = APIRequestFactory()
+        # Caching and conditional GET are off so both paths really run
+        options = {'cached_actions': (), 'conditional_actions': ()}
+        for viewset, (path, queries) in self.CASES.items():
+            slow_view = viewset.as_view({'get': 'list'}, fast_list=False, **options)
+            fast_view = viewset.as_view({'get': 'list'}, **options)
+            for query in queries:
+                query = query.format(property=self.geo_property.pk, hole=self.hole.pk)
+                url = f'{path}?{query}' if query else path
+
+                def fetch(view):
+                    request = factory.get(url, HTTP_ACCEPT='application/json')
+                    force_authenticate(request, user=self.user)
+                    return view(request).render()
+
+                with self.subTest(url=url):
+                    slow = fetch(slow_view)
+                    # A fall back to the serializer would make the comparison meaningless
+                    with mock.patch.object(RowMapper, 'map_rows', autospec=True,
+                                           side_effect=RowMapper.map_rows) as map_rows:
+                        fast = fetch(fast_view)
+                    self.assertTrue(map_rows.called)
+                    self.assertEqual(slow.status_code, 200)
+                    self.assertEqual(fast.status_code, slow.status_code)
+                    self.assertEqual(fast.content, slow.content)
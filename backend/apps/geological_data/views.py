@@ -1,14 +1,46 @@
+import numpy as np
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from django.db.models import Count, Avg, Max, Min
+from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.settings import api_settings
+from django.db.models import Count, Avg, Max, Min, Prefetch
 from .models import *
 from .serializers import *
+from .importers import DrillSampleImporter, guess_format, open_text, read_rows
+from .exports import StreamingExportMixin, npz_response, sample_column_chunks
+from .fast_read import FastListMixin
+from .renderers import NPZRenderer
+from .pagination import DrillSampleKeysetPagination
+from .services import get_property_statistics
+from .spatial import SpatialQueryMixin
+from .conditional import ConditionalGetMixin, properties_of_holes, properties_of_samples
+from mining_ai_project.cache import ResponseCacheMixin
+from apps.ai_analysis.jobs import submit_or_reuse_job
+from apps.ai_analysis.views import job_accepted
+from .compositing import composite_records, get_property_composites
+from .intercepts import find_intercepts, intercept_records
+from .desurvey import get_sample_coordinates
+from .grade_tonnage import get_block_model_curve, get_sample_curve
+from .interval_index import get_hole_intervals
+from .block_model import (
+    bench_index, clean_parameters, list_models, load_metadata, model_id, open_model, region_slices,
+)
+from .sample_arrays import GRADE_COLUMNS, column_records, load_property_samples
 
-class PropertyViewSet(viewsets.ModelViewSet):
+# Largest block model slice returned as JSON
+MAX_JSON_BLOCKS = 250000
+MAX_WINDOW_HOLES = 500
+
+class PropertyViewSet(ResponseCacheMixin, ConditionalGetMixin, SpatialQueryMixin, viewsets.ModelViewSet):
     queryset = Property.objects.all()
     permission_classes = [IsAuthenticated]
+    conditional_actions = ('list', 'retrieve', 'statistics', 'samples', 'composites', 'intercepts',
+                           'coordinates', 'grade_tonnage')
+    # Sample exports are sent as files, which the response cache cannot hold
+    cached_actions = tuple(action for action in conditional_actions if action != 'samples')
+    cache_namespace = 'geological'
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -16,9 +48,18 @@ class PropertyViewSet(viewsets.ModelViewSet):
         return PropertyListSerializer
     
     def get_queryset(self):
-        queryset = Property.objects.annotate(
-            drill_hole_count = Count('drill_holes')
-        ).order_by('name')
+        queryset = Property.objects.order_by('name')
+        if self.action == 'list' or self.action in self.spatial_actions:
+            queryset = queryset.annotate(drill_hole_count=Count('drill_holes'))
+        elif self.action == 'retrieve' and is_expanded(self.request, 'drill_holes'):
+            # Holes (and their samples) are only loaded when ?expand= asks for them
+            drill_holes = DrillHole.objects.all()
+            if (field_requested(self.request, 'drill_holes', 'sample_count')
+                    or field_requested(self.request, 'drill_holes', 'average_gold_grade')):
+                drill_holes = DrillHole.annotate_sample_stats(drill_holes)
+            if is_expanded(self.request, 'drill_holes.samples'):
+                drill_holes = drill_holes.prefetch_related('samples')
+            queryset = queryset.prefetch_related(Prefetch('drill_holes', queryset=drill_holes))
 
         # filter by exploration stage
         stage = self.request.query_params.get('stage')
@@ -31,79 +72,357 @@ class PropertyViewSet(viewsets.ModelViewSet):
             queryset = queryset.request.query_params.get(commodity_focus__contains=[commodity])
 
         return queryset
+
+    def get_validator_queryset(self):
+        if self.detail:
+            return Property.objects.filter(pk=self.kwargs['pk'])
+        return Property.objects.all()
     
     @action(detail=True, methods=['get'])
     def statistics(self, request, pk=None):
         """Get detailed statistics for a property"""
         geo_property_obj = self.get_object()
+        return Response(get_property_statistics(geo_property_obj))
+
+    @action(detail=True, methods=['post'], url_path='import-samples',
+            parser_classes=[MultiPartParser, FormParser])
+    def import_samples(self, request, pk=None):
+        """Bulk import assay intervals from an uploaded CSV or NDJSON file"""
+        geo_property_obj = self.get_object()
+
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'Upload a CSV or NDJSON file as "file"'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        file_format = request.data.get('file_format') or guess_format(upload.name)
+        if file_format not in ('csv', 'ndjson'):
+            return Response({'error': 'file_format must be "csv" or "ndjson"'},
+                            status=status.HTTP_400_BAD_REQUEST)
 
-        # get all samples for this property
+        importer = DrillSampleImporter(geo_property_obj)
+        summary = importer.run(read_rows(open_text(upload), file_format))
+
+        response_status = status.HTTP_201_CREATED if summary['created'] else status.HTTP_200_OK
+        return Response(summary, status=response_status)
+
+    @action(detail=True, methods=['get'], renderer_classes=[NPZRenderer])
+    def samples(self, request, pk=None, format=None):
+        """Export every sample of a property as typed columns (samples.npz)"""
+        geo_property_obj = self.get_object()
         samples = DrillSample.objects.filter(drill_hole__geo_property=geo_property_obj)
+        return npz_response(sample_column_chunks(samples), 'samples.npz')
 
-        # Calculate statistics
-        stats = {
-            'geo_property_name': geo_property_obj.name,
-            'total_drill_holes': geo_property_obj.drill_holes.count(),
-            'total_samples': samples.count(),
-            'total_meters': samples.aggregate(
-                total=models.Sum(models.F('to_depth') - models.F('from_depth'))
-            )['total'] or 0,
-        }
-        
-        # Gold grade statistics
-        gold_samples = samples.filter(gold_grade__isnull=False)
-        if gold_samples.exists():
-            gold_stats = gold_samples.aggregate(
-                avg_grade=Avg('gold_grade'),
-                max_grade=Max('gold_grade'),
-                min_grade=Min('gold_grade'),
-                count=Count('id')
-            )
-            stats['gold_statistics'] = gold_stats
-        
-        # Silver grade statistics
-        silver_samples = samples.filter(silver_grade__isnull=False)
-        if silver_samples.exists():
-            silver_stats = silver_samples.aggregate(
-                avg_grade=Avg('silver_grade'),
-                max_grade=Max('silver_grade'),
-                min_grade=Min('silver_grade'),
-                count=Count('id')
-            )
-            stats['silver_statistics'] = silver_stats
-        
-        # Copper grade statistics
-        copper_samples = samples.filter(copper_grade__isnull=False)
-        if copper_samples.exists():
-            copper_stats = copper_samples.aggregate(
-                avg_grade=Avg('copper_grade'),
-                max_grade=Max('copper_grade'),
-                min_grade=Min('copper_grade'),
-                count=Count('id')
-            )
-            stats['copper_statistics'] = copper_stats
-        
-        return Response(stats)
-    
-class DrillHoleViewSet(viewsets.ModelViewSet):
-    queryset = DrillHole.objects.select_related('geo_property').prefetch_related('samples')
+    @action(detail=True, methods=['get'],
+            renderer_classes=[*api_settings.DEFAULT_RENDERER_CLASSES, NPZRenderer])
+    def composites(self, request, pk=None, format=None):
+        """Composite every hole of a property to fixed run lengths
+
+        ?length= run length in metres (default 1), ?min_coverage= fraction of a
+        run that must be sampled (default 0.5), ?gold_grade_top_cut= (and the
+        silver/copper equivalents) caps grades before averaging.
+        """
+        geo_property_obj = self.get_object()
+        params = request.query_params
+        try:
+            length = float(params.get('length', 1))
+            min_coverage = float(params.get('min_coverage', 0.5))
+            top_cuts = {name: float(params[f'{name}_top_cut'])
+                        for name in GRADE_COLUMNS if params.get(f'{name}_top_cut')}
+        except ValueError:
+            return Response({'error': 'length, min_coverage and top cuts must be numbers'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            composites = get_property_composites(geo_property_obj, length, top_cuts, min_coverage)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if request.accepted_renderer.format == 'npz':
+            return Response(composites)
+        records = composite_records(composites)
+        return Response({
+            'length': length,
+            'min_coverage': min_coverage,
+            'top_cuts': top_cuts,
+            'count': len(records),
+            'results': records,
+        })
+
+    @action(detail=True, methods=['get'],
+            renderer_classes=[*api_settings.DEFAULT_RENDERER_CLASSES, NPZRenderer])
+    def intercepts(self, request, pk=None, format=None):
+        """Significant intercepts for every hole of a property
+
+        ?grade= grade column (default gold_grade), ?cutoff= (default 0.5),
+        ?min_width= metres (default 1), ?max_dilution= consecutive metres below
+        cutoff allowed inside an intercept (default 0), and optionally
+        ?including_cutoff= / ?including_min_width= for high-grade sub-intervals.
+        """
+        geo_property_obj = self.get_object()
+        params = request.query_params
+        grade_column = params.get('grade', 'gold_grade')
+        try:
+            options = {
+                'cutoff': float(params.get('cutoff', 0.5)),
+                'min_width': float(params.get('min_width', 1)),
+                'max_dilution': float(params.get('max_dilution', 0)),
+                'including_cutoff': float(params['including_cutoff']) if params.get('including_cutoff') else None,
+                'including_min_width': (float(params['including_min_width'])
+                                        if params.get('including_min_width') else None),
+            }
+        except ValueError:
+            return Response({'error': 'cutoff, widths and dilution must be numbers'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            intercepts = find_intercepts(load_property_samples(geo_property_obj), grade_column, **options)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if request.accepted_renderer.format == 'npz':
+            return Response(intercepts)
+        records = intercept_records(intercepts, grade_column)
+        return Response({'grade': grade_column, **options, 'count': len(records), 'results': records})
+
+    @action(detail=True, methods=['get'],
+            renderer_classes=[*api_settings.DEFAULT_RENDERER_CLASSES, NPZRenderer])
+    def coordinates(self, request, pk=None, format=None):
+        """Desurveyed sample midpoints in the property's UTM zone (EPSG code in "epsg")"""
+        geo_property_obj = self.get_object()
+        coordinates = get_sample_coordinates(geo_property_obj)
+        if request.accepted_renderer.format == 'npz':
+            return Response(coordinates)
+
+        arrays = load_property_samples(geo_property_obj)
+        records = column_records([
+            ('drill_hole', arrays.hole_pk[arrays.hole]),
+            ('hole_id', arrays.hole_names[arrays.hole]),
+            ('from_depth', arrays.from_depth),
+            ('to_depth', arrays.to_depth),
+            ('x', coordinates['x']),
+            ('y', coordinates['y']),
+            ('z', coordinates['z']),
+        ])
+        return Response({'epsg': int(coordinates['epsg']), 'count': len(records), 'results': records})
+
+    @action(detail=True, methods=['get', 'post'], url_path='block-model',
+            renderer_classes=[*api_settings.DEFAULT_RENDERER_CLASSES, NPZRenderer])
+    def block_model(self, request, pk=None, format=None):
+        """Build an IDW block model (POST) or list and slice built models (GET)
+
+        POST returns a model already built with the same parameters, and
+        otherwise queues the build as an analysis job and answers 202 with
+        the job's status URL, which links to the model once it has been
+        built. GET without ?model= lists the models built for the current data.
+        With ?model=, give ?bench= (index), ?elevation= or
+        ?region=xmin,ymin,zmin,xmax,ymax,zmax to read part of the grid.
+        """
+        geo_property_obj = self.get_object()
+        if request.method == 'POST':
+            try:
+                parameters = clean_parameters(request.data)
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            existing = load_metadata(geo_property_obj, model_id(parameters))
+            if existing:
+                return Response(existing)
+            # Large grids take minutes, so the build runs on the analysis workers
+            return job_accepted(request, submit_or_reuse_job(request.user, 'block_model', geo_property_obj,
+                                                             parameters))
+
+        identifier = request.query_params.get('model')
+        if not identifier:
+            return Response({'results': list_models(geo_property_obj)})
+        metadata = load_metadata(geo_property_obj, identifier)
+        grid = open_model(geo_property_obj, identifier)
+        if metadata is None or grid is None:
+            return Response({'error': 'Block model not found for the current data'},
+                            status=status.HTTP_404_NOT_FOUND)
+
+        params = request.query_params
+        try:
+            if params.get('region'):
+                bounds = [float(part) for part in params['region'].split(',')]
+                if len(bounds) != 6:
+                    raise ValueError
+                slices = region_slices(metadata, bounds)
+            elif params.get('bench') or params.get('elevation'):
+                bench = (int(params['bench']) if params.get('bench')
+                         else bench_index(metadata, float(params['elevation'])))
+                if not 0 <= bench < metadata['shape'][0]:
+                    return Response({'error': 'Bench is outside the model'}, status=status.HTTP_400_BAD_REQUEST)
+                slices = (slice(bench, bench + 1), slice(None), slice(None))
+            else:
+                return Response(metadata)
+        except ValueError:
+            return Response({'error': 'bench must be an integer, elevation a number and region six numbers'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        grades = np.array(grid[slices])
+        start = [s.indices(n)[0] for s, n in zip(slices, metadata['shape'])]
+        origin = [metadata['origin'][axis] + start[2 - axis] * metadata['block_size'][axis] for axis in range(3)]
+        if request.accepted_renderer.format == 'npz':
+            return Response({'grade': grades, 'origin': np.array(origin),
+                             'block_size': np.array(metadata['block_size'])})
+        if grades.size > MAX_JSON_BLOCKS:
+            return Response({'error': f'Slices over {MAX_JSON_BLOCKS:,} blocks are only available as ?format=npz'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        values = grades.astype(object)
+        values[np.isnan(grades)] = None
+        return Response({
+            'model': identifier,
+            'origin': origin,
+            'block_size': metadata['block_size'],
+            'shape': list(grades.shape),
+            'grades': values.tolist(),
+        })
+
+    @action(detail=True, methods=['get'], url_path='grade-tonnage',
+            renderer_classes=[*api_settings.DEFAULT_RENDERER_CLASSES, NPZRenderer])
+    def grade_tonnage(self, request, pk=None, format=None):
+        """Weight, metal and mean grade above one or more cutoffs
+
+        ?cutoffs=a,b,c or ?steps= evenly spaced cutoffs up to the top grade
+        (default 100). By default the curve covers the assayed samples of
+        ?grade= weighted by length in metres; with ?model= it covers that
+        block model's blocks weighted by tonnes at ?density= (default 2.7).
+        """
+        geo_property_obj = self.get_object()
+        params = request.query_params
+        grade_column = params.get('grade', 'gold_grade')
+        identifier = params.get('model')
+        try:
+            cutoffs = [float(part) for part in params['cutoffs'].split(',')] if params.get('cutoffs') else None
+            steps = int(params.get('steps', 100))
+            density = float(params.get('density', 2.7))
+        except ValueError:
+            return Response({'error': 'cutoffs and density must be numbers and steps an integer'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not 2 <= steps <= 1000 or not density > 0:
+            return Response({'error': 'steps must be between 2 and 1000 and density positive'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if grade_column not in GRADE_COLUMNS:
+            return Response({'error': f'Unknown grade column: {grade_column}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if identifier:
+            metadata = load_metadata(geo_property_obj, identifier)
+            curve = get_block_model_curve(geo_property_obj, identifier, density) if metadata else None
+            if curve is None:
+                return Response({'error': 'Block model not found for the current data'},
+                                status=status.HTTP_404_NOT_FOUND)
+            grade_column = metadata['parameters']['grade']
+            unit = 't'
+        else:
+            curve = get_sample_curve(geo_property_obj, grade_column)
+            unit = 'm'
+
+        curve_values = curve.above(cutoffs if cutoffs is not None else curve.default_cutoffs(steps))
+        if request.accepted_renderer.format == 'npz':
+            return Response(curve_values)
+        records = column_records(list(curve_values.items()))
+        return Response({
+            'source': 'block_model' if identifier else 'samples',
+            'grade': grade_column,
+            'weight_unit': unit,
+            'count': len(records),
+            'results': records,
+        })
+
+class DrillHoleViewSet(ResponseCacheMixin, ConditionalGetMixin, FastListMixin, SpatialQueryMixin,
+                       StreamingExportMixin, viewsets.ModelViewSet):
+    queryset = DrillHole.objects.select_related('geo_property')
     serializer_class = DrillHoleSerializer
     permission_classes = [IsAuthenticated]
+    conditional_actions = ('list', 'retrieve', 'samples', 'gaps')
+    cached_actions = ('list', 'retrieve', 'gaps')
+    cache_namespace = 'geological'
+    export_filename = 'drill-holes'
+    export_fields = [
+        ('id', 'id'), ('hole_id', 'hole_id'), ('geo_property', 'geo_property_id'),
+        ('geo_property_name', 'geo_property__name'), ('latitude', 'latitude'),
+        ('longitude', 'longitude'), ('elevation', 'elevation'), ('total_depth', 'total_depth'),
+        ('azimuth', 'azimuth'), ('dip', 'dip'), ('drilling_date', 'drilling_date'),
+    ]
 
     def get_queryset(self):
         queryset = self.queryset
+        if self.action in ('list', 'retrieve', *self.spatial_actions) and not self.is_streaming_export():
+            if (field_requested(self.request, '', 'sample_count')
+                    or field_requested(self.request, '', 'average_gold_grade')):
+                queryset = DrillHole.annotate_sample_stats(queryset)
+            if is_expanded(self.request, 'samples'):
+                queryset = queryset.prefetch_related('samples')
 
         #Filter by property
         geo_property_id = self.request.query_params.get('geo_property')
         if geo_property_id:
             queryset = queryset.filter(geo_property_id=geo_property_id)
         return queryset.order_by('geo_property__name', 'hole_id')
+
+    def get_validator_queryset(self):
+        if self.detail:
+            return properties_of_holes([self.kwargs['pk']])
+        geo_property_id = self.request.query_params.get('geo_property')
+        if geo_property_id:
+            return Property.objects.filter(pk=geo_property_id)
+        return Property.objects.all()
+
+    @action(detail=True, methods=['get'], renderer_classes=[NPZRenderer])
+    def samples(self, request, pk=None, format=None):
+        """Export the samples of one drill hole as typed columns (samples.npz)"""
+        drill_hole = self.get_object()
+        samples = DrillSample.objects.filter(drill_hole=drill_hole)
+        return npz_response(sample_column_chunks(samples), 'samples.npz')
+
+    @action(detail=True, methods=['get'])
+    def gaps(self, request, pk=None):
+        """Unsampled depth ranges from the collar to total depth, longer than ?min_gap= metres"""
+        drill_hole = self.get_object()
+        try:
+            min_gap = float(request.query_params.get('min_gap', 0))
+        except ValueError:
+            return Response({'error': 'min_gap must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        intervals = get_hole_intervals([drill_hole.pk])[drill_hole.pk]
+        gaps = [
+            {'from_depth': start, 'to_depth': end, 'length': end - start}
+            for start, end in intervals.gaps(drill_hole.total_depth, min_gap)
+        ]
+        return Response({
+            'drill_hole': drill_hole.pk,
+            'total_depth': drill_hole.total_depth,
+            'sample_count': len(intervals),
+            'unsampled_length': sum(gap['length'] for gap in gaps),
+            'gaps': gaps,
+        })
     
 
-class DrillSampleViewSet(viewsets.ModelViewSet):
+class DrillSampleViewSet(ResponseCacheMixin, ConditionalGetMixin, FastListMixin, StreamingExportMixin,
+                         viewsets.ModelViewSet):
     queryset = DrillSample.objects.select_related('drill_hole__geo_property')
     serializer_class = DrillSampleSerializer
     permission_classes = [IsAuthenticated]
+    conditional_actions = ('list', 'retrieve', 'depth_window')
+    cached_actions = conditional_actions
+    cache_namespace = 'geological'
+    export_filename = 'drill-samples'
+    export_fields = [
+        ('id', 'id'), ('geo_property', 'drill_hole__geo_property_id'),
+        ('drill_hole', 'drill_hole_id'), ('hole_id', 'drill_hole__hole_id'),
+        ('from_depth', 'from_depth'), ('to_depth', 'to_depth'),
+        ('gold_grade', 'gold_grade'), ('silver_grade', 'silver_grade'),
+        ('copper_grade', 'copper_grade'), ('rock_type', 'rock_type'),
+        ('alteration', 'alteration'), ('mineralization', 'mineralization'),
+    ]
+
+    @property
+    def paginator(self):
+        """Use keyset pagination with ?pagination=cursor (or once a cursor is given)"""
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if params.get('pagination') == 'cursor' or 'cursor' in params:
+                self._paginator = DrillSampleKeysetPagination()
+            else:
+                self._paginator = self.pagination_class() if self.pagination_class else None
+        return self._paginator
     
     def get_queryset(self):
         queryset = self.queryset
@@ -128,3 +447,50 @@ class DrillSampleViewSet(viewsets.ModelViewSet):
                 pass
                 
         return queryset.order_by('drill_hole__geo_property__name', 'drill_hole__hole_id', 'from_depth')
+
+    def get_validator_queryset(self):
+        params = self.request.query_params
+        if self.detail:
+            return properties_of_samples([self.kwargs['pk']])
+        if self.action == 'depth_window':
+            return properties_of_holes([int(part) for part in params.get('drill_holes', '').split(',')
+                                        if part.strip()])
+        if params.get('drill_hole'):
+            return properties_of_holes([params['drill_hole']])
+        if params.get('geo_property'):
+            return Property.objects.filter(pk=params['geo_property'])
+        return Property.objects.all()
+
+    @action(detail=False, methods=['get'], url_path='depth-window')
+    def depth_window(self, request):
+        """Samples overlapping ?from_depth=..?to_depth= in each of ?drill_holes=1,2,3
+
+        Intervals are looked up in the cached per-hole index and only the
+        page of matching samples is read from the database. Results are in
+        the order the holes were given, then by depth.
+        """
+        params = request.query_params
+        try:
+            drill_hole_ids = [int(part) for part in params.get('drill_holes', '').split(',') if part.strip()]
+            start = float(params.get('from_depth', 0))
+            end = float(params['to_depth']) if params.get('to_depth') else float('inf')
+        except ValueError:
+            return Response({'error': 'drill_holes must be ids and depths numbers'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not drill_hole_ids or len(drill_hole_ids) > MAX_WINDOW_HOLES:
+            return Response({'error': f'Give between 1 and {MAX_WINDOW_HOLES} drill_holes'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not end > start:
+            return Response({'error': 'to_depth must be greater than from_depth'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        indexes = get_hole_intervals(drill_hole_ids)
+        sample_ids = np.concatenate([
+            indexes[pk].ids[indexes[pk].window(start, end)] for pk in dict.fromkeys(drill_hole_ids)
+        ]).tolist()
+        # Page numbers over the id list; keyset cursors need a queryset
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(sample_ids, request, view=self)
+        samples = self.queryset.in_bulk(page)
+        serializer = self.get_serializer([samples[pk] for pk in page if pk in samples], many=True)
+        return paginator.get_paginated_response(serializer.data)
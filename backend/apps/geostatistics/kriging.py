@@ -0,0 +1,80 @@
+# backend/apps/geostatistics/kriging.py
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from .variogram import evaluate
+
+# Memory for one batch of kriging systems; a target's system, neighbour
+# separations and their temporaries take about 64 bytes per matrix entry
+KRIGING_CHUNK_BYTES = 64 * 1024 * 1024
+
+
+def chunk_size_for(max_samples: int, budget: int = KRIGING_CHUNK_BYTES) -> int:
+    """Targets per batch so that batches of ``max_samples`` neighbours stay within budget"""
+    return max(1, budget // (64 * (max_samples + 1) ** 2))
+
+
+def ordinary_kriging(points: np.ndarray, values: np.ndarray, targets: np.ndarray, model: Dict,
+                     max_samples: int = 16, min_samples: int = 2,
+                     search_radius: Optional[float] = None,
+                     chunk_size: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Ordinary kriging estimate and variance at each target point
+
+    Neighbours come from a KD-tree search (``max_samples`` nearest within
+    ``search_radius``). The kriging systems of a chunk of targets are padded
+    to the same size and solved together: a missing neighbour gets an
+    identity row, so its weight is zero. Without ``chunk_size`` the batch
+    size follows from ``max_samples`` and KRIGING_CHUNK_BYTES. Coordinates should already be
+    scaled so that distances are isotropic for ``model``. Targets with fewer
+    than ``min_samples`` neighbours get NaN.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    targets = np.asarray(targets, dtype=np.float64)
+    tree = cKDTree(points)
+    total_sill = model['nugget'] + model['sill']
+    padded_points = np.vstack([points, np.zeros((1, 3))])
+    padded_values = np.r_[values, 0.0]
+    size = max_samples
+    chunk_size = chunk_size or chunk_size_for(max_samples)
+
+    estimate = np.full(len(targets), np.nan)
+    variance = np.full(len(targets), np.nan)
+
+    for start in range(0, len(targets), chunk_size):
+        chunk = targets[start:start + chunk_size]
+        distance, neighbour = tree.query(chunk, k=list(range(1, size + 1)),
+                                         distance_upper_bound=search_radius or np.inf)
+        found = np.isfinite(distance)
+        count = found.sum(axis=1)
+
+        neighbours = padded_points[neighbour]
+        separation = np.linalg.norm(neighbours[:, :, None, :] - neighbours[:, None, :, :], axis=-1)
+        both = found[:, :, None] & found[:, None, :]
+
+        system = np.zeros((len(chunk), size + 1, size + 1))
+        system[:, :size, :size] = np.where(both, total_sill - evaluate(model, separation), 0.0)
+        system[:, :size, size] = found
+        system[:, size, :size] = found
+        missing_row, missing_slot = np.nonzero(~found)
+        system[missing_row, missing_slot, missing_slot] = 1.0
+
+        right = np.zeros((len(chunk), size + 1))
+        right[:, :size] = np.where(found, total_sill - evaluate(model, np.where(found, distance, 0.0)), 0.0)
+        right[:, size] = 1.0
+
+        try:
+            weights = np.linalg.solve(system, right[..., None])[..., 0]
+        except np.linalg.LinAlgError:
+            # Coincident samples without a nugget make some systems singular
+            weights = (np.linalg.pinv(system) @ right[..., None])[..., 0]
+
+        chunk_estimate = (weights[:, :size] * padded_values[neighbour]).sum(axis=1)
+        chunk_variance = total_sill - (weights[:, :size] * right[:, :size]).sum(axis=1) - weights[:, size]
+        enough = count >= min_samples
+        estimate[start:start + len(chunk)] = np.where(enough, chunk_estimate, np.nan)
+        variance[start:start + len(chunk)] = np.where(enough, np.maximum(chunk_variance, 0.0), np.nan)
+
+    return estimate, variance
@@ -0,0 +1,276 @@
+# backend/apps/geostatistics/services.py
+import hashlib
+import json
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from django.core.cache import cache
+
+from apps.geological_data.array_store import ArrayStore
+from apps.geological_data.block_model import grid_for_points
+from apps.geological_data.compositing import get_property_composites
+from apps.geological_data.desurvey import desurvey_depths, get_sample_coordinates
+from apps.geological_data.interpolation import block_centres, ellipsoid_transform
+from apps.geological_data.models import Property
+from apps.geological_data.sample_arrays import GRADE_COLUMNS, load_property_samples
+
+from .kriging import ordinary_kriging
+from .variogram import VARIOGRAM_MODELS, experimental_variogram, fit_variogram
+
+VARIOGRAM_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+# Kriging solves a system per block, so its grids are kept smaller than block models
+MAX_KRIGING_BLOCKS = 2_000_000
+
+_store = ArrayStore()
+
+
+def parameter_hash(parameters: Dict) -> str:
+    """Identifier of a variogram or kriging result within a data version"""
+    return hashlib.sha1(json.dumps(parameters, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+
+def _number(data: Dict, name: str, default, cast=float):
+    value = data.get(name)
+    if value in (None, ''):
+        return default
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a number")
+
+
+def _common_parameters(data: Dict) -> Dict:
+    grade = data.get('grade') or 'gold_grade'
+    if grade not in GRADE_COLUMNS:
+        raise ValueError(f"Unknown grade column: {grade}")
+    composite_length = _number(data, 'composite_length', None)
+    if composite_length is not None and not composite_length > 0:
+        raise ValueError("composite_length must be positive")
+    return {'grade': grade, 'composite_length': composite_length}
+
+
+def _anisotropy_parameters(data: Dict) -> list:
+    azimuth = _number(data, 'azimuth', 0.0)
+    dip = _number(data, 'dip', 0.0)
+    semi_ratio = _number(data, 'semi_ratio', 1.0)
+    minor_ratio = _number(data, 'minor_ratio', semi_ratio)
+    if not 0 < minor_ratio <= semi_ratio <= 1:
+        raise ValueError("Anisotropy ratios must satisfy 0 < minor_ratio <= semi_ratio <= 1")
+    return [azimuth, dip, semi_ratio, minor_ratio]
+
+
+def clean_variogram_parameters(data: Dict) -> Dict:
+    """Validate variogram request parameters, raising ValueError
+
+    ``directions`` is a comma separated list of ``azimuth/dip`` pairs; without
+    it the variogram is omnidirectional.
+    """
+    parameters = _common_parameters(data)
+    parameters.update({
+        'lag': _number(data, 'lag', None),
+        'n_lags': _number(data, 'n_lags', 15, int),
+        'tolerance': _number(data, 'tolerance', 22.5),
+        'bandwidth': _number(data, 'bandwidth', None),
+        'model': data.get('model') or 'auto',
+        'anisotropy': None,
+    })
+    if parameters['lag'] is not None and not parameters['lag'] > 0:
+        raise ValueError("lag must be positive")
+    if not 1 <= parameters['n_lags'] <= 200:
+        raise ValueError("n_lags must be between 1 and 200")
+    if not 0 < parameters['tolerance'] <= 90:
+        raise ValueError("tolerance must be between 0 and 90 degrees")
+    if parameters['model'] != 'auto' and parameters['model'] not in VARIOGRAM_MODELS:
+        raise ValueError(f"model must be auto or one of {', '.join(VARIOGRAM_MODELS)}")
+
+    directions = []
+    for part in (data.get('directions') or '').split(','):
+        if not part.strip():
+            continue
+        try:
+            azimuth, dip = (float(angle) for angle in part.split('/'))
+        except ValueError:
+            raise ValueError("directions must be azimuth/dip pairs, e.g. 0/0,90/0")
+        directions.append([azimuth, dip])
+    parameters['directions'] = directions or [None]
+    return parameters
+
+
+def sample_points(geo_property: Property, grade: str, composite_length=None) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Assayed sample (or composite) midpoints, their grades and the EPSG code"""
+    coordinates = get_sample_coordinates(geo_property)
+    if composite_length:
+        composites = get_property_composites(geo_property, composite_length)
+        midpoint = (composites['from_depth'] + composites['to_depth']) / 2
+        points = desurvey_depths(coordinates, composites['hole'], midpoint)
+        values = composites[grade]
+    else:
+        points = np.column_stack([coordinates['x'], coordinates['y'], coordinates['z']])
+        values = load_property_samples(geo_property).grades[grade]
+    assayed = ~np.isnan(values)
+    return points[assayed], values[assayed], int(coordinates['epsg'])
+
+
+def _anisotropic(points: np.ndarray, anisotropy) -> np.ndarray:
+    """Rescale coordinates so distances are measured in major-axis metres"""
+    azimuth, dip, semi_ratio, minor_ratio = anisotropy
+    return points @ ellipsoid_transform([1.0, semi_ratio, minor_ratio], azimuth, dip).T
+
+
+def _json_list(values: np.ndarray) -> list:
+    return [None if np.isnan(value) else float(value) for value in values]
+
+
+def compute_variogram(geo_property: Property, parameters: Dict) -> Dict:
+    points, values, epsg = sample_points(geo_property, parameters['grade'], parameters['composite_length'])
+    if len(points) < 2:
+        raise ValueError("The property needs at least two assayed samples")
+    if parameters['anisotropy'] is not None:
+        # Kriging fits its variogram in the same rescaled space it estimates in
+        points = _anisotropic(points, parameters['anisotropy'])
+
+    lag = parameters['lag']
+    if lag is None:
+        # Half the data extent split into n_lags bins
+        extent = float(np.linalg.norm(points.max(axis=0) - points.min(axis=0)))
+        lag = max(extent / 2 / parameters['n_lags'], 1e-3)
+
+    directions = [None if direction is None else tuple(direction) for direction in parameters['directions']]
+    experimental = experimental_variogram(points, values, lag, parameters['n_lags'], directions,
+                                          parameters['tolerance'], parameters['bandwidth'])
+    results = []
+    for entry in experimental:
+        results.append({
+            'azimuth': entry['azimuth'],
+            'dip': entry['dip'],
+            'lags': _json_list(entry['lags']),
+            'gamma': _json_list(entry['gamma']),
+            'pairs': entry['pairs'].tolist(),
+            'fit': fit_variogram(entry['lags'], entry['gamma'], entry['pairs'], parameters['model']),
+        })
+    return {
+        'property': geo_property.pk,
+        'data_version': geo_property.data_version,
+        'grade': parameters['grade'],
+        'samples': len(values),
+        'variance': float(np.var(values)),
+        'lag': lag,
+        'epsg': epsg,
+        'directions': results,
+    }
+
+
+def _variogram_key(geo_property: Property, identifier: str) -> str:
+    return f'geostatistics:variogram:{geo_property.pk}:{geo_property.data_version}:{identifier}'
+
+
+def load_variogram(geo_property: Property, identifier: str) -> Optional[Dict]:
+    """The variogram computed for the current data with the parameters hashing to identifier"""
+    return cache.get(_variogram_key(geo_property, identifier))
+
+
+def get_variogram(geo_property: Property, parameters: Dict) -> Dict:
+    """Return a cached variogram, keyed by the property's data version and parameters"""
+    cache_key = _variogram_key(geo_property, parameter_hash(parameters))
+    variogram = cache.get(cache_key)
+    if variogram is None:
+        variogram = compute_variogram(geo_property, parameters)
+        cache.set(cache_key, variogram, VARIOGRAM_CACHE_TIMEOUT)
+    return variogram
+
+
+def clean_kriging_parameters(data: Dict) -> Dict:
+    """Validate kriging request parameters, raising ValueError
+
+    Without ``model`` the omnidirectional variogram is fitted automatically;
+    with it, ``nugget``, ``sill`` and ``range`` must be given as well.
+    """
+    parameters = _common_parameters(data)
+    block_size = data.get('block_size') or [10.0, 10.0, 5.0]
+    if isinstance(block_size, str):
+        block_size = block_size.split(',')
+    try:
+        block_size = [float(part) for part in block_size]
+    except (TypeError, ValueError):
+        raise ValueError("block_size must be three numbers")
+    if len(block_size) != 3 or not all(part > 0 for part in block_size):
+        raise ValueError("block_size must be three positive numbers")
+
+    parameters.update({
+        'block_size': block_size,
+        'max_samples': _number(data, 'max_samples', 16, int),
+        'min_samples': _number(data, 'min_samples', 2, int),
+        'search_radius': _number(data, 'search_radius', None),
+        'anisotropy': _anisotropy_parameters(data),
+        'model': None,
+    })
+    if not 1 <= parameters['min_samples'] <= parameters['max_samples'] <= 64:
+        raise ValueError("Sample limits must satisfy 1 <= min_samples <= max_samples <= 64")
+    if parameters['search_radius'] is not None and not parameters['search_radius'] > 0:
+        raise ValueError("search_radius must be positive")
+
+    if data.get('model'):
+        if data['model'] not in VARIOGRAM_MODELS:
+            raise ValueError(f"model must be one of {', '.join(VARIOGRAM_MODELS)}")
+        model = {'model': data['model']}
+        for name in ('nugget', 'sill', 'range'):
+            model[name] = _number(data, name, None)
+            if model[name] is None or model[name] < 0:
+                raise ValueError("nugget, sill and range are required with model and must not be negative")
+        if not model['range'] > 0 or not model['nugget'] + model['sill'] > 0:
+            raise ValueError("range and total sill must be positive")
+        parameters['model'] = model
+    return parameters
+
+
+def load_kriging(geo_property: Property, identifier: str) -> Optional[Dict[str, np.ndarray]]:
+    """The kriged grids for the current data with the parameters hashing to identifier"""
+    return _store.load('kriging', geo_property.pk, geo_property.data_version, tag=identifier)
+
+
+def krige_property(geo_property: Property, parameters: Dict) -> Dict[str, np.ndarray]:
+    """Ordinary-krige block centroids over the property's sample extent
+
+    The result (estimate, variance and grid description) is kept in the
+    array store per data version and parameters.
+    """
+    def build():
+        points, values, epsg = sample_points(geo_property, parameters['grade'], parameters['composite_length'])
+        if len(points) < parameters['min_samples']:
+            raise ValueError("Not enough assayed samples to krige")
+
+        model = parameters['model']
+        if model is None:
+            variogram_parameters = clean_variogram_parameters({
+                'grade': parameters['grade'], 'composite_length': parameters['composite_length'],
+            })
+            variogram_parameters['anisotropy'] = parameters['anisotropy']
+            variogram = get_variogram(geo_property, variogram_parameters)
+            model = variogram['directions'][0]['fit']
+            if model is None:
+                raise ValueError("Too few sample pairs to fit a variogram; pass model, nugget, sill and range")
+
+        origin, shape = grid_for_points(points, parameters['block_size'], MAX_KRIGING_BLOCKS)
+        grid = {'shape': shape, 'block_size': parameters['block_size']}
+        targets = block_centres(grid, 0, int(np.prod(shape))) + origin
+
+        anisotropy = parameters['anisotropy']
+        estimate, variance = ordinary_kriging(
+            _anisotropic(points - origin, anisotropy), values, _anisotropic(targets - origin, anisotropy), model,
+            parameters['max_samples'], parameters['min_samples'], parameters['search_radius'],
+        )
+        return {
+            'estimate': estimate.astype(np.float32).reshape(shape),
+            'variance': variance.astype(np.float32).reshape(shape),
+            'origin': origin,
+            'block_size': np.asarray(parameters['block_size']),
+            'epsg': np.array(epsg),
+            'nugget': np.array(model['nugget']),
+            'sill': np.array(model['sill']),
+            'range': np.array(model['range']),
+            'model': np.array(model['model']),
+        }
+
+    return _store.get_or_build('kriging', geo_property.pk, geo_property.data_version, build,
+                               tag=parameter_hash(parameters))
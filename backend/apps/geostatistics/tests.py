@@ -0,0 +1,103 @@
+import tempfile
+
+import numpy as np
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.ai_analysis.jobs import run_job
+from apps.ai_analysis.models import AnalysisJob
+from apps.geological_data import compositing, desurvey, sample_arrays
+from apps.geological_data.models import DrillHole
+from apps.geological_data.tests import GeologicalTestCase, make_hole, make_property, make_samples
+from apps.users.models import MiningUser
+
+from .kriging import chunk_size_for, ordinary_kriging
+from .variogram import experimental_variogram
+
+
+class PairBudgetTests(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.points, self.values = rng.uniform(0, 100, (300, 3)), rng.lognormal(0, 1, 300)
+
+    def test_variogram_does_not_depend_on_the_pair_budget(self):
+        directions = [None, (0.0, 0.0), (90.0, 0.0)]
+        expected = experimental_variogram(self.points, self.values, 10.0, 8, directions, 30.0)
+        for budget in (1, 1000):
+            with self.subTest(pair_budget=budget):
+                found = experimental_variogram(self.points, self.values, 10.0, 8, directions, 30.0,
+                                               pair_budget=budget)
+                for entry, reference in zip(found, expected):
+                    np.testing.assert_array_equal(entry['pairs'], reference['pairs'])
+                    np.testing.assert_allclose(entry['gamma'], reference['gamma'])
+
+    def test_kriging_chunks_shrink_as_neighbourhoods_grow(self):
+        self.assertGreater(chunk_size_for(16), chunk_size_for(64))
+        model = {'model': 'spherical', 'nugget': 0.1, 'sill': 1.0, 'range': 50.0}
+        targets = np.random.default_rng(1).uniform(0, 100, (50, 3))
+        whole = ordinary_kriging(self.points, self.values, targets, model, 16, chunk_size=50)
+        chunked = ordinary_kriging(self.points, self.values, targets, model, 16, chunk_size=7)
+        np.testing.assert_allclose(whole, chunked)
+
+
+@override_settings(ANALYSIS_JOBS_LOCAL=True)
+class GeostatisticsJobTests(GeologicalTestCase):
+    def setUp(self):
+        super().setUp()
+        arrays = tempfile.TemporaryDirectory()
+        self.addCleanup(arrays.cleanup)
+        settings_override = override_settings(GEOLOGICAL_ARRAY_ROOT=arrays.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # Derived arrays are cached per (property pk, data version), and the test database reuses pks
+        for lru in (sample_arrays._sample_arrays, compositing._composites, desurvey._coordinates):
+            lru.items.clear()
+
+        self.user = MiningUser.objects.create_user('geologist', password='unused')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.geo_property = make_property(latitude='49.1000000', longitude='-123.1000000')
+        for number in range(4):
+            hole = make_hole(self.geo_property, f'DH-{number:03d}')
+            # Collars about 70 m apart
+            DrillHole.objects.filter(pk=hole.pk).update(latitude=49.1 + number * 0.0005,
+                                                        longitude=-123.1 - (number % 2) * 0.0005)
+            make_samples(hole, 20)
+        self.url = f'/api/geostatistics/properties/{self.geo_property.pk}/'
+
+    def run_accepted_job(self, response):
+        self.assertEqual(response.status_code, 202)
+        run_job(response.json()['id'])
+        status_payload = self.client.get(response['Location']).json()
+        self.assertEqual(status_payload['status'], AnalysisJob.SUCCEEDED, status_payload.get('error'))
+        return status_payload
+
+    def test_variogram_is_computed_by_a_job(self):
+        url = f'{self.url}variogram/?n_lags=6'
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.get(url)
+        self.assertEqual(len(callbacks), 1)
+        status_payload = self.run_accepted_job(response)
+
+        variogram = self.client.get(status_payload['result_url'])
+        self.assertEqual(variogram.status_code, 200)
+        self.assertEqual(len(variogram.json()['directions'][0]['gamma']), 6)
+        # The same parameters now read the stored variogram
+        self.assertEqual(self.client.get(url).json(), variogram.json())
+
+    def test_kriging_is_computed_by_a_job(self):
+        parameters = {'block_size': '50,50,20', 'model': 'spherical', 'nugget': 0.1, 'sill': 30, 'range': 150}
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(f'{self.url}kriging/', parameters, format='json')
+        self.assertEqual(len(callbacks), 1)
+        status_payload = self.run_accepted_job(response)
+
+        result = self.client.get(status_payload['result_url'])
+        self.assertEqual(result.status_code, 200)
+        self.assertGreater(result.json()['estimated_blocks'], 0)
+        again = self.client.post(f'{self.url}kriging/', parameters, format='json')
+        self.assertEqual((again.status_code, again.json()), (200, result.json()))
+
+    def test_unknown_result_is_not_found(self):
+        self.assertEqual(self.client.get(f'{self.url}kriging/?result=missing').status_code, 404)
+        self.assertEqual(self.client.get(f'{self.url}variogram/?result=missing').status_code, 404)
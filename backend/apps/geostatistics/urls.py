@@ -0,0 +1,10 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import PropertyGeostatisticsViewSet
+
+router = DefaultRouter()
+router.register(r'properties', PropertyGeostatisticsViewSet, basename='geostatistics-property')
+
+urlpatterns = [
+    path('api/geostatistics/', include(router.urls))
+]
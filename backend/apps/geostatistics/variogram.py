@@ -0,0 +1,144 @@
+# backend/apps/geostatistics/variogram.py
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.optimize import curve_fit
+from scipy.spatial import cKDTree
+
+# Most point pairs held at once; blocks get budget // points rows so a block
+# stays under it even when the largest lag spans the whole data set
+PAIR_BUDGET = 1_000_000
+
+
+def spherical(h, nugget, sill, range_):
+    ratio = np.minimum(np.asarray(h, dtype=np.float64) / range_, 1.0)
+    return nugget + sill * (1.5 * ratio - 0.5 * ratio ** 3)
+
+
+def exponential(h, nugget, sill, range_):
+    # Practical range: 95% of the sill is reached at range_
+    return nugget + sill * (1 - np.exp(-3 * np.asarray(h, dtype=np.float64) / range_))
+
+
+def gaussian(h, nugget, sill, range_):
+    return nugget + sill * (1 - np.exp(-3 * (np.asarray(h, dtype=np.float64) / range_) ** 2))
+
+
+VARIOGRAM_MODELS = {
+    'spherical': spherical,
+    'exponential': exponential,
+    'gaussian': gaussian,
+}
+
+
+def evaluate(model: Dict, h) -> np.ndarray:
+    """Semivariance of a fitted model; zero at zero lag, nugget just beyond it"""
+    h = np.asarray(h, dtype=np.float64)
+    gamma = VARIOGRAM_MODELS[model['model']](h, model['nugget'], model['sill'], model['range'])
+    return np.where(h > 0, gamma, 0.0)
+
+
+def direction_vector(azimuth: float, dip: float) -> np.ndarray:
+    azimuth, dip = np.radians(azimuth), np.radians(dip)
+    return np.array([np.cos(dip) * np.sin(azimuth), np.cos(dip) * np.cos(azimuth), -np.sin(dip)])
+
+
+def experimental_variogram(points: np.ndarray, values: np.ndarray, lag: float, n_lags: int,
+                           directions: Sequence[Optional[Tuple[float, float]]] = (None,),
+                           tolerance: float = 22.5, bandwidth: Optional[float] = None,
+                           pair_budget: int = PAIR_BUDGET) -> List[Dict]:
+    """Semivariance per lag bin for each direction, streaming pairs block by block
+
+    Each block of points is matched against a KD-tree of all points up to
+    the largest lag, so only pairs that land in a bin are generated, and a
+    block has few enough rows that it holds at most ``pair_budget`` pairs
+    (one row at minimum). ``directions`` holds
+    ``(azimuth, dip)`` tuples, or None for omnidirectional; a pair counts for
+    a direction when its angle to it is within ``tolerance`` degrees and,
+    with ``bandwidth``, its offset from the direction's axis is within that
+    many metres.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    max_distance = lag * n_lags
+    tree = cKDTree(points)
+    axes = [None if direction is None else direction_vector(*direction) for direction in directions]
+    min_cosine = np.cos(np.radians(tolerance))
+    block_size = max(1, pair_budget // max(len(points), 1))
+
+    pairs = np.zeros((len(axes), n_lags))
+    squared = np.zeros((len(axes), n_lags))
+    distances = np.zeros((len(axes), n_lags))
+
+    for start in range(0, len(points), block_size):
+        block = points[start:start + block_size]
+        found = cKDTree(block).sparse_distance_matrix(tree, max_distance, output_type='ndarray')
+        first, second, distance = found['i'] + start, found['j'], found['v']
+        # Each unordered pair once, without self pairs
+        keep = second > first
+        first, second, distance = first[keep], second[keep], distance[keep]
+        lag_bin = np.minimum((distance / lag).astype(np.int64), n_lags - 1)
+        difference = (values[first] - values[second]) ** 2
+
+        for index, axis in enumerate(axes):
+            selected = slice(None)
+            if axis is not None:
+                offset = points[second] - points[first]
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    cosine = np.abs(offset @ axis) / distance
+                selected = cosine >= min_cosine
+                if bandwidth is not None:
+                    selected &= distance * np.sqrt(np.maximum(1 - cosine ** 2, 0)) <= bandwidth
+            pairs[index] += np.bincount(lag_bin[selected], minlength=n_lags)
+            squared[index] += np.bincount(lag_bin[selected], weights=difference[selected], minlength=n_lags)
+            distances[index] += np.bincount(lag_bin[selected], weights=distance[selected], minlength=n_lags)
+
+    results = []
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for index, direction in enumerate(directions):
+            results.append({
+                'azimuth': None if direction is None else direction[0],
+                'dip': None if direction is None else direction[1],
+                'lags': np.where(pairs[index] > 0, distances[index] / pairs[index], np.nan),
+                'gamma': np.where(pairs[index] > 0, squared[index] / (2 * pairs[index]), np.nan),
+                'pairs': pairs[index].astype(np.int64),
+            })
+    return results
+
+
+def fit_variogram(lags: np.ndarray, gamma: np.ndarray, pairs: np.ndarray, model: str = 'auto') -> Optional[Dict]:
+    """Fit nugget, partial sill and range by pair-weighted least squares
+
+    With ``model='auto'`` every standard model is tried and the one with the
+    lowest weighted error is returned. Returns None with fewer than three
+    populated lag bins.
+    """
+    populated = (pairs > 0) & np.isfinite(gamma)
+    if populated.sum() < 3:
+        return None
+    lags, gamma, pairs = lags[populated], gamma[populated], pairs[populated]
+
+    names = list(VARIOGRAM_MODELS) if model == 'auto' else [model]
+    sigma = 1 / np.sqrt(pairs)
+    upper = max(float(gamma.max()), 1e-12)
+    guess = [float(gamma[0]) / 2, upper / 2, float(lags.max()) / 2]
+    bounds = ([0, 0, 1e-9], [upper * 2, upper * 2, float(lags.max()) * 4])
+
+    best = None
+    for name in names:
+        function = VARIOGRAM_MODELS[name]
+        try:
+            parameters, _ = curve_fit(function, lags, gamma, p0=guess, sigma=sigma, bounds=bounds, maxfev=5000)
+        except (RuntimeError, ValueError):
+            continue
+        residual = (function(lags, *parameters) - gamma) / sigma
+        error = float(np.sum(residual ** 2) / np.sum(1 / sigma ** 2))
+        if best is None or error < best['weighted_error']:
+            best = {
+                'model': name,
+                'nugget': float(parameters[0]),
+                'sill': float(parameters[1]),
+                'range': float(parameters[2]),
+                'weighted_error': error,
+            }
+    return best
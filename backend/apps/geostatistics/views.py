@@ -0,0 +1,96 @@
+import numpy as np
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.settings import api_settings
+from apps.ai_analysis.jobs import submit_or_reuse_job
+from apps.ai_analysis.views import job_accepted
+from apps.geological_data.models import Property
+from apps.geological_data.renderers import NPZRenderer
+from .services import (
+    clean_kriging_parameters, clean_variogram_parameters, load_kriging, load_variogram, parameter_hash,
+)
+
+
+class PropertyGeostatisticsViewSet(viewsets.GenericViewSet):
+    """Variograms and kriging for the drill data of one property
+
+    Both are computed by analysis jobs: a request for a result that has not
+    been computed for the current data answers 202 with the job's status
+    URL, which links to the result once the job has succeeded.
+    """
+    queryset = Property.objects.all()
+    permission_classes = [IsAuthenticated]
+
+    @action(detail=True, methods=['get'])
+    def variogram(self, request, pk=None):
+        """Experimental variogram with fitted models
+
+        ?grade=, ?lag= (defaults to half the data extent over n_lags),
+        ?n_lags=, ?directions=azimuth/dip,..., ?tolerance= degrees,
+        ?bandwidth= metres, ?model=auto|spherical|exponential|gaussian and
+        ?composite_length= to work on composites instead of raw samples.
+        ?result= reads a computed variogram by the id its job reported.
+        """
+        geo_property_obj = self.get_object()
+        identifier = request.query_params.get('result')
+        if identifier:
+            variogram = load_variogram(geo_property_obj, identifier)
+            if variogram is None:
+                return Response({'error': 'Variogram not found for the current data'},
+                                status=status.HTTP_404_NOT_FOUND)
+            return Response(variogram)
+
+        try:
+            parameters = clean_variogram_parameters(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        variogram = load_variogram(geo_property_obj, parameter_hash(parameters))
+        if variogram is not None:
+            return Response(variogram)
+        return job_accepted(request, submit_or_reuse_job(request.user, 'variogram', geo_property_obj, parameters))
+
+    @action(detail=True, methods=['get', 'post'],
+            renderer_classes=[*api_settings.DEFAULT_RENDERER_CLASSES, NPZRenderer])
+    def kriging(self, request, pk=None, format=None):
+        """Ordinary kriging of block centroids over the property's samples
+
+        POST takes grade, block_size, max_samples, min_samples,
+        search_radius, anisotropy (azimuth, dip, semi_ratio, minor_ratio)
+        and optionally a variogram (model, nugget, sill, range); without one
+        the omnidirectional variogram is fitted. GET ?result= reads the grids
+        by the id the job reported. ?format=npz returns the grids.
+        """
+        geo_property_obj = self.get_object()
+        if request.method == 'POST':
+            try:
+                parameters = clean_kriging_parameters(request.data)
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            result = load_kriging(geo_property_obj, parameter_hash(parameters))
+            if result is None:
+                return job_accepted(request, submit_or_reuse_job(request.user, 'kriging', geo_property_obj,
+                                                                 parameters))
+        else:
+            result = load_kriging(geo_property_obj, request.query_params.get('result', ''))
+            if result is None:
+                return Response({'error': 'Kriging result not found for the current data'},
+                                status=status.HTTP_404_NOT_FOUND)
+
+        if request.accepted_renderer.format == 'npz':
+            return Response(result)
+        estimate = result['estimate']
+        estimated = np.isfinite(estimate)
+        return Response({
+            'property': geo_property_obj.pk,
+            'data_version': geo_property_obj.data_version,
+            'epsg': int(result['epsg']),
+            'origin': result['origin'].tolist(),
+            'block_size': result['block_size'].tolist(),
+            'shape': list(estimate.shape),
+            'variogram': {name: result[name].item() for name in ('model', 'nugget', 'sill', 'range')},
+            'estimated_blocks': int(estimated.sum()),
+            'mean_estimate': float(estimate[estimated].mean()) if estimated.any() else None,
+            'mean_variance': float(result['variance'][estimated].mean()) if estimated.any() else None,
+        })
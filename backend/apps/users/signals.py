@@ -0,0 +1,18 @@
+# backend/apps/users/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from mining_ai_project.cache import invalidate
+
+from .models import MiningUser
+
+# Written on every login; no cached listing shows them
+ACTIVITY_FIELDS = {'last_login', 'last_active'}
+
+
+@receiver([post_save, post_delete], sender=MiningUser)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    """Drop cached user listings, except for the activity stamps written on every login"""
+    if update_fields and set(update_fields) <= ACTIVITY_FIELDS:
+        return
+    invalidate('users')
@@ -0,0 +1,30 @@
+# backend/apps/users/tests.py
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from mining_ai_project.cache import get_generation
+
+from .models import MiningUser
+
+
+class UserCacheInvalidationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = MiningUser.objects.create_user('geologist', email='geologist@example.com', password='secret-pass')
+        self.client = APIClient()
+
+    def test_login_keeps_cached_user_listings(self):
+        generation = get_generation('users')
+        # Invalidation waits for the commit, so run the on_commit callbacks
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/auth/login/', {'username': 'geologist', 'password': 'secret-pass'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(get_generation('users'), generation)
+
+    def test_profile_change_drops_cached_user_listings(self):
+        generation = get_generation('users')
+        self.user.company = 'Example Mining'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save(update_fields=['company', 'last_active'])
+        self.assertNotEqual(get_generation('users'), generation)
@@ -6,6 +6,7 @@ from rest_framework.authtoken.models import Token
 from django.contrib.auth import authenticate
 from django.db.models import Q
 from django.utils import timezone
+from mining_ai_project.cache import ResponseCacheMixin
 from .models import MiningUser, UserProfile
 from .serializers import (UserRegistrationSerializer, UserProfileUpdateSerializer,
                          UserPublicSerializer, UserDetailSerializer)
@@ -93,9 +94,10 @@ class ProfileView(generics.RetrieveUpdateAPIView):
             return UserDetailSerializer
         return UserProfileUpdateSerializer
 
-class PublicUserListView(generics.ListAPIView):
+class PublicUserListView(ResponseCacheMixin, generics.ListAPIView):
     serializer_class = UserPublicSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cache_namespace = 'users'
     
     def get_queryset(self):
         queryset = MiningUser.objects.filter(
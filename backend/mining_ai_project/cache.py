@@ -0,0 +1,153 @@
+# backend/mining_ai_project/cache.py
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+
+# Headers replayed from a cached response
+CACHED_HEADERS = ('Content-Type', 'Content-Disposition', 'ETag', 'Last-Modified')
+
+
+def _generation_key(namespace: str) -> str:
+    return f'response-cache:{namespace}:generation'
+
+
+def get_generation(namespace: str) -> int:
+    """Current generation of a namespace; every response key includes it
+
+    A missing counter restarts from the clock, so an evicted counter can
+    never bring back responses cached under an earlier generation.
+    """
+    generation = cache.get(_generation_key(namespace))
+    if generation is None:
+        cache.add(_generation_key(namespace), time.time_ns(), None)
+        generation = cache.get(_generation_key(namespace), 0)
+    return generation
+
+
+def invalidate(namespace: str):
+    """Drop every cached response of a namespace once the current transaction commits"""
+    def bump():
+        try:
+            cache.incr(_generation_key(namespace))
+        except ValueError:
+            # No counter means nothing was cached under it
+            pass
+    transaction.on_commit(bump)
+
+
+class _CachedResponse(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+class ResponseCacheMixin:
+    """Serve repeated GETs of ``cached_actions`` from the shared cache
+
+    Responses are keyed by path, sorted query parameters, rendered format and
+    the caller's permission scope, under the generation of
+    ``cache_namespace``. Writes invalidate a namespace by bumping its
+    generation (see ``invalidate``), so stale entries are never read and
+    simply expire. On a miss only one request per key renders the response:
+    the others wait briefly for it to appear in the cache.
+    """
+    cache_namespace = None
+    cached_actions = ('list', 'retrieve')
+    cache_timeout = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+    cache_max_bytes = getattr(settings, 'RESPONSE_CACHE_MAX_BYTES', 5 * 1024 * 1024)
+    lock_timeout = 30
+    lock_wait = 5.0
+    lock_poll_interval = 0.05
+
+    def get_cache_scope(self) -> str:
+        """Who the response is for; responses differing by user must say so here"""
+        user = self.request.user
+        if user.is_staff:
+            return 'staff'
+        return 'authenticated' if user.is_authenticated else 'anonymous'
+
+    def get_cache_key(self) -> str:
+        request = self.request
+        parts = [
+            request.path,
+            sorted((name, sorted(values)) for name, values in request.query_params.lists()),
+            request.accepted_renderer.format,
+            self.get_cache_scope(),
+        ]
+        digest = hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+        return f'response-cache:{self.cache_namespace}:{get_generation(self.cache_namespace)}:{digest}'
+
+    def is_response_cached(self) -> bool:
+        action = getattr(self, 'action', None) or 'list'
+        if self.request.method != 'GET' or action not in self.cached_actions:
+            return False
+        # Streamed exports are never stored, so waiting on their lock only delays them
+        return not getattr(self, 'is_streaming_export', lambda: False)()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._response_cache_key = self._response_cache_lock = None
+        if not self.is_response_cached():
+            return
+
+        key = self.get_cache_key()
+        cached = cache.get(key)
+        if cached is None:
+            lock_key, token = f'{key}:lock', uuid.uuid4().hex
+            if cache.add(lock_key, token, self.lock_timeout):
+                self._response_cache_lock = (lock_key, token)
+            else:
+                cached = self._wait_for(key)
+        if cached is not None:
+            raise _CachedResponse(self._replay(cached))
+        self._response_cache_key = key
+
+    def _wait_for(self, key):
+        """Poll for the response another request is rendering; None after lock_wait"""
+        deadline = time.monotonic() + self.lock_wait
+        while time.monotonic() < deadline:
+            time.sleep(self.lock_poll_interval)
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+        return None
+
+    def _replay(self, cached):
+        content, status_code, headers = cached
+        response = HttpResponse(content, status=status_code)
+        for name, value in headers.items():
+            response[name] = value
+        response['X-Cache'] = 'HIT'
+        return response
+
+    def handle_exception(self, exc):
+        if isinstance(exc, _CachedResponse):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, '_response_cache_key', None)
+        try:
+            if key and response.status_code == 200 and hasattr(response, 'render'):
+                response.render()
+                if len(response.content) <= self.cache_max_bytes:
+                    headers = {name: response[name] for name in CACHED_HEADERS if response.has_header(name)}
+                    cache.set(key, (response.content, response.status_code, headers), self.cache_timeout)
+                    response['X-Cache'] = 'MISS'
+        finally:
+            self._release_lock()
+        return response
+
+    def _release_lock(self):
+        lock = getattr(self, '_response_cache_lock', None)
+        if lock is not None:
+            lock_key, token = lock
+            # Only remove our own lock, not one taken after ours expired
+            if cache.get(lock_key) == token:
+                cache.delete(lock_key)
+            self._response_cache_lock = None
@@ -0,0 +1,11 @@
+# backend/mining_ai_project/celery.py
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mining_ai_project.settings.base')
+
+# Start a worker with: celery -A mining_ai_project.celery worker --loglevel=info
+app = Celery('mining_ai_project')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -0,0 +1,75 @@
+# backend/mining_ai_project/renderers.py
+import datetime
+import decimal
+import uuid
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+_fallback_encoder = JSONEncoder()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """DRF's JSONRenderer on top of orjson when it is installed
+
+    Compact output is encoded by orjson, which handles datetimes, UUIDs and
+    numpy arrays natively; anything else (Decimal, lazy strings, querysets)
+    goes through DRF's encoder. Indented output, as the browsable API asks
+    for, and installs without orjson use the standard renderer.
+    """
+    if orjson is not None:
+        options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=_fallback_encoder.default, option=self.options)
+        # Keep the output a strict JavaScript subset, as JSONRenderer does
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+def _msgpack_default(obj):
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime.date, datetime.time)):
+        # Aware datetimes are packed natively as timestamps; this covers the rest
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    return _fallback_encoder.default(obj)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """MessagePack, selected with ``Accept: application/msgpack`` or ``?format=msgpack``
+
+    Decimals become floats and timezone-aware datetimes use the MessagePack
+    timestamp extension.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if msgpack is None:
+            raise ImproperlyConfigured('MessagePackRenderer requires the msgpack package')
+        return msgpack.packb(data, default=_msgpack_default, use_bin_type=True, datetime=True)
@@ -33,7 +33,8 @@ THIRD_PARTY_APPS = [
 LOCAL_APPS = [
     'apps.users',
     'apps.geological_data',
-#     'apps.ai_analysis',
+    'apps.geostatistics',
+    'apps.ai_analysis',
 #     'apps.rewards',
 #     'apps.community',
 #     'apps.nft_system',
@@ -113,6 +114,66 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Derived drill-data arrays (desurveyed coordinates, block models)
+GEOLOGICAL_ARRAY_ROOT = MEDIA_ROOT / 'arrays'
+
+# Block models are built as analysis jobs (see apps/ai_analysis/jobs.py);
+# each build spreads its blocks over at most this many processes
+BLOCK_MODEL_WORKERS = int(os.environ.get('BLOCK_MODEL_WORKERS', 2))
+
+# Cache: Redis when REDIS_URL is set (docker-compose runs a redis service),
+# otherwise per-process memory for local development
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Cached API responses (see mining_ai_project/cache.py)
+RESPONSE_CACHE_TIMEOUT = 300
+RESPONSE_CACHE_MAX_BYTES = 5 * 1024 * 1024
+
+# AI analysis jobs (see apps/ai_analysis/jobs.py) run on Celery workers when a
+# broker is configured, otherwise on a thread pool inside the web process
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'memory://')
+CELERY_TASK_SERIALIZER = 'json'
+CELERY_ACCEPT_CONTENT = ['json']
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+ANALYSIS_JOBS_LOCAL = 'CELERY_BROKER_URL' not in os.environ
+ANALYSIS_LOCAL_WORKERS = 2
+# Seconds an unfinished job may be reused by an identical request before it
+# counts as lost (a restarted local pool or a crashed worker)
+ANALYSIS_JOB_TIMEOUT = 60 * 60
+
+# AI models kept loaded per process, and the (name, model_type, version) of
+# models each Celery worker process loads at start
+AI_MODEL_CACHE_SIZE = 2
+AI_WARM_MODELS = [
+    ('Demo Drilling Analyzer', 'drilling', '1.0'),
+]
+
+# Micro-batching of transformer inference (see apps/ai_analysis/batching.py):
+# concurrent requests wait up to AI_BATCH_WAIT_MS to share a forward pass
+AI_BATCH_MAX_SIZE = 32
+AI_BATCH_MAX_TOKENS = 16384
+AI_BATCH_WAIT_MS = 5
+AI_BATCH_BUCKET_WIDTH = 64
+AI_MAX_SEQUENCE_LENGTH = 512
+
+# Cached drill-text embeddings (see apps/ai_analysis/embeddings.py), one
+# directory per model version, each capped at AI_EMBEDDING_STORE_MAX_BYTES
+AI_EMBEDDING_ROOT = MEDIA_ROOT / 'embeddings'
+AI_EMBEDDING_STORE_MAX_BYTES = 256 * 1024 * 1024
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -125,6 +186,11 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'mining_ai_project.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        'mining_ai_project.renderers.MessagePackRenderer',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
 }
@@ -5,5 +5,7 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path('', include('apps.users.urls')),    
     path('', include('apps.geological_data.urls')),
+    path('', include('apps.geostatistics.urls')),
+    path('', include('apps.ai_analysis.urls')),
     path('api-auth/', include('rest_framework.urls'))
 ]